@@ -0,0 +1,85 @@
+from dataclasses import asdict
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import SQLModel
+from app.api.deps import require_admin
+from app.core.jobs import job_queue
+from app.core.memory_diagnostics import memory_report, tracemalloc_session
+from app.core.profiling import profiler
+from app.core.reaper import REAPER_ENABLED, REAPER_INTERVAL_SECONDS, reaper_metrics
+from app.core.route_prefetch import prefetched_routes
+from app.core.security import hash_metrics
+from app.core.startup import startup_profile
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+class ProfilingConfig(SQLModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = None
+
+def profiling_status() -> dict:
+    return {
+        "enabled": profiler.enabled,
+        "sample_rate": profiler.sample_rate,
+        "interval_ms": profiler.interval * 1000,
+        "output_dir": profiler.output_dir,
+        "profiles_written": profiler.profiles_written
+    }
+
+@router.get("/profiling")
+async def get_profiling():
+    return profiling_status()
+
+@router.post("/profiling")
+async def set_profiling(config: ProfilingConfig):
+    """Switch sampling on/off or change the sampled fraction without a redeploy."""
+    profiler.configure(enabled=config.enabled, sample_rate=config.sample_rate)
+    return profiling_status()
+
+@router.get("/startup")
+async def get_startup_profile():
+    """Import and init timings of this instance's cold start."""
+    return startup_profile.as_dict()
+
+@router.get("/prefetch")
+async def get_prefetch_stats():
+    """Route prefetch effectiveness in this worker: hit rate of /route lookups and job counters."""
+    return {"routes": prefetched_routes.stats(), "jobs": asdict(job_queue.metrics)}
+
+@router.get("/reaper")
+async def get_reaper_stats():
+    """Cleanup passes in this worker: runs, passes skipped because another worker held the lock, rows removed."""
+    return {"enabled": REAPER_ENABLED, "interval_seconds": REAPER_INTERVAL_SECONDS, **asdict(reaper_metrics)}
+
+@router.get("/password-hashing")
+async def get_password_hashing():
+    """bcrypt pool load in this worker: in-flight and waiting hashes, rejections and wait times."""
+    return asdict(hash_metrics)
+
+@router.get("/memory")
+async def get_memory():
+    """Bytes retained per convoy and by process-wide caches in this worker, plus leak suspects."""
+    return memory_report()
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(1, ge=1, le=50)):
+    """Start tracing allocations and record the baseline snapshot for later diffs."""
+    tracemalloc_session.start(frames)
+    return {"tracing": True, "frames": frames}
+
+@router.get("/memory/tracemalloc/diff")
+async def diff_tracemalloc(
+    limit: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset: bool = False
+):
+    """Largest allocation changes since the baseline; `reset` makes this snapshot the new baseline."""
+    try:
+        return tracemalloc_session.diff(limit=limit, key_type=key_type, reset=reset)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc():
+    tracemalloc_session.stop()
+    return {"tracing": False}
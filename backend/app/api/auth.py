@@ -1,3 +1,4 @@
+import math
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -5,7 +6,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.core.database import get_session
-from app.core.security import create_access_token, verify_password, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.security import (
+    create_access_token, verify_password_async, ACCESS_TOKEN_EXPIRE_MINUTES, UNUSABLE_PASSWORD,
+    PasswordHashBusy, PASSWORD_HASH_WAIT_SECONDS
+)
 from app.models.domain import User
 
 router = APIRouter()
@@ -19,7 +23,15 @@ async def login_for_access_token(
     result = await session.execute(statement)
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        verified = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHashBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, try again",
+            headers={"Retry-After": str(math.ceil(PASSWORD_HASH_WAIT_SECONDS))},
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -28,24 +40,22 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/guest")
 async def guest_login(session: AsyncSession = Depends(get_session)):
     import uuid
-    from app.core.security import get_password_hash
     
     # 1. Generate unique guest credentials
     guest_uuid = uuid.uuid4().hex
     username = f"guest_{guest_uuid[:8]}"
-    password = uuid.uuid4().hex  # Strong random password
     
-    # 2. Create Guest User
+    # 2. Create Guest User (token-only: no password, so nothing to hash)
     guest_user = User(
         username=username,
-        hashed_password=get_password_hash(password),
+        hashed_password=UNUSABLE_PASSWORD,
         is_guest=True
     )
     session.add(guest_user)
@@ -55,7 +65,7 @@ async def guest_login(session: AsyncSession = Depends(get_session)):
     # 3. Generate Token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": guest_user.username}, expires_delta=access_token_expires
+        data={"sub": guest_user.username, "uid": guest_user.id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
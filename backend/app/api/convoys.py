@@ -1,75 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, delete, func, insert, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from typing import List
-from app.api.deps import get_current_user
-from app.core.database import get_session
-from app.models.domain import Convoy, ConvoyCreate, ConvoyRead, ConvoyMember, ConvoyRole, User
-from app.core.routing import get_route_geometry
-from sqlmodel import SQLModel
+from typing import List, Optional, Tuple
+from app.api.deps import get_current_user, get_optional_user
+from app.core.database import get_session, get_read_session
+from app.models.domain import (
+    Convoy, ConvoyBatch, ConvoyCreate, ConvoyLiveState, ConvoyRead, ConvoyMember, ConvoyRole,
+    ConvoySummary, ConvoySummaryPage,
+    NearbyConvoy, NearbyMember, User, UserRead
+)
+from app.core.routing import get_cached_route, get_route_geometry
+from app.core.route_prefetch import prefetched_routes, schedule_route_prefetch
+from app.core.route_tracker import route_tracker
+from app.core.smart_stop import poi_index, suggest_stops
+from app.core.socket_manager import manager
+from app.core.fast_json import FastJSONResponse
+from app.core.convoy_cache import convoy_cache, compute_etag, etag_matches
+from app.core.convoy_queries import convoy_summary_query, delete_convoy_if_empty_query, my_convoys_query
+from app.core.geo import geography_point, point_wkt
+from sqlmodel import Field, SQLModel
+import base64
+from datetime import datetime
 import secrets
 import string
 import uuid
 
 router = APIRouter()
 
+# Upper bound on ids per /convoys/batch call
+MAX_BATCH_CONVOYS = 100
+
 class JoinConvoyRequest(SQLModel):
     invite_code: str
 
+class ConvoyBatchRequest(SQLModel):
+    ids: List[uuid.UUID] = Field(min_length=1, max_length=MAX_BATCH_CONVOYS)
+    include_live: bool = False
+
 def get_share_link(invite_code: str) -> str:
     return f"weride://convoy/join?code={invite_code}"
 
+def serialize_convoy(convoy: Convoy) -> dict:
+    """
+    Build the JSON-ready ConvoyRead view for a convoy loaded with its members.
+    """
+    response = ConvoyRead.from_orm(convoy)
+    response.share_link = get_share_link(convoy.invite_code)
+    # pydantic-core's compiled serializer; much cheaper than jsonable_encoder
+    return response.model_dump(mode="json")
+
+def cache_view(payload: dict) -> FastJSONResponse:
+    """
+    Store a freshly built convoy view in the read cache and return it with its ETag.
+    """
+    etag = convoy_cache.set_view(payload["id"], payload)
+    return FastJSONResponse(content=payload, headers={"ETag": etag})
+
+def cached_response(payload, etag: str, if_none_match: Optional[str]) -> Response:
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FastJSONResponse(content=payload, headers={"ETag": etag})
+
+INVITE_CODE_ATTEMPTS = 5
+
+def encode_cursor(joined_at: datetime, convoy_id: uuid.UUID) -> str:
+    raw = f"{joined_at.isoformat()}|{convoy_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        joined_at, convoy_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(joined_at), uuid.UUID(convoy_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 def generate_invite_code(length: int = 6) -> str:
     chars = string.ascii_uppercase + string.digits
     return ''.join(secrets.choice(chars) for _ in range(length))
 
+async def require_membership(session: AsyncSession, convoy_id: uuid.UUID, user: User):
+    """Member-only views expose live positions; everyone else gets 403."""
+    if not await session.get(ConvoyMember, (convoy_id, user.id)):
+        raise HTTPException(status_code=403, detail="You are not a member of this convoy")
+
 @router.post("/", response_model=ConvoyRead)
 async def create_convoy(
     convoy_data: ConvoyCreate,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-
-    invite_code = generate_invite_code()
-    existing_code = await session.execute(select(Convoy).where(Convoy.invite_code == invite_code))
-    while existing_code.scalars().first():
-        invite_code = generate_invite_code()
-        existing_code = await session.execute(select(Convoy).where(Convoy.invite_code == invite_code))
-
     # FIX 1: Strip timezone info to match DB naive timestamp column
     if convoy_data.start_time and convoy_data.start_time.tzinfo:
         convoy_data.start_time = convoy_data.start_time.replace(tzinfo=None)
 
-    convoy = Convoy(
-        invite_code=invite_code,
-        **convoy_data.dict()
-    )
-    session.add(convoy)
-    
-    # FIX 2: Use explicit convoy_id instead of the object to ensure FK is set correctly
-    member = ConvoyMember(
-        convoy_id=convoy.id, 
-        user_id=current_user.id,
-        role=ConvoyRole.LEADER
-    )
-    session.add(member)
+    # Build the row in Python (id, status defaults) without attaching it to the session
+    values = Convoy(invite_code="", **convoy_data.dict()).dict()
+    values["destination_geog"] = point_wkt(values["destination_lat"], values["destination_lon"])
 
-    await session.commit()
-    await session.refresh(convoy)
+    # 1. Insert with a fresh invite code, retrying only when the code is already taken
+    for _ in range(INVITE_CODE_ATTEMPTS):
+        values["invite_code"] = generate_invite_code()
+        result = await session.execute(
+            pg_insert(Convoy)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["invite_code"])
+            .returning(Convoy.id)
+        )
+        if result.first():
+            break
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate an invite code, try again")
 
-    convoy_id = convoy.id
-    session.expire(convoy) 
-    
-    result = await session.execute(
-        select(Convoy).where(Convoy.id == convoy_id).options(selectinload(Convoy.members))
+    # 2. Creator becomes the leader, committed in the same transaction
+    await session.execute(
+        insert(ConvoyMember).values(
+            convoy_id=values["id"],
+            user_id=current_user.id,
+            role=ConvoyRole.LEADER
+        )
     )
-    db_convoy = result.scalars().first()
-    
-    # FIX: Revert to from_orm to correctly handle SQLModel objects
-    response = ConvoyRead.from_orm(db_convoy)
-    response.share_link = get_share_link(db_convoy.invite_code)
-    return response
+    await session.commit()
+
+    # 3. We already know everything the response needs, so no reload
+    response = ConvoyRead(**values, members=[UserRead.from_orm(current_user)])
+    response.share_link = get_share_link(response.invite_code)
+
+    convoy_cache.invalidate_user(current_user.id)
+    await schedule_route_prefetch(str(values["id"]), current_user.id, values["destination_lat"], values["destination_lon"])
+    return cache_view(response.model_dump(mode="json"))
 
 @router.post("/join", response_model=ConvoyRead)
 async def join_convoy(
@@ -77,7 +139,28 @@ async def join_convoy(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
+    # Re-joining a convoy we already belong to is answered from the cache
+    cached = convoy_cache.get_by_invite_code(join_req.invite_code)
+    if cached and any(m["id"] == current_user.id for m in cached[0]["members"]):
+        payload, etag = cached
+        return FastJSONResponse(content=payload, headers={"ETag": etag})
 
+    # 1. Resolve the invite code and insert the membership in one statement.
+    # Already being a member is a no-op thanks to ON CONFLICT.
+    member_select = select(
+        Convoy.id,
+        literal(current_user.id),
+        literal(ConvoyRole.MEMBER, ConvoyMember.__table__.c.role.type)
+    ).where(Convoy.invite_code == join_req.invite_code)
+    result = await session.execute(
+        pg_insert(ConvoyMember)
+        .from_select(["convoy_id", "user_id", "role"], member_select)
+        .on_conflict_do_nothing()
+        .returning(ConvoyMember.convoy_id)
+    )
+    joined = result.first() is not None
+
+    # 2. Load the convoy with its members inside the same transaction
     result = await session.execute(
         select(Convoy).where(Convoy.invite_code == join_req.invite_code).options(selectinload(Convoy.members))
     )
@@ -85,75 +168,202 @@ async def join_convoy(
     if not convoy:
         raise HTTPException(status_code=404, detail="Convoy not found")
 
-    if any(u.id == current_user.id for u in convoy.members):
-        # FIX: Revert to from_orm
-        response = ConvoyRead.from_orm(convoy)
-        response.share_link = get_share_link(convoy.invite_code)
-        return response
-
-    member = ConvoyMember(
-        convoy_id=convoy.id,
-        user_id=current_user.id,
-        role=ConvoyRole.MEMBER
-    )
-    session.add(member)
+    response = serialize_convoy(convoy)
     await session.commit()
-    
-    convoy_id = convoy.id
-    session.expire(convoy)
-    result = await session.execute(
-        select(Convoy).where(Convoy.id == convoy_id).options(selectinload(Convoy.members))
-    )
-    final_convoy = result.scalars().first()
-    
-    # FIX: Revert to from_orm
-    response = ConvoyRead.from_orm(final_convoy)
-    response.share_link = get_share_link(final_convoy.invite_code)
-    return response
+
+    if joined:
+        convoy_cache.invalidate_convoy(str(convoy.id))
+        convoy_cache.invalidate_user(current_user.id)
+        await schedule_route_prefetch(str(convoy.id), current_user.id, convoy.destination_lat, convoy.destination_lon)
+    return cache_view(response)
 
 @router.get("/mine", response_model=List[ConvoyRead])
 async def get_my_convoys(
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session),
+    if_none_match: Optional[str] = Header(None)
 ):
+    # 1. Serve from cache when the membership list and every convoy view are cached
+    convoy_ids = convoy_cache.get_memberships(current_user.id)
+    if convoy_ids is not None:
+        views = [convoy_cache.get_view(cid) for cid in convoy_ids]
+        if all(v is not None for v in views):
+            payload = [v[0] for v in views]
+            return cached_response(payload, compute_etag([v[1] for v in views]), if_none_match)
 
-    result = await session.execute(
-        select(User).where(User.id == current_user.id).options(selectinload(User.convoys).options(selectinload(Convoy.members)))
-    )
+    # 2. Cache miss: load from DB and repopulate
+    result = await session.execute(my_convoys_query(current_user.id))
     user_with_convoys = result.scalars().first()
-    
-    response_list = []
+
+    payload = []
+    etags = []
     for c in user_with_convoys.convoys:
-        # FIX: Revert to from_orm
-        c_read = ConvoyRead.from_orm(c)
-        c_read.share_link = get_share_link(c.invite_code)
-        response_list.append(c_read)
-        
-    return response_list
+        c_payload = serialize_convoy(c)
+        etags.append(convoy_cache.set_view(str(c.id), c_payload))
+        payload.append(c_payload)
+    convoy_cache.set_memberships(current_user.id, [str(c.id) for c in user_with_convoys.convoys])
+
+    return cached_response(payload, compute_etag(etags), if_none_match)
+
+@router.get("/mine/summary", response_model=ConvoySummaryPage)
+async def get_my_convoys_summary(
+    status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_members: bool = False,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Compact, keyset-paginated view of the user's convoys (newest membership first).
+    Cost depends on the page size, not on how many convoys the user ever joined.
+    """
+    # 1. One row per membership with a correlated member count
+    statement = convoy_summary_query(
+        current_user.id, limit + 1, status=status, cursor=decode_cursor(cursor) if cursor else None
+    )
+    rows = (await session.execute(statement)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [ConvoySummary(**row._mapping) for row in rows]
+
+    # 2. Full member lists only on request, loaded for the whole page in one query
+    if include_members and items:
+        by_convoy = {item.id: item for item in items}
+        for item in items:
+            item.members = []
+        result = await session.execute(
+            select(ConvoyMember.convoy_id, User)
+            .join(User, User.id == ConvoyMember.user_id)
+            .where(ConvoyMember.convoy_id.in_(list(by_convoy)))
+        )
+        for convoy_id, user in result.all():
+            by_convoy[convoy_id].members.append(UserRead.from_orm(user))
+
+    next_cursor = encode_cursor(rows[-1].joined_at, rows[-1].id) if has_more else None
+    return ConvoySummaryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/nearby", response_model=List[NearbyConvoy])
+async def get_nearby_convoys(
+    lat: float,
+    lon: float,
+    radius_km: float = Query(5, gt=0, le=200),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Active convoys heading to a destination within radius_km of (lat, lon), closest first.
+    Served by the GiST index on convoy.destination_geog.
+    """
+    point = geography_point(lat, lon)
+    distance = func.ST_Distance(Convoy.destination_geog, point)
+    result = await session.execute(
+        select(
+            Convoy.id,
+            Convoy.name,
+            Convoy.destination_name,
+            Convoy.destination_lat,
+            Convoy.destination_lon,
+            Convoy.status,
+            distance.label("distance_m")
+        )
+        .where(
+            Convoy.status == "active",
+            func.ST_DWithin(Convoy.destination_geog, point, radius_km * 1000)
+        )
+        .order_by(distance)
+        .limit(limit)
+    )
+    return [NearbyConvoy(**row._mapping) for row in result.all()]
+
+@router.get("/nearby/live")
+async def get_nearby_live_convoys(
+    lat: float,
+    lon: float,
+    radius_km: float = Query(2, gt=0, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Convoys currently driving near (lat, lon) on this worker, from the in-memory grid.
+    """
+    return manager.nearby_convoys(lat, lon, radius_km * 1000)
+
+@router.post("/batch", response_model=ConvoyBatch)
+async def get_convoys_batch(
+    batch: ConvoyBatchRequest,
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Many convoys in one call (dashboards, home screen): cached views are reused and the
+    rest are loaded with one convoy query plus one member query, however many ids are asked for.
+    With include_live, each convoy also carries its live state on this worker.
+    """
+    ids = list(dict.fromkeys(batch.ids))
+
+    # 1. Cached views first
+    views = {}
+    for convoy_id in ids:
+        cached = convoy_cache.get_view(str(convoy_id))
+        if cached:
+            views[convoy_id] = cached[0]
+
+    # 2. Everything else in one pass
+    misses = [convoy_id for convoy_id in ids if convoy_id not in views]
+    if misses:
+        result = await session.execute(
+            select(Convoy).where(Convoy.id.in_(misses)).options(selectinload(Convoy.members))
+        )
+        for convoy in result.scalars().all():
+            payload = serialize_convoy(convoy)
+            convoy_cache.set_view(str(convoy.id), payload)
+            views[convoy.id] = payload
+
+    # 3. Request order; live state is merged into a copy so cached views stay untouched
+    convoys = []
+    for convoy_id in ids:
+        payload = views.get(convoy_id)
+        if payload is None:
+            continue
+        if batch.include_live:
+            live = manager.live_summary(str(convoy_id))
+            payload = {**payload, "live": ConvoyLiveState(**live).model_dump(mode="json") if live else None}
+        convoys.append(payload)
+
+    return FastJSONResponse(content={
+        "convoys": convoys,
+        "missing": [str(convoy_id) for convoy_id in ids if convoy_id not in views]
+    })
 
 @router.get("/{convoy_id}", response_model=ConvoyRead)
 async def get_convoy(
     convoy_id: uuid.UUID,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session),
+    if_none_match: Optional[str] = Header(None)
 ):
+    cached = convoy_cache.get_view(str(convoy_id))
+    if cached:
+        payload, etag = cached
+        return cached_response(payload, etag, if_none_match)
+
     result = await session.execute(
         select(Convoy).where(Convoy.id == convoy_id).options(selectinload(Convoy.members))
     )
     convoy = result.scalars().first()
     if not convoy:
         raise HTTPException(status_code=404, detail="Convoy not found")
-        
-    # FIX: Revert to from_orm
-    response = ConvoyRead.from_orm(convoy)
-    response.share_link = get_share_link(convoy.invite_code)
-    return response
+
+    payload = serialize_convoy(convoy)
+    etag = convoy_cache.set_view(str(convoy_id), payload)
+    return cached_response(payload, etag, if_none_match)
 
 @router.get("/{convoy_id}/route")
 async def get_convoy_route(
     convoy_id: uuid.UUID,
     user_lat: float,
     user_lon: float,
-    session: AsyncSession = Depends(get_session)
+    current_user: Optional[User] = Depends(get_optional_user),
+    session: AsyncSession = Depends(get_read_session)
 ):
     """
     Get the route geometry from user_lat/lon to the convoy's destination.
@@ -169,50 +379,160 @@ async def get_convoy_route(
         # If no destination set, return empty route
         return {"route": []}
 
-    route_data = await get_route_geometry(
+    # Usually prefetched for this member in the background right after create/join
+    prefetched = None
+    if current_user is not None:
+        prefetched = prefetched_routes.get(
+            str(convoy_id), current_user.id, convoy.destination_lat, convoy.destination_lon, user_lat, user_lon
+        )
+    route_data = prefetched or get_cached_route(
+        user_lat, user_lon, convoy.destination_lat, convoy.destination_lon
+    ) or await get_route_geometry(
         user_lat, user_lon, 
         convoy.destination_lat, convoy.destination_lon
     )
     
     return route_data
 
+@router.get("/{convoy_id}/members/nearby", response_model=List[NearbyMember])
+async def get_nearby_members(
+    convoy_id: uuid.UUID,
+    lat: float,
+    lon: float,
+    radius_km: float = Query(1, gt=0, le=200),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Members of the convoy whose last known position is within radius_km of (lat, lon).
+    """
+    await require_membership(session, convoy_id, current_user)
+
+    point = geography_point(lat, lon)
+    position = cast(ConvoyMember.last_position, Geometry(geometry_type="POINT", srid=4326))
+    distance = func.ST_Distance(ConvoyMember.last_position, point)
+    result = await session.execute(
+        select(
+            ConvoyMember.user_id,
+            User.username,
+            func.ST_Y(position).label("lat"),
+            func.ST_X(position).label("lon"),
+            distance.label("distance_m"),
+            ConvoyMember.last_position_at
+        )
+        .join(User, User.id == ConvoyMember.user_id)
+        .where(
+            ConvoyMember.convoy_id == convoy_id,
+            func.ST_DWithin(ConvoyMember.last_position, point, radius_km * 1000)
+        )
+        .order_by(distance)
+    )
+    return [NearbyMember(**row._mapping) for row in result.all()]
+
+@router.get("/{convoy_id}/members/nearby/live")
+async def get_nearby_live_members(
+    convoy_id: uuid.UUID,
+    lat: float,
+    lon: float,
+    radius_km: float = Query(1, gt=0, le=200),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Members of the convoy driving within radius_km of (lat, lon) right now, closest first,
+    from this worker's in-memory grid (no position flush lag, no spatial query).
+    """
+    await require_membership(session, convoy_id, current_user)
+    return manager.nearby_members(lat, lon, radius_km * 1000, convoy_id=str(convoy_id))
+
+@router.get("/{convoy_id}/smart-stop")
+async def get_smart_stop(
+    convoy_id: uuid.UUID,
+    buffer_km: float = Query(2, gt=0, le=50),
+    limit: int = Query(5, ge=1, le=50),
+    category: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Suggest stops along the members' routes, ranked by estimated total detour.
+    Uses in-memory state and tracked or cached routes only, no external calls.
+    Only members may ask: the ranking is built from the members' live positions.
+    """
+    await require_membership(session, convoy_id, current_user)
+    if len(poi_index) == 0:
+        raise HTTPException(
+            status_code=503,
+            detail="Smart Stop has no POI data on this server (see POI_DATA_PATH in app/core/smart_stop.py)"
+        )
+
+    # 1. Destination (in memory for live convoys)
+    dest = manager.convoy_destinations.get(str(convoy_id))
+    if not dest:
+        convoy = await session.get(Convoy, convoy_id)
+        if not convoy:
+            raise HTTPException(status_code=404, detail="Convoy not found")
+        dest = {"lat": convoy.destination_lat, "lon": convoy.destination_lon}
+
+    # 2. Member positions: live state on this worker, else the last flushed positions
+    state = manager.convoy_state.get(str(convoy_id), {})
+    members = [(user_id, data["lat"], data["lon"]) for user_id, data in state.items() if "lat" in data]
+    if not members:
+        position = cast(ConvoyMember.last_position, Geometry(geometry_type="POINT", srid=4326))
+        result = await session.execute(
+            select(ConvoyMember.user_id, func.ST_Y(position), func.ST_X(position))
+            .where(ConvoyMember.convoy_id == convoy_id, ConvoyMember.last_position.isnot(None))
+        )
+        members = [(str(user_id), lat, lon) for user_id, lat, lon in result.all()]
+
+    # 3. Each member's route: the one the route tracker follows for them (what their
+    #    client is driving), else a cached route, else a straight line to the destination
+    routes = []
+    route_sources = {"tracked": 0, "cached": 0, "straight_line": 0}
+    for user_id, lat, lon in members:
+        tracked = route_tracker.remaining_route(str(convoy_id), user_id, lat, lon)
+        cached = get_cached_route(lat, lon, dest["lat"], dest["lon"]) if tracked is None else None
+        if tracked is not None:
+            routes.append(tracked)
+            route_sources["tracked"] += 1
+        elif cached and cached.get("route"):
+            routes.append([(p["latitude"], p["longitude"]) for p in cached["route"]])
+            route_sources["cached"] += 1
+        else:
+            routes.append([(lat, lon), (dest["lat"], dest["lon"])])
+            route_sources["straight_line"] += 1
+
+    positions = [(lat, lon) for _, lat, lon in members]
+    suggestions = suggest_stops(positions, routes, buffer_m=buffer_km * 1000, limit=limit, category=category)
+    return {**suggestions, "route_sources": route_sources}
+
 @router.delete("/{convoy_id}")
 async def leave_convoy(
     convoy_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    # 1. Find Member Record
+    # 1. Remove Member Record
     result = await session.execute(
-        select(ConvoyMember).where(
+        delete(ConvoyMember)
+        .where(
             ConvoyMember.convoy_id == convoy_id,
             ConvoyMember.user_id == current_user.id
         )
+        .returning(ConvoyMember.user_id)
+        .execution_options(synchronize_session=False)
     )
-    member = result.scalars().first()
-    
-    if not member:
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="You are not a member of this convoy")
 
-    # 2. Remove Member
-    await session.delete(member)
+    # 2. Delete the convoy in the same statement round if nobody is left
+    result = await session.execute(delete_convoy_if_empty_query(convoy_id))
+    convoy_deleted = result.first() is not None
     await session.commit()
 
-    # 3. Check if convoy is empty
-    result = await session.execute(
-        select(ConvoyMember).where(ConvoyMember.convoy_id == convoy_id)
-    )
-    remaining_members = result.scalars().all()
-
-    if not remaining_members:
-        # Delete Convoy if empty
-        convoy_result = await session.execute(
-            select(Convoy).where(Convoy.id == convoy_id)
-        )
-        convoy = convoy_result.scalars().first()
-        if convoy:
-            await session.delete(convoy)
-            await session.commit()
-            return {"status": "success", "message": "Convoy deleted as it became empty"}
+    convoy_cache.invalidate_convoy(str(convoy_id))
+    convoy_cache.invalidate_user(current_user.id)
 
+    if convoy_deleted:
+        return {"status": "success", "message": "Convoy deleted as it became empty"}
     return {"status": "success", "message": "Left convoy"}
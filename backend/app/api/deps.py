@@ -1,14 +1,47 @@
-from fastapi import Depends, HTTPException, status
+import os
+import secrets
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.core.database import get_session
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.auth_cache import decode_token, user_cache
+from app.core.database import get_read_session, get_session
 from app.models.domain import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", auto_error=False)
+
+# Shared secret for operational endpoints. Admin routes are disabled when unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+async def resolve_user(token: str, session: AsyncSession) -> Optional[User]:
+    """
+    Shared token -> User resolution for REST and websockets.
+    Tokens carrying `uid` are resolved by primary key (and usually from the user cache);
+    older tokens with only `sub` fall back to the username lookup.
+    """
+    payload = decode_token(token)
+    if payload is None:
+        return None
+
+    user_id = payload.get("uid")
+    username = payload.get("sub")
+    if user_id is not None:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        user = await session.get(User, user_id)
+    elif username is not None:
+        result = await session.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
+    else:
+        return None
+
+    if user is not None:
+        user_cache.put(user)
+    return user
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -19,18 +52,20 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    statement = select(User).where(User.username == username)
-    result = await session.execute(statement)
-    user = result.scalars().first()
-    
+    user = await resolve_user(token, session)
     if user is None:
         raise credentials_exception
     return user
+
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    session: AsyncSession = Depends(get_read_session)
+) -> Optional[User]:
+    """The caller if a valid token was sent, for endpoints that also serve anonymous requests."""
+    if token is None:
+        return None
+    return await resolve_user(token, session)
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
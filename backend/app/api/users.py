@@ -1,10 +1,11 @@
+import math
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_session
 from app.api.deps import get_current_user
 from app.models.domain import User, UserCreate, UserRead
 from sqlalchemy.future import select
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async, PasswordHashBusy, PASSWORD_HASH_WAIT_SECONDS
 
 router = APIRouter()
 
@@ -25,7 +26,14 @@ async def signup(user: UserCreate, session: AsyncSession = Depends(get_session))
     # Prepare user data
     user_data = user.dict()
     password = user_data.pop("password")
-    user_data["hashed_password"] = get_password_hash(password)
+    try:
+        user_data["hashed_password"] = await get_password_hash_async(password)
+    except PasswordHashBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many signups in progress, try again",
+            headers={"Retry-After": str(math.ceil(PASSWORD_HASH_WAIT_SECONDS))},
+        )
     db_user = User(**user_data)
     session.add(db_user)
     await session.commit()
@@ -1,28 +1,76 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
-from sqlmodel import select
+from sqlalchemy.future import select
+from app.api.deps import resolve_user
 from app.core.socket_manager import manager
-from app.core.database import get_session
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.database import get_session, get_read_session
+from app.core.fast_json import loads
+from app.core.position_store import position_writer
+from app.core.profiling import profiler
+from app.core.route_tracker import route_tracker
+from app.core.spectators import spectator_hub
+from app.core.traffic_capture import recorder
+from app.core.tracing import tracer
 from app.models.domain import Convoy, User
+import math
 import uuid
+from typing import Optional, Tuple
 
 router = APIRouter()
 
-async def get_user_from_token(token: str, session: AsyncSession) -> User:
+def _number(value) -> Optional[float]:
+    # bool is an int subclass; "true" must not pass as a coordinate
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def parse_location_frame(raw: str) -> Optional[Tuple[float, float, Optional[float]]]:
+    """
+    Fast path for inbound frames: decode and strictly validate {lat, lon, eta?}.
+    Returns None for anything malformed so the frame is dropped.
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
+        data = loads(raw)
+    except ValueError:
         return None
-        
-    statement = select(User).where(User.username == username)
-    result = await session.execute(statement)
-    user = result.scalars().first()
-    return user
+    if not isinstance(data, dict):
+        return None
+    lat = _number(data.get("lat"))
+    lon = _number(data.get("lon"))
+    if lat is None or lon is None or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return None
+    eta = data.get("eta")
+    if eta is not None:
+        eta = _number(eta)
+        if eta is None or eta < 0:
+            return None
+    return lat, lon, eta
+
+async def handle_location_frame(websocket: WebSocket, convoy_id: str, user: User, lat: float, lon: float, eta: Optional[float]):
+    user_id = str(user.id)
+    with tracer.span("ws.frame", convoy_id=convoy_id, user_id=user_id):
+        await manager.update_location_and_broadcast(
+            convoy_id=convoy_id,
+            user_id=user_id,
+            username=user.username,
+            lat=lat,
+            lon=lon,
+            eta=eta
+        )
+        position_writer.record(convoy_id, user.id, lat, lon)
+
+        # Off-route detection: only fetch a new route when the member actually left theirs
+        dest = manager.convoy_destinations.get(convoy_id)
+        if dest:
+            action = route_tracker.check(convoy_id, user_id, lat, lon, dest)
+            if action == route_tracker.REROUTE:
+                route_tracker.schedule_refresh(convoy_id, user_id, lat, lon, dest, websocket)
+            elif action == route_tracker.SEED:
+                route_tracker.schedule_refresh(convoy_id, user_id, lat, lon, dest)
+
+async def get_user_from_token(token: str, session: AsyncSession) -> User:
+    return await resolve_user(token, session)
 
 @router.websocket("/{convoy_id}")
 async def websocket_endpoint(
@@ -53,27 +101,60 @@ async def websocket_endpoint(
             except Exception:
                 # In production, consider logging this error properly
                 pass
+        recorder.connect(convoy_id, user_id, manager.convoy_destinations.get(convoy_id))
 
         while True:
-            data = await websocket.receive_json()
-            
-            lat = data.get("lat")
-            lon = data.get("lon")
-            eta = data.get("eta")
-
-            if lat is None or lon is None:
+            frame = parse_location_frame(await websocket.receive_text())
+            if frame is None:
                 continue
+            lat, lon, eta = frame
+            recorder.frame(convoy_id, user_id, lat, lon, eta)
+
+            # Checked here so an unprofiled frame does not even build the context manager
+            if profiler.enabled:
+                async with profiler.profile("ws frame"):
+                    await handle_location_frame(websocket, convoy_id, user, lat, lon, eta)
+            else:
+                await handle_location_frame(websocket, convoy_id, user, lat, lon, eta)
 
-            await manager.update_location_and_broadcast(
-                convoy_id=convoy_id,
-                user_id=user_id,
-                username=user.username,
-                lat=lat,
-                lon=lon,
-                eta=eta
-            )
-            
     except WebSocketDisconnect:
         manager.disconnect(convoy_id, websocket, user_id)
+        route_tracker.forget(convoy_id, user_id)
+        recorder.disconnect(convoy_id, user_id)
+    except Exception:
+        manager.disconnect(convoy_id, websocket, user_id)
+        route_tracker.forget(convoy_id, user_id)
+        recorder.disconnect(convoy_id, user_id)
+
+@router.websocket("/watch/{invite_code}")
+async def spectator_endpoint(
+    websocket: WebSocket,
+    invite_code: str,
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Read-only live view for share-link holders: no account, nothing to send,
+    throttled and coarsened snapshots only.
+    """
+    result = await session.execute(select(Convoy.id).where(Convoy.invite_code == invite_code))
+    convoy_uuid = result.scalar()
+    # The lookup is the only DB work; don't hold a pooled connection for the whole watch
+    await session.close()
+    if convoy_uuid is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    convoy_id = str(convoy_uuid)
+    if spectator_hub.is_full(convoy_id):
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await spectator_hub.connect(convoy_id, websocket)
+    try:
+        while True:
+            # Inbound messages are ignored; receiving just notices the disconnect
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        spectator_hub.disconnect(convoy_id, websocket)
     except Exception:
-        manager.disconnect(convoy_id, websocket, user_id)
\ No newline at end of file
+        spectator_hub.disconnect(convoy_id, websocket)
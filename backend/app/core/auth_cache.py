@@ -0,0 +1,96 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from jose import jwt, JWTError
+from app.core.security import SECRET_KEY, ALGORITHM
+from app.models.domain import User
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+class TokenCache:
+    """
+    LRU of already verified JWT claims, keyed by the token's SHA-256 digest.
+    Entries are never served past the token's own `exp`.
+    """
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict):
+        key = hashlib.sha256(token.encode()).digest()
+        self.entries[key] = (float(claims.get("exp", 0)), claims)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+class UserCache:
+    """
+    Short-TTL LRU of detached User copies keyed by user id.
+    Callers get their own copy, so mutating a returned user never changes the cache.
+    """
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[User]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return User.model_validate(user)
+
+    def put(self, user: User):
+        now = time.monotonic()
+        # Store a copy so the cached object is never bound to a request's session
+        self.entries[user.id] = (now + self.ttl_seconds, User.model_validate(user))
+        self.entries.move_to_end(user.id)
+        # Sweep expired entries from the least recently used end, then enforce the bound
+        while self.entries:
+            expires_at, _ = next(iter(self.entries.values()))
+            if expires_at >= now:
+                break
+            self.entries.popitem(last=False)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self.entries.pop(user_id, None)
+
+token_cache = TokenCache()
+user_cache = UserCache()
+
+def decode_token(token: str) -> Optional[dict]:
+    """
+    Verify a JWT and return its claims, or None if invalid/expired.
+    Verified tokens are cached so repeat requests skip the signature check.
+    """
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    token_cache.put(token, claims)
+    return claims
@@ -0,0 +1,60 @@
+import os
+from typing import Dict
+import numpy as np
+
+STRAGGLER_GAP_METERS = float(os.getenv("STRAGGLER_GAP_METERS", 2000))
+EARTH_RADIUS_M = 6_371_000.0
+
+def _known_distance(distance) -> float:
+    return np.nan if distance is None else float(distance)
+
+def compute_convoy_analytics(members: Dict[str, dict], straggler_gap: float = STRAGGLER_GAP_METERS) -> dict:
+    """
+    Convoy-wide shape in one vectorized pass over the members' state:
+    centroid, leader-to-tail spread, gaps between consecutive vehicles and stragglers.
+
+    Order along the route comes from each member's driving `distance` to the destination
+    (smallest = leader). Members whose distance is unknown (not looked up yet, or the
+    lookup failed) only contribute to the centroid.
+    """
+    uids = [u for u in members if "lat" in members[u]]
+    if not uids:
+        return {
+            "type": "convoy_analytics", "member_count": 0, "centroid": None,
+            "max_distance_from_centroid": 0.0, "spread": 0.0, "gaps": [], "stragglers": []
+        }
+    lats = np.fromiter((members[u]["lat"] for u in uids), dtype=float, count=len(uids))
+    lons = np.fromiter((members[u]["lon"] for u in uids), dtype=float, count=len(uids))
+    distances = np.fromiter((_known_distance(members[u].get("distance")) for u in uids), dtype=float, count=len(uids))
+
+    # 1. Centroid and how far the group is scattered around it (haversine, vectorized)
+    c_lat, c_lon = float(lats.mean()), float(lons.mean())
+    phi, c_phi = np.radians(lats), np.radians(c_lat)
+    a = np.sin((phi - c_phi) / 2) ** 2 + np.cos(phi) * np.cos(c_phi) * np.sin(np.radians(lons - c_lon) / 2) ** 2
+    from_centroid = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+    analytics = {
+        "type": "convoy_analytics",
+        "member_count": len(uids),
+        "centroid": {"lat": c_lat, "lon": c_lon},
+        "max_distance_from_centroid": float(from_centroid.max()),
+        "spread": 0.0,
+        "gaps": [],
+        "stragglers": []
+    }
+
+    # 2. Order along the route, then gaps to the vehicle ahead
+    known = np.flatnonzero(~np.isnan(distances))
+    if len(known) < 2:
+        return analytics
+    ordered = known[np.argsort(distances[known], kind="stable")]
+    progress = distances[ordered]
+    gaps = np.diff(progress)
+
+    analytics["spread"] = float(progress[-1] - progress[0])
+    analytics["gaps"] = [
+        {"user_id": uids[behind], "ahead_user_id": uids[ahead], "gap": float(gap)}
+        for ahead, behind, gap in zip(ordered[:-1], ordered[1:], gaps)
+    ]
+    analytics["stragglers"] = [uids[i] for i in ordered[1:][gaps > straggler_gap]]
+    return analytics
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+CONVOY_CACHE_TTL_SECONDS = float(os.getenv("CONVOY_CACHE_TTL_SECONDS", 30))
+# Membership lists go stale on other workers the moment someone joins or leaves, so they live shorter
+CONVOY_MEMBERSHIP_TTL_SECONDS = float(os.getenv("CONVOY_MEMBERSHIP_TTL_SECONDS", 5))
+CONVOY_CACHE_MAX_ENTRIES = int(os.getenv("CONVOY_CACHE_MAX_ENTRIES", 10000))
+
+def compute_etag(payload) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+class ConvoyCache:
+    """
+    Per-worker cache of serialized convoy views (the JSON-ready ConvoyRead dicts).
+    Entries expire after a short TTL and are invalidated explicitly by the
+    endpoints that change a convoy (create / join / leave).
+
+    Invalidation is local to the worker that handled the change. This assumes a single
+    worker per deployment (as in the Dockerfile); with more, another worker can serve a
+    view for up to CONVOY_CACHE_TTL_SECONDS and a membership list for up to
+    CONVOY_MEMBERSHIP_TTL_SECONDS after a join or leave, so scale out only with a
+    shared cache or invalidation channel.
+    """
+    def __init__(self, ttl_seconds: float = CONVOY_CACHE_TTL_SECONDS, max_entries: int = CONVOY_CACHE_MAX_ENTRIES,
+                 membership_ttl_seconds: float = CONVOY_MEMBERSHIP_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.membership_ttl_seconds = membership_ttl_seconds
+        self.max_entries = max_entries
+        # convoy_id -> (expires_at, payload, etag)
+        self.views: Dict[str, Tuple[float, dict, str]] = {}
+        # invite_code -> convoy_id
+        self.invite_codes: Dict[str, str] = {}
+        # user_id -> (expires_at, [convoy_id, ...]) for /convoys/mine
+        self.memberships: Dict[int, Tuple[float, List[str]]] = {}
+
+    def _evict(self, store: dict):
+        # Dicts keep insertion order, so the first key is the oldest entry
+        while len(store) > self.max_entries:
+            store.pop(next(iter(store)))
+
+    def get_view(self, convoy_id: str) -> Optional[Tuple[dict, str]]:
+        entry = self.views.get(convoy_id)
+        if entry is None:
+            return None
+        expires_at, payload, etag = entry
+        if expires_at < time.monotonic():
+            self.views.pop(convoy_id, None)
+            return None
+        return payload, etag
+
+    def set_view(self, convoy_id: str, payload: dict) -> str:
+        etag = compute_etag(payload)
+        self.views[convoy_id] = (time.monotonic() + self.ttl_seconds, payload, etag)
+        self.invite_codes[payload["invite_code"]] = convoy_id
+        self._evict(self.views)
+        self._evict(self.invite_codes)
+        return etag
+
+    def get_by_invite_code(self, invite_code: str) -> Optional[Tuple[dict, str]]:
+        convoy_id = self.invite_codes.get(invite_code)
+        if convoy_id is None:
+            return None
+        return self.get_view(convoy_id)
+
+    def get_memberships(self, user_id: int) -> Optional[List[str]]:
+        entry = self.memberships.get(user_id)
+        if entry is None:
+            return None
+        expires_at, convoy_ids = entry
+        if expires_at < time.monotonic():
+            self.memberships.pop(user_id, None)
+            return None
+        return convoy_ids
+
+    def set_memberships(self, user_id: int, convoy_ids: List[str]):
+        self.memberships[user_id] = (time.monotonic() + self.membership_ttl_seconds, convoy_ids)
+        self._evict(self.memberships)
+
+    def invalidate_convoy(self, convoy_id: str):
+        entry = self.views.pop(convoy_id, None)
+        if entry is not None:
+            self.invite_codes.pop(entry[1]["invite_code"], None)
+
+    def invalidate_user(self, user_id: int):
+        self.memberships.pop(user_id, None)
+
+    def clear(self):
+        self.views.clear()
+        self.invite_codes.clear()
+        self.memberships.clear()
+
+convoy_cache = ConvoyCache()
@@ -0,0 +1,70 @@
+"""
+Statement builders for the hot convoy queries, shared by the endpoints and the
+query-plan tests (tests/test_query_plans.py), so the tests EXPLAIN what actually runs.
+"""
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import delete, exists, func, tuple_
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased, selectinload
+
+from app.models.domain import Convoy, ConvoyMember, User
+
+def my_convoys_query(user_id: int):
+    """GET /convoys/mine: the user with every convoy and its members (selectin loads by user_id)."""
+    return (
+        select(User)
+        .where(User.id == user_id)
+        .options(selectinload(User.convoys).options(selectinload(Convoy.members)))
+    )
+
+def convoy_summary_query(user_id: int, limit: int, status: Optional[str] = None,
+                         cursor: Optional[Tuple[datetime, uuid.UUID]] = None):
+    """
+    GET /convoys/mine/summary: one row per membership, newest first, with a correlated
+    member count. Ordered and paged on (joined_at, convoy_id), the trailing columns of
+    idx_convoymember_user_joined, so the index returns rows already in page order.
+    """
+    counted = aliased(ConvoyMember)
+    member_count = (
+        select(func.count())
+        .where(counted.convoy_id == Convoy.id)
+        .correlate(Convoy)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            Convoy.id,
+            Convoy.name,
+            Convoy.destination_name,
+            Convoy.status,
+            member_count.label("member_count"),
+            ConvoyMember.role,
+            ConvoyMember.joined_at
+        )
+        .join(ConvoyMember, ConvoyMember.convoy_id == Convoy.id)
+        .where(ConvoyMember.user_id == user_id)
+        .order_by(ConvoyMember.joined_at.desc(), ConvoyMember.convoy_id.desc())
+        .limit(limit)
+    )
+    if status:
+        statement = statement.where(Convoy.status == status)
+    if cursor:
+        cursor_joined_at, cursor_id = cursor
+        statement = statement.where(
+            tuple_(ConvoyMember.joined_at, ConvoyMember.convoy_id) < tuple_(cursor_joined_at, cursor_id)
+        )
+    return statement
+
+def delete_convoy_if_empty_query(convoy_id: uuid.UUID):
+    """DELETE /convoys/{id}: drop the convoy in the same round trip when its last member left."""
+    return (
+        delete(Convoy)
+        .where(
+            Convoy.id == convoy_id,
+            ~exists().where(ConvoyMember.convoy_id == convoy_id)
+        )
+        .returning(Convoy.id)
+        .execution_options(synchronize_session=False)
+    )
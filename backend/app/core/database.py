@@ -1,8 +1,13 @@
+import asyncio
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.core.query_stats import instrument_engine
+from app.core.tracing import instrument_engine_tracing
 
 load_dotenv()
 
@@ -10,11 +15,68 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# Optional read replica. Falls back to the primary when not configured.
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL") or DATABASE_URL
+
+# Engine profile (tune per environment)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Connections opened at startup so the first requests skip connect + auth
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", 2))
+
+def build_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine using the configured pool profile.
+    Pool and asyncpg statement-cache options are only applied to Postgres URLs.
+    """
+    options = {"echo": DB_ECHO, "future": True}
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+        )
+    return create_async_engine(url, **options)
+
+engine = build_engine(DATABASE_URL)
+read_engine = engine if DATABASE_READ_URL == DATABASE_URL else build_engine(DATABASE_READ_URL)
+instrument_engine(engine)
+instrument_engine(read_engine)
+instrument_engine_tracing(engine)
+instrument_engine_tracing(read_engine)
+
+# Session factories are built once and shared by every request
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+read_session = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+async def warm_pool(connections: int = DB_POOL_WARM):
+    """
+    Open `connections` pooled connections per engine (concurrently, so they are distinct)
+    and return them to the pool. Creating the engine alone does not connect.
+    """
+    async def _open(target: AsyncEngine):
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = {engine, read_engine}
+    await asyncio.gather(*[_open(target) for target in engines for _ in range(min(connections, DB_POOL_SIZE))])
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints. Targets the replica when DATABASE_READ_URL is set,
+    so polling traffic does not compete with writes on the primary.
+    """
+    async with read_session() as session:
+        yield session
@@ -0,0 +1,18 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj)
+
+def dumps_str(obj: Any) -> str:
+    """Encode once, send as text to many sockets."""
+    return orjson.dumps(obj).decode("utf-8")
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """Default response class, encoded with orjson (NaN/inf are written as null)."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
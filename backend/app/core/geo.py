@@ -0,0 +1,10 @@
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func
+
+def point_wkt(lat: float, lon: float) -> str:
+    """EWKT for a WGS84 point. Note PostGIS uses lon/lat order."""
+    return f"SRID=4326;POINT({lon} {lat})"
+
+def geography_point(lat: float, lon: float):
+    """SQL expression for a WGS84 geography point built from bound parameters."""
+    return cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), Geography(geometry_type="POINT", srid=4326))
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Jobs beyond this are dropped; everything queued here is best-effort work
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", 1000))
+
+@dataclass
+class JobMetrics:
+    enqueued: int = 0
+    deduplicated: int = 0
+    dropped: int = 0
+    completed: int = 0
+    failed: int = 0
+
+class JobQueue:
+    """
+    In-process background jobs with an arq-shaped API: functions are registered by name
+    and scheduled with `await enqueue_job(name, *args, _job_id=...)`. A job id that is
+    already queued or running is not enqueued again.
+
+    `run()` is started from the app lifespan; tests can call `run_pending()` instead to
+    execute whatever is queued inline.
+    """
+    def __init__(self, workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_MAX):
+        self.workers = workers
+        self.functions: Dict[str, Callable[..., Awaitable]] = {}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.active_ids: Set[str] = set()
+        self.metrics = JobMetrics()
+
+    def register(self, func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        self.functions[func.__name__] = func
+        return func
+
+    async def enqueue_job(self, function: str, *args, _job_id: Optional[str] = None) -> bool:
+        if function not in self.functions:
+            raise ValueError(f"Unknown job function: {function}")
+        job_id = _job_id or f"{function}:{args}"
+        if job_id in self.active_ids:
+            self.metrics.deduplicated += 1
+            return False
+        try:
+            self.queue.put_nowait((job_id, function, args))
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            logger.warning(f"Job queue full, dropping {job_id}")
+            return False
+        self.active_ids.add(job_id)
+        self.metrics.enqueued += 1
+        return True
+
+    async def _execute(self, job: Tuple[str, str, tuple]):
+        job_id, function, args = job
+        try:
+            await self.functions[function](*args)
+            self.metrics.completed += 1
+        except Exception as e:
+            self.metrics.failed += 1
+            logger.error(f"Job {job_id} failed: {e}")
+        finally:
+            self.active_ids.discard(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self.queue.task_done()
+
+    async def run(self):
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def run_pending(self) -> int:
+        """Execute queued jobs in the caller's task (tests, scripts). Returns how many ran."""
+        ran = 0
+        while not self.queue.empty():
+            await self._execute(self.queue.get_nowait())
+            self.queue.task_done()
+            ran += 1
+        return ran
+
+job_queue = JobQueue()
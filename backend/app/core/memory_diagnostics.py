@@ -0,0 +1,183 @@
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+import numpy as np
+from starlette.websockets import WebSocket, WebSocketState
+
+from app.core.auth_cache import token_cache, user_cache
+from app.core.convoy_cache import convoy_cache
+from app.core.jobs import job_queue
+from app.core.position_store import position_writer
+from app.core.route_prefetch import prefetched_routes
+from app.core.route_tracker import route_tracker
+from app.core.routing import route_cache
+from app.core.socket_manager import manager
+from app.core.spectators import spectator_hub
+
+_PRIMITIVES = (str, bytes, int, float, bool, type(None))
+# Counted shallowly: following their attributes would reach the ASGI scope and the whole app
+_OPAQUE = (WebSocket,)
+
+def deep_sizeof(obj, seen: Optional[Set[int]] = None, depth: int = 8) -> int:
+    """
+    Approximate bytes retained by `obj`: containers, dataclass-like objects and numpy
+    arrays are followed; private attributes (e.g. SQLAlchemy instance state) are not.
+    Objects already counted through `seen` are skipped, so shared values count once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, _PRIMITIVES) or isinstance(obj, _OPAQUE) or depth == 0:
+        return size
+    if isinstance(obj, np.ndarray):
+        return size if obj.base is None else size + obj.nbytes
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen, depth - 1) + deep_sizeof(v, seen, depth - 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen, depth - 1) for item in obj)
+    attributes = getattr(obj, "__dict__", None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+        size += sum(deep_sizeof(v, seen, depth - 1) for k, v in attributes.items() if not k.startswith("_"))
+    return size
+
+def _is_half_closed(websocket) -> bool:
+    states = (getattr(websocket, "client_state", None), getattr(websocket, "application_state", None))
+    return WebSocketState.DISCONNECTED in states
+
+def convoy_memory() -> Dict[str, Dict[str, int]]:
+    """Bytes per convoy, split by the structure holding them."""
+    per_convoy: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for name, store in (
+        ("active_connections", manager.active_connections),
+        ("convoy_destinations", manager.convoy_destinations),
+        ("convoy_state", manager.convoy_state),
+        ("spectators", spectator_hub.spectators),
+        ("spectator_snapshot", spectator_hub.last_snapshot),
+    ):
+        for convoy_id, value in list(store.items()):
+            per_convoy[convoy_id][name] += deep_sizeof(value)
+
+    for (convoy_id, _uid), tracked in list(route_tracker.routes.items()):
+        per_convoy[convoy_id]["tracked_routes"] += deep_sizeof(tracked)
+    for (convoy_id, _uid), position in list(manager.member_grid.positions.items()):
+        per_convoy[convoy_id]["member_grid"] += deep_sizeof(position)
+    for convoy_id, view in list(convoy_cache.views.items()):
+        per_convoy[convoy_id]["view_cache"] += deep_sizeof(view)
+
+    report = {}
+    for convoy_id, parts in per_convoy.items():
+        report[convoy_id] = {**parts, "total": sum(parts.values())}
+    return report
+
+def cache_memory() -> Dict[str, dict]:
+    """Process-wide caches and buffers that are not owned by a single convoy."""
+    stores = {
+        "route_cache": route_cache,
+        "convoy_cache.views": convoy_cache.views,
+        "convoy_cache.invite_codes": convoy_cache.invite_codes,
+        "convoy_cache.memberships": convoy_cache.memberships,
+        "token_cache": token_cache.entries,
+        "user_cache": user_cache.entries,
+        "position_writer.pending": position_writer.pending,
+        "route_tracker.retry_after": route_tracker.retry_after,
+        "prefetched_routes": prefetched_routes.entries,
+        "job_queue.active_ids": job_queue.active_ids,
+    }
+    return {name: {"entries": len(store), "bytes": deep_sizeof(store)} for name, store in stores.items()}
+
+def leak_suspects() -> Dict[str, List]:
+    """State that should have been cleaned up on disconnect."""
+    live = set(manager.active_connections)
+    return {
+        # Sockets the server still broadcasts to although one side has closed
+        "half_closed_sockets": [
+            {"convoy_id": convoy_id, "count": sum(1 for ws in sockets if _is_half_closed(ws))}
+            for convoy_id, sockets in list(manager.active_connections.items())
+            if any(_is_half_closed(ws) for ws in sockets)
+        ],
+        # Convoys with per-convoy state but no connected members
+        "orphaned_state": sorted(set(manager.convoy_state) - live),
+        "orphaned_destinations": sorted(set(manager.convoy_destinations) - live),
+        "orphaned_analytics_timers": sorted(set(manager.last_analytics_at) - live),
+        "orphaned_tracked_routes": sorted({cid for cid, _ in route_tracker.routes} - live),
+        "orphaned_grid_entries": sorted({cid for cid, _ in manager.member_grid.positions} - live),
+    }
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def memory_report() -> dict:
+    convoys = convoy_memory()
+    caches = cache_memory()
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "convoys": convoys,
+        "convoys_total_bytes": sum(c["total"] for c in convoys.values()),
+        "caches": caches,
+        "caches_total_bytes": sum(c["bytes"] for c in caches.values()),
+        "suspects": leak_suspects(),
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+
+class TracemallocSession:
+    """
+    Baseline + diff workflow: start() records a baseline snapshot, diff() compares the
+    current heap against it (optionally making the new snapshot the next baseline).
+    """
+    _FILTERS = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+
+    def start(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = self._snapshot()
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = None
+
+    def diff(self, limit: int = 20, key_type: str = "lineno", reset: bool = False) -> dict:
+        if not tracemalloc.is_tracing() or self.baseline is None:
+            raise RuntimeError("tracemalloc is not running; start it first")
+        current = self._snapshot()
+        stats = current.compare_to(self.baseline, key_type)
+        if reset:
+            self.baseline = current
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "pid": os.getpid(),
+            "traced_bytes": traced,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                }
+                for stat in stats[:limit]
+            ]
+        }
+
+tracemalloc_session = TracemallocSession()
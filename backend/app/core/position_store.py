@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Tuple
+from sqlalchemy import text
+
+from app.core.database import async_session
+from app.models.domain import utc_now
+
+logger = logging.getLogger(__name__)
+
+POSITION_FLUSH_SECONDS = float(os.getenv("POSITION_FLUSH_SECONDS", 5))
+
+_UPDATE_POSITION = text(
+    "UPDATE convoymember "
+    "SET last_position = ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography, "
+    "last_position_at = :ts "
+    "WHERE convoy_id = :convoy_id AND user_id = :user_id"
+)
+
+class PositionWriter:
+    """
+    Buffers the latest position per (convoy, user) and writes them to Postgres in batches.
+    Only the newest point per member survives between flushes, so DB load is bounded by
+    the number of live members rather than the frame rate. A failed flush puts its batch
+    back (behind anything recorded since), so the next flush retries it.
+    """
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+        self.pending: Dict[Tuple[uuid.UUID, int], Tuple[float, float, datetime]] = {}
+
+    def record(self, convoy_id: str, user_id: int, lat: float, lon: float):
+        try:
+            convoy_uuid = uuid.UUID(convoy_id)
+        except ValueError:
+            return
+        self.pending[(convoy_uuid, user_id)] = (lat, lon, utc_now())
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, {}
+        rows = [
+            {"convoy_id": convoy_id, "user_id": user_id, "lat": lat, "lon": lon, "ts": ts}
+            for (convoy_id, user_id), (lat, lon, ts) in batch.items()
+        ]
+        try:
+            async with self.session_factory() as session:
+                await session.execute(_UPDATE_POSITION, rows)
+                await session.commit()
+        except Exception:
+            for key, position in batch.items():
+                self.pending.setdefault(key, position)
+            raise
+        return len(rows)
+
+    async def run(self, interval_seconds: float = POSITION_FLUSH_SECONDS):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Position flush failed: {e}")
+
+position_writer = PositionWriter()
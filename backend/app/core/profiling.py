@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.01))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
+def _fold(frame) -> str:
+    """Collapse a frame chain into 'root;...;leaf' (the folded format flamegraph tools read)."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+class SamplingProfiler:
+    """
+    Opt-in stack sampler for a fraction of requests / websocket frames.
+
+    While at least one sampled unit of work is running, a background thread snapshots the
+    event loop thread's stack every PROFILE_INTERVAL_MS. Each sampled unit writes its samples
+    to PROFILE_OUTPUT_DIR as a .folded file (flamegraph.pl, speedscope, inferno), from a
+    worker thread so the event loop never blocks on disk.
+    Hot paths check `enabled` before entering profile(), so a disabled profiler costs one
+    attribute check there; profile() itself is an async context manager (a generator and
+    two awaits) even when it decides not to sample.
+    """
+    def __init__(self, enabled: bool = PROFILING_ENABLED, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, output_dir: str = PROFILE_OUTPUT_DIR):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.sessions: Dict[int, Counter] = {}
+        self.profiles_written = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread_id: Optional[int] = None
+        self._next_session = 0
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, sample_rate))
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is not None:
+                stack = _fold(frame)
+                with self._lock:
+                    for samples in self.sessions.values():
+                        samples[stack] += 1
+            time.sleep(self.interval)
+
+    @asynccontextmanager
+    async def profile(self, name: str) -> AsyncIterator[None]:
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield
+            return
+
+        with self._lock:
+            session_id = self._next_session
+            self._next_session += 1
+            self.sessions[session_id] = Counter()
+            self._target_thread_id = threading.get_ident()
+            self._ensure_thread()
+            self._wake.set()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                samples = self.sessions.pop(session_id)
+                if not self.sessions:
+                    self._wake.clear()
+            await asyncio.to_thread(self._write, name, samples, time.perf_counter() - started_at)
+
+    def _write(self, name: str, samples: Counter, duration: float):
+        if not samples:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")
+        filename = f"{safe_name}-{int(time.time() * 1000)}-{int(duration * 1000)}ms.folded"
+        with open(os.path.join(self.output_dir, filename), "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.profiles_written += 1
+
+profiler = SamplingProfiler()
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy import delete, exists, func, text, update
+from sqlmodel import select
+
+from app.core.auth_cache import user_cache
+from app.core.convoy_cache import convoy_cache
+from app.core.database import async_session, engine
+from app.core.socket_manager import manager
+from app.models.domain import Convoy, ConvoyMember, User, utc_now
+
+logger = logging.getLogger(__name__)
+
+REAPER_ENABLED = os.getenv("REAPER_ENABLED", "true").lower() == "true"
+REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", 3600))
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", 500))
+GUEST_TTL_HOURS = float(os.getenv("GUEST_TTL_HOURS", 24))
+CONVOY_INACTIVE_HOURS = float(os.getenv("CONVOY_INACTIVE_HOURS", 24))
+# Postgres advisory lock key: only one worker/instance runs a pass at a time
+REAPER_LOCK_KEY = int(os.getenv("REAPER_LOCK_KEY", 7_305_118))
+
+ARCHIVED_STATUS = "archived"
+
+@dataclass
+class ReaperMetrics:
+    runs: int = 0
+    skipped_locked: int = 0
+    guests_deleted: int = 0
+    convoys_archived: int = 0
+    convoys_deleted: int = 0
+    last_run_at: Optional[float] = None
+    last_duration_seconds: float = 0.0
+
+reaper_metrics = ReaperMetrics()
+
+def _live_user_ids() -> List[int]:
+    return [int(uid) for members in manager.convoy_state.values() for uid in members]
+
+def _live_convoy_ids() -> List[uuid.UUID]:
+    return [uuid.UUID(cid) for cid in manager.active_connections]
+
+def expired_guests_query(cutoff, live_user_ids: List[int], batch_size: int):
+    """
+    Guests created before `cutoff` with no position flushed since then, so a guest
+    streaming through another worker is kept as well as the ones live here.
+    """
+    recently_active = exists().where(ConvoyMember.user_id == User.id, ConvoyMember.last_position_at >= cutoff)
+    statement = select(User.id).where(User.is_guest == True, User.created_at < cutoff, ~recently_active)  # noqa: E712
+    if live_user_ids:
+        statement = statement.where(User.id.not_in(live_user_ids))
+    return statement.limit(batch_size)
+
+def empty_convoys_query(batch_size: int):
+    return select(Convoy.id).where(~exists().where(ConvoyMember.convoy_id == Convoy.id)).limit(batch_size)
+
+def inactive_convoys_query(cutoff, live_convoy_ids: List[uuid.UUID], batch_size: int):
+    """
+    Active convoys whose latest member position (or start time, if nobody ever sent one)
+    is older than `cutoff`. A long drive that keeps reporting positions is not archived.
+    """
+    last_activity = (
+        select(func.max(ConvoyMember.last_position_at))
+        .where(ConvoyMember.convoy_id == Convoy.id)
+        .scalar_subquery()
+    )
+    statement = select(Convoy.id).where(
+        Convoy.status == "active",
+        Convoy.start_time < cutoff,
+        func.coalesce(last_activity, Convoy.start_time) < cutoff
+    )
+    if live_convoy_ids:
+        statement = statement.where(Convoy.id.not_in(live_convoy_ids))
+    return statement.limit(batch_size)
+
+async def delete_expired_guests(batch_size: int = REAPER_BATCH_SIZE) -> int:
+    """
+    Delete guest users older than GUEST_TTL_HOURS (and their memberships),
+    one short transaction per batch. Guests that are live or recently active are kept.
+    """
+    cutoff = utc_now() - timedelta(hours=GUEST_TTL_HOURS)
+    live = _live_user_ids()
+    total = 0
+    while True:
+        async with async_session() as session:
+            ids = (await session.execute(expired_guests_query(cutoff, live, batch_size))).scalars().all()
+            if not ids:
+                break
+            await session.execute(delete(ConvoyMember).where(ConvoyMember.user_id.in_(ids)))
+            await session.execute(delete(User).where(User.id.in_(ids)))
+            await session.commit()
+
+        for user_id in ids:
+            user_cache.invalidate(user_id)
+            convoy_cache.invalidate_user(user_id)
+        total += len(ids)
+        reaper_metrics.guests_deleted += len(ids)
+        logger.info(f"Reaper: deleted {len(ids)} expired guests ({total} this run)")
+        if len(ids) < batch_size:
+            break
+        # Let request handlers run between batches
+        await asyncio.sleep(0)
+    return total
+
+async def delete_empty_convoys(batch_size: int = REAPER_BATCH_SIZE) -> int:
+    """Delete convoys that no longer have any members."""
+    total = 0
+    while True:
+        async with async_session() as session:
+            ids = (await session.execute(empty_convoys_query(batch_size))).scalars().all()
+            if not ids:
+                break
+            await session.execute(delete(Convoy).where(Convoy.id.in_(ids)))
+            await session.commit()
+
+        for convoy_id in ids:
+            convoy_cache.invalidate_convoy(str(convoy_id))
+        total += len(ids)
+        reaper_metrics.convoys_deleted += len(ids)
+        logger.info(f"Reaper: deleted {len(ids)} empty convoys ({total} this run)")
+        if len(ids) < batch_size:
+            break
+        await asyncio.sleep(0)
+    return total
+
+async def archive_inactive_convoys(batch_size: int = REAPER_BATCH_SIZE) -> int:
+    """
+    Mark 'active' convoys with no member activity for CONVOY_INACTIVE_HOURS as archived.
+    Convoys with live websocket connections on this worker are left alone.
+    """
+    cutoff = utc_now() - timedelta(hours=CONVOY_INACTIVE_HOURS)
+    live = _live_convoy_ids()
+    total = 0
+    while True:
+        async with async_session() as session:
+            ids = (await session.execute(inactive_convoys_query(cutoff, live, batch_size))).scalars().all()
+            if not ids:
+                break
+            await session.execute(
+                update(Convoy).where(Convoy.id.in_(ids)).values(status=ARCHIVED_STATUS)
+            )
+            await session.commit()
+
+        for convoy_id in ids:
+            convoy_cache.invalidate_convoy(str(convoy_id))
+        total += len(ids)
+        reaper_metrics.convoys_archived += len(ids)
+        logger.info(f"Reaper: archived {len(ids)} inactive convoys ({total} this run)")
+        if len(ids) < batch_size:
+            break
+        await asyncio.sleep(0)
+    return total
+
+async def run_reaper_once() -> bool:
+    """
+    One pass of all jobs, guarded by a Postgres advisory lock so that with several
+    workers or instances only one of them reaps at a time. Returns False if skipped.
+    """
+    async with engine.connect() as conn:
+        locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REAPER_LOCK_KEY})).scalar()
+        await conn.commit()
+        if not locked:
+            reaper_metrics.skipped_locked += 1
+            logger.info("Reaper: another worker holds the lock, skipping this run")
+            return False
+        try:
+            started_at = time.perf_counter()
+            await delete_expired_guests()
+            await delete_empty_convoys()
+            await archive_inactive_convoys()
+            reaper_metrics.runs += 1
+            reaper_metrics.last_run_at = time.time()
+            reaper_metrics.last_duration_seconds = time.perf_counter() - started_at
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REAPER_LOCK_KEY})
+            await conn.commit()
+    return True
+
+async def reaper_loop(interval_seconds: float = REAPER_INTERVAL_SECONDS):
+    while True:
+        try:
+            await run_reaper_once()
+        except Exception as e:
+            logger.error(f"Reaper run failed: {e}")
+        await asyncio.sleep(interval_seconds)
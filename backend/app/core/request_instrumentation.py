@@ -0,0 +1,50 @@
+import os
+from contextlib import AsyncExitStack
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import profiler
+from app.core.query_stats import track_queries
+from app.core.tracing import tracer
+
+# Expose per-request DB stats as response headers (debug only)
+DB_DEBUG_HEADERS = os.getenv("DB_DEBUG_HEADERS", "false").lower() == "true"
+
+class RequestInstrumentationMiddleware:
+    """
+    DB query headers, request tracing and sampled profiling in one pure ASGI middleware.
+
+    Each feature is entered only while its flag is on (profiling can be switched at
+    runtime from the admin API), so with everything off a request costs three attribute
+    checks instead of three BaseHTTPMiddleware hops.
+    """
+    def __init__(self, app: ASGIApp, db_debug_headers: bool = DB_DEBUG_HEADERS):
+        self.app = app
+        self.db_debug_headers = db_debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not (self.db_debug_headers or tracer.enabled or profiler.enabled):
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        async with AsyncExitStack() as stack:
+            stats = stack.enter_context(track_queries()) if self.db_debug_headers else None
+            span = stack.enter_context(tracer.span(f"http {method}", **{"http.method": method, "http.target": path}))
+            if profiler.enabled:
+                await stack.enter_async_context(profiler.profile(f"http {method} {path}"))
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if stats is not None:
+                        headers = MutableHeaders(scope=message)
+                        headers["X-DB-Query-Count"] = str(stats.count)
+                        headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.2f}"
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            if route is not None:
+                span.set_attribute("http.route", route.path)
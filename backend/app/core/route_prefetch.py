@@ -0,0 +1,143 @@
+import logging
+import math
+import os
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func
+from sqlalchemy.future import select
+
+from app.core.database import read_session
+from app.core.jobs import job_queue
+from app.core.routing import ROUTE_CACHE_PRECISION, ROUTE_CACHE_TTL_SECONDS, get_cached_route, get_route_geometry
+from app.core.socket_manager import manager
+from app.models.domain import ConvoyMember, utc_now
+
+logger = logging.getLogger(__name__)
+
+# Flushed positions older than this are not a useful route origin
+PREFETCH_POSITION_MAX_AGE_SECONDS = float(os.getenv("PREFETCH_POSITION_MAX_AGE_SECONDS", 600))
+# A prefetched route is served while the member is still this close to where it starts
+PREFETCH_MAX_DRIFT_METERS = float(os.getenv("PREFETCH_MAX_DRIFT_METERS", 300))
+PREFETCH_MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", 5000))
+
+class PrefetchedRoutes:
+    """
+    Routes computed ahead of a member's first /route call, keyed by
+    (convoy, user, destination) rather than by rounded origin, so a member who
+    moved a few hundred meters since their last flushed position still hits.
+    """
+    def __init__(self, ttl_seconds: float = ROUTE_CACHE_TTL_SECONDS, max_drift_m: float = PREFETCH_MAX_DRIFT_METERS,
+                 max_entries: int = PREFETCH_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_drift_m = max_drift_m
+        self.max_entries = max_entries
+        # key -> (expires_at, (origin_lat, origin_lon), route_data)
+        self.entries: Dict[tuple, Tuple[float, Tuple[float, float], dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(convoy_id: str, user_id: int, dest_lat: float, dest_lon: float) -> tuple:
+        return (str(convoy_id), user_id, round(dest_lat, ROUTE_CACHE_PRECISION), round(dest_lon, ROUTE_CACHE_PRECISION))
+
+    def put(self, convoy_id: str, user_id: int, dest_lat: float, dest_lon: float, origin: Tuple[float, float], route_data: dict):
+        key = self._key(convoy_id, user_id, dest_lat, dest_lon)
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, origin, route_data)
+        while len(self.entries) > self.max_entries:
+            self.entries.pop(next(iter(self.entries)))
+
+    def contains(self, convoy_id: str, user_id: int, dest_lat: float, dest_lon: float) -> bool:
+        entry = self.entries.get(self._key(convoy_id, user_id, dest_lat, dest_lon))
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def get(self, convoy_id: str, user_id: int, dest_lat: float, dest_lon: float, lat: float, lon: float) -> Optional[dict]:
+        """The prefetched route, if it is fresh and starts near (lat, lon). Counts hits and misses."""
+        key = self._key(convoy_id, user_id, dest_lat, dest_lon)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self.entries[key]
+            entry = None
+        if entry is None or _distance_m(lat, lon, *entry[1]) > self.max_drift_m:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+prefetched_routes = PrefetchedRoutes()
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Equirectangular approximation, plenty for a few hundred meters
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6_371_000 * math.hypot(x, y)
+
+def live_position(user_id: int) -> Optional[Tuple[float, float]]:
+    """The member's position from any convoy they are currently streaming to."""
+    uid = str(user_id)
+    for members in manager.convoy_state.values():
+        state = members.get(uid)
+        if state and "lat" in state:
+            return state["lat"], state["lon"]
+    return None
+
+async def stored_position(user_id: int) -> Optional[Tuple[float, float]]:
+    """
+    The most recent position flushed for the user across all their convoys,
+    or None if it is older than PREFETCH_POSITION_MAX_AGE_SECONDS.
+    """
+    point = cast(ConvoyMember.last_position, Geometry(geometry_type="POINT", srid=4326))
+    cutoff = utc_now() - timedelta(seconds=PREFETCH_POSITION_MAX_AGE_SECONDS)
+    async with read_session() as session:
+        result = await session.execute(
+            select(func.ST_Y(point), func.ST_X(point))
+            .where(
+                ConvoyMember.user_id == user_id,
+                ConvoyMember.last_position.is_not(None),
+                ConvoyMember.last_position_at >= cutoff
+            )
+            .order_by(ConvoyMember.last_position_at.desc())
+            .limit(1)
+        )
+        row = result.first()
+    return (row[0], row[1]) if row else None
+
+@job_queue.register
+async def prefetch_route(convoy_id: str, user_id: int, dest_lat: float, dest_lon: float):
+    """
+    Compute the member's route to the convoy destination ahead of their first
+    /convoys/{id}/route call.
+    """
+    # 1. Already prefetched for this convoy and destination
+    if prefetched_routes.contains(convoy_id, user_id, dest_lat, dest_lon):
+        return
+
+    # 2. Where is the member? Live state first, then a recent flushed position
+    position = live_position(user_id) or await stored_position(user_id)
+    if position is None:
+        return
+
+    # 3. Reuse a shared cached route from the same spot; get_route_geometry fills that cache
+    lat, lon = position
+    route_data = get_cached_route(lat, lon, dest_lat, dest_lon) or await get_route_geometry(lat, lon, dest_lat, dest_lon)
+    if route_data.get("route"):
+        prefetched_routes.put(convoy_id, user_id, dest_lat, dest_lon, position, route_data)
+
+async def schedule_route_prefetch(convoy_id: str, user_id: int, dest_lat: Optional[float], dest_lon: Optional[float]):
+    if dest_lat is None or dest_lon is None:
+        return
+    await job_queue.enqueue_job(
+        "prefetch_route", convoy_id, user_id, dest_lat, dest_lon,
+        _job_id=f"prefetch_route:{convoy_id}:{user_id}"
+    )
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+from app.core.fast_json import dumps_str
+from app.core.routing import get_cached_route, get_route_geometry
+
+logger = logging.getLogger(__name__)
+
+OFF_ROUTE_METERS = float(os.getenv("OFF_ROUTE_METERS", 75))
+OFF_ROUTE_SECONDS = float(os.getenv("OFF_ROUTE_SECONDS", 10))
+METERS_PER_DEGREE = 111_320.0
+
+def distance_to_polyline_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> float:
+    """
+    Distance in meters from a point to a polyline, over all segments at once.
+    Uses a local equirectangular projection centered on the point.
+    """
+    x = (lons - lon) * METERS_PER_DEGREE * math.cos(math.radians(lat))
+    y = (lats - lat) * METERS_PER_DEGREE
+    if len(x) == 1:
+        return float(math.hypot(x[0], y[0]))
+
+    ax, ay = x[:-1], y[:-1]
+    dx, dy = x[1:] - ax, y[1:] - ay
+    length_sq = dx * dx + dy * dy
+    # Projection of the origin (our point) onto each segment, clamped to the segment
+    t = np.divide(-(ax * dx + ay * dy), length_sq, out=np.zeros_like(length_sq), where=length_sq > 0)
+    t = np.clip(t, 0.0, 1.0)
+    cx, cy = ax + t * dx, ay + t * dy
+    return float(np.sqrt(cx * cx + cy * cy).min())
+
+@dataclass
+class TrackedRoute:
+    lats: np.ndarray
+    lons: np.ndarray
+    off_route_since: Optional[float] = None
+
+class RouteTracker:
+    """
+    Keeps each member's active route as NumPy arrays and decides, per frame,
+    whether the member has left it for long enough to deserve a new one.
+    """
+    SEED = "seed"
+    REROUTE = "reroute"
+
+    def __init__(self, off_route_meters: float = OFF_ROUTE_METERS, off_route_seconds: float = OFF_ROUTE_SECONDS):
+        self.off_route_meters = off_route_meters
+        self.off_route_seconds = off_route_seconds
+        self.routes: Dict[Tuple[str, str], TrackedRoute] = {}
+        self.pending: set = set()
+        # Back-off after a failed fetch so a flaky router is not hit on every frame
+        self.retry_after: Dict[Tuple[str, str], float] = {}
+        # One token per in-flight refresh; forget() drops it so a late result is discarded
+        self._refreshing: Dict[Tuple[str, str], object] = {}
+        self._tasks: set = set()
+
+    def set_route(self, convoy_id: str, user_id: str, route_data: dict) -> bool:
+        path = route_data.get("route") or []
+        if not path:
+            return False
+        self.routes[(convoy_id, user_id)] = TrackedRoute(
+            lats=np.fromiter((p["latitude"] for p in path), dtype=float, count=len(path)),
+            lons=np.fromiter((p["longitude"] for p in path), dtype=float, count=len(path)),
+        )
+        return True
+
+    def remaining_route(self, convoy_id: str, user_id: str, lat: float, lon: float) -> Optional[np.ndarray]:
+        """
+        The member's tracked route from the vertex nearest to (lat, lon) to the end,
+        as an (N, 2) array of lat/lon, or None when no route is tracked for them.
+        """
+        tracked = self.routes.get((convoy_id, user_id))
+        if tracked is None:
+            return None
+        x = (tracked.lons - lon) * math.cos(math.radians(lat))
+        y = tracked.lats - lat
+        nearest = int(np.argmin(x * x + y * y))
+        return np.column_stack([tracked.lats[nearest:], tracked.lons[nearest:]])
+
+    def check(self, convoy_id: str, user_id: str, lat: float, lon: float, dest: dict, now: Optional[float] = None) -> Optional[str]:
+        """
+        Returns SEED when the member has no known route yet, REROUTE when they have been
+        off their route for OFF_ROUTE_SECONDS, and None otherwise (the common case).
+        """
+        key = (convoy_id, user_id)
+        now = time.monotonic() if now is None else now
+        if key in self.pending or self.retry_after.get(key, 0) > now:
+            return None
+
+        tracked = self.routes.get(key)
+        if tracked is None:
+            cached = get_cached_route(lat, lon, dest["lat"], dest["lon"])
+            if cached and self.set_route(convoy_id, user_id, cached):
+                return None
+            return self.SEED
+
+        if distance_to_polyline_m(lat, lon, tracked.lats, tracked.lons) <= self.off_route_meters:
+            tracked.off_route_since = None
+            return None
+        if tracked.off_route_since is None:
+            tracked.off_route_since = now
+            return None
+        if now - tracked.off_route_since >= self.off_route_seconds:
+            return self.REROUTE
+        return None
+
+    def _claim(self, key: Tuple[str, str]) -> object:
+        token = object()
+        self._refreshing[key] = token
+        self.pending.add(key)
+        return token
+
+    async def refresh(self, convoy_id: str, user_id: str, lat: float, lon: float, dest: dict, websocket=None):
+        """
+        Fetch a fresh route from the current position. When a websocket is given,
+        the member is sent a `reroute` event with it.
+        """
+        token = self._claim((convoy_id, user_id))
+        await self._refresh(token, convoy_id, user_id, lat, lon, dest, websocket)
+
+    async def _refresh(self, token: object, convoy_id: str, user_id: str, lat: float, lon: float, dest: dict, websocket):
+        key = (convoy_id, user_id)
+        try:
+            # A route from here may have been cached (e.g. by a prefetch) since check() looked
+            route_data = get_cached_route(lat, lon, dest["lat"], dest["lon"])
+            if route_data is None:
+                route_data = await get_route_geometry(lat, lon, dest["lat"], dest["lon"])
+            if self._refreshing.get(key) is not token:
+                # The member disconnected (forget()) while the router was busy
+                return
+            if not self.set_route(convoy_id, user_id, route_data):
+                self.retry_after[key] = time.monotonic() + self.off_route_seconds
+                return
+            self.retry_after.pop(key, None)
+            if websocket is not None:
+                await websocket.send_text(dumps_str({"type": "reroute", "user_id": user_id, **route_data}))
+        except Exception as e:
+            logger.error(f"Reroute failed for {user_id} in {convoy_id}: {e}")
+        finally:
+            if self._refreshing.get(key) is token:
+                del self._refreshing[key]
+                self.pending.discard(key)
+
+    def schedule_refresh(self, convoy_id: str, user_id: str, lat: float, lon: float, dest: dict, websocket=None):
+        """Run refresh() in the background so the frame loop never waits on the router."""
+        # Claim before the task first runs, so the next frames do not schedule another
+        token = self._claim((convoy_id, user_id))
+        task = asyncio.create_task(self._refresh(token, convoy_id, user_id, lat, lon, dest, websocket))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def forget(self, convoy_id: str, user_id: str):
+        key = (convoy_id, user_id)
+        self.routes.pop(key, None)
+        self.retry_after.pop(key, None)
+        # An in-flight refresh sees its token gone and drops its result
+        if self._refreshing.pop(key, None) is not None:
+            self.pending.discard(key)
+
+route_tracker = RouteTracker()
@@ -1,35 +1,139 @@
-import httpx
 import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+from app.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
-async def get_driving_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+OSRM_BASE_URL = os.getenv("OSRM_BASE_URL", "http://router.project-osrm.org")
+OSRM_TIMEOUT_SECONDS = float(os.getenv("OSRM_TIMEOUT_SECONDS", 5.0))
+
+# Shared keep-alive client (httpx.AsyncClient), created on first use
+_http_client = None
+
+def get_http_client():
+    """
+    One pooled client for all OSRM calls, so requests reuse warm connections instead of
+    paying DNS + TCP setup each time. httpx is imported here to keep it off the import path.
+    """
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(timeout=OSRM_TIMEOUT_SECONDS)
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def warm_routing_client(lat: float = 32.0853, lon: float = 34.7818):
+    """Open a connection to OSRM ahead of the first real request (a zero-length route is cheap)."""
+    response = await get_http_client().get(f"{OSRM_BASE_URL}/route/v1/driving/{lon},{lat};{lon},{lat}?overview=false")
+    response.raise_for_status()
+
+ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", 300))
+# Coordinates are rounded to this many decimals for cache keys (3 ~= 100m)
+ROUTE_CACHE_PRECISION = int(os.getenv("ROUTE_CACHE_PRECISION", 3))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", 5000))
+
+# (lat1, lon1, lat2, lon2) rounded -> (expires_at, route_data)
+route_cache: Dict[Tuple[float, ...], Tuple[float, dict]] = {}
+
+def _route_key(lat1: float, lon1: float, lat2: float, lon2: float) -> Tuple[float, ...]:
+    return tuple(round(v, ROUTE_CACHE_PRECISION) for v in (lat1, lon1, lat2, lon2))
+
+def get_cached_route(lat1: float, lon1: float, lat2: float, lon2: float) -> Optional[dict]:
+    """
+    Return a route previously fetched by get_route_geometry for (roughly) the same
+    origin and destination, without calling OSRM.
+    """
+    key = _route_key(lat1, lon1, lat2, lon2)
+    entry = route_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, route_data = entry
+    if expires_at < time.monotonic():
+        route_cache.pop(key, None)
+        return None
+    return route_data
+
+def store_route(lat1: float, lon1: float, lat2: float, lon2: float, route_data: dict):
+    route_cache[_route_key(lat1, lon1, lat2, lon2)] = (time.monotonic() + ROUTE_CACHE_TTL_SECONDS, route_data)
+    # Dicts keep insertion order, so the first key is the oldest entry
+    while len(route_cache) > ROUTE_CACHE_MAX_ENTRIES:
+        route_cache.pop(next(iter(route_cache)))
+
+async def get_driving_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> Optional[float]:
     """
     Calculate driving distance between two points using OSRM public API.
-    Returns distance in meters.
+    Returns distance in meters, or None when OSRM failed or found no route
+    (0.0 would read as "already at the destination").
     """
     # OSRM uses lon,lat order
-    url = f"http://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=false"
+    url = f"{OSRM_BASE_URL}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=false"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=5.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("code") == "Ok" and data.get("routes"):
-                # OSRM returns distance in meters
-                return float(data["routes"][0]["distance"])
-            else:
-                logger.warning(f"OSRM returned no routes or error: {data}")
-                return 0.0
-                
-                
+        with tracer.span("osrm.driving_distance", **{"http.url": url}) as span:
+            response = await get_http_client().get(url)
+            span.set_attribute("http.status_code", response.status_code)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("code") == "Ok" and data.get("routes"):
+            # OSRM returns distance in meters
+            return float(data["routes"][0]["distance"])
+        else:
+            logger.warning(f"OSRM returned no routes or error: {data}")
+            return None
+
     except Exception as e:
         logger.error(f"Error fetching OSRM distance: {e}")
-        # Fallback to 0 or potentially haversine if we wanted to be fancy, 
-        # but spec says return 0.0 or fallback.
-        return 0.0
+        return None
+
+def parse_route_response(data: dict) -> Optional[dict]:
+    """
+    Convert an OSRM route response (geojson geometry, steps=true) into our route payload.
+    Returns None when OSRM found no route.
+    """
+    if data.get("code") != "Ok" or not data.get("routes"):
+        return None
+    route = data["routes"][0]
+    # Extract coordinates. OSRM GeoJSON format is [lon, lat]
+    coordinates = route["geometry"]["coordinates"]
+    duration = float(route["duration"])
+    distance = float(route["distance"])
+    
+    # Convert to [{'latitude': lat, 'longitude': lon}, ...]
+    path = [{"latitude": c[1], "longitude": c[0]} for c in coordinates]
+
+    # Extract steps from legs
+    extracted_steps = []
+    for leg in route.get("legs", []):
+        for step in leg.get("steps", []):
+            maneuver = step.get("maneuver", {})
+            extracted_steps.append({
+                "instruction": maneuver.get("instruction", ""),
+                "type": maneuver.get("type", ""),
+                "modifier": maneuver.get("modifier", ""),
+                "distance": float(step.get("distance", 0)),
+                "duration": float(step.get("duration", 0)),
+                "name": step.get("name", ""),
+                "location": {
+                    "latitude": maneuver.get("location", [0,0])[1],
+                    "longitude": maneuver.get("location", [0,0])[0]
+                }
+            })
+    
+    return {
+        "route": path,
+        "duration": duration,
+        "distance": distance,
+        "steps": extracted_steps,
+        "status": "NORMAL"  # Default status for traffic support
+    }
 
 async def get_route_geometry(lat1: float, lon1: float, lat2: float, lon2: float) -> dict:
     """
@@ -37,53 +141,23 @@ async def get_route_geometry(lat1: float, lon1: float, lat2: float, lon2: float)
     Returns a dict with: geometry (path), duration, distance, and steps (maneuvers).
     """
     # OSRM url with steps=true for turn-by-turn guidance
-    url = f"http://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=full&geometries=geojson&steps=true"
+    url = f"{OSRM_BASE_URL}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=full&geometries=geojson&steps=true"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=5.0)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("code") == "Ok" and data.get("routes"):
-                route = data["routes"][0]
-                # Extract coordinates. OSRM GeoJSON format is [lon, lat]
-                coordinates = route["geometry"]["coordinates"]
-                duration = float(route["duration"])
-                distance = float(route["distance"])
-                
-                # Convert to [{'latitude': lat, 'longitude': lon}, ...]
-                path = [{"latitude": c[1], "longitude": c[0]} for c in coordinates]
-
-                # Extract steps from legs
-                extracted_steps = []
-                for leg in route.get("legs", []):
-                    for step in leg.get("steps", []):
-                        maneuver = step.get("maneuver", {})
-                        extracted_steps.append({
-                            "instruction": maneuver.get("instruction", ""),
-                            "type": maneuver.get("type", ""),
-                            "modifier": maneuver.get("modifier", ""),
-                            "distance": float(step.get("distance", 0)),
-                            "duration": float(step.get("duration", 0)),
-                            "name": step.get("name", ""),
-                            "location": {
-                                "latitude": maneuver.get("location", [0,0])[1],
-                                "longitude": maneuver.get("location", [0,0])[0]
-                            }
-                        })
-                
-                return {
-                    "route": path,
-                    "duration": duration,
-                    "distance": distance,
-                    "steps": extracted_steps,
-                    "status": "NORMAL"  # Default status for traffic support
-                }
-            else:
-                logger.warning(f"OSRM returned no routes for geometry: {data}")
-                return {"route": [], "duration": 0.0, "distance": 0.0, "steps": []}
-                
+        with tracer.span("osrm.route_geometry", **{"http.url": url}) as span:
+            response = await get_http_client().get(url)
+            span.set_attribute("http.status_code", response.status_code)
+        response.raise_for_status()
+        data = response.json()
+
+        route_data = parse_route_response(data)
+        if route_data is not None:
+            store_route(lat1, lon1, lat2, lon2, route_data)
+            return route_data
+        else:
+            logger.warning(f"OSRM returned no routes for geometry: {data}")
+            return {"route": [], "duration": 0.0, "distance": 0.0, "steps": []}
+
     except Exception as e:
         logger.error(f"Error fetching OSRM route geometry: {e}")
         return {"route": [], "duration": 0.0, "distance": 0.0, "steps": []}
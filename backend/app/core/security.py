@@ -1,7 +1,11 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 from jose import jwt
-from passlib.context import CryptContext
 from dotenv import load_dotenv
 import os
 
@@ -12,13 +16,86 @@ SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key_for_dev")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt is CPU bound (tens to hundreds of ms), so async code runs it in this pool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+# Admission limit: at most this many callers wait for a worker, each for at most this long
+PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", 32))
+PASSWORD_HASH_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_WAIT_SECONDS", 2.0))
+
+# Stored for accounts that can never log in with a password (e.g. guests)
+UNUSABLE_PASSWORD = "!"
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """
+    passlib/bcrypt are only needed for password login and signup, so they are
+    imported on first use instead of on every cold start.
+    """
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+
+class PasswordHashBusy(Exception):
+    """Raised when the bcrypt pool is saturated; endpoints answer 503 instead of queueing forever."""
+
+@dataclass
+class HashMetrics:
+    calls: int = 0
+    in_flight: int = 0
+    waiting: int = 0
+    rejected: int = 0
+    total_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+hash_metrics = HashMetrics()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def _run_in_hash_pool(func: Callable, *args):
+    """
+    Run a bcrypt call on the worker pool so it never blocks the event loop.
+    The semaphore caps concurrent hashes. Callers beyond PASSWORD_HASH_MAX_WAITING, or that
+    wait longer than PASSWORD_HASH_WAIT_SECONDS for a worker, get PasswordHashBusy.
+    """
+    if hash_metrics.waiting >= PASSWORD_HASH_MAX_WAITING:
+        hash_metrics.rejected += 1
+        raise PasswordHashBusy()
+    hash_metrics.waiting += 1
+    queued_at = time.perf_counter()
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), PASSWORD_HASH_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        hash_metrics.rejected += 1
+        raise PasswordHashBusy()
+    finally:
+        hash_metrics.waiting -= 1
+    hash_metrics.in_flight += 1
+    started_at = time.perf_counter()
+    hash_metrics.max_wait_seconds = max(hash_metrics.max_wait_seconds, started_at - queued_at)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+        hash_metrics.in_flight -= 1
+        hash_metrics.calls += 1
+        hash_metrics.total_seconds += time.perf_counter() - started_at
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
+    return await _run_in_hash_pool(get_pwd_context().verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_pwd_context().hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -0,0 +1,184 @@
+"""
+Smart Stop: rank points of interest along the convoy's routes by estimated detour.
+
+POI data is not shipped with the repo. Point POI_DATA_PATH (default data/pois.geojson)
+at either
+  - a GeoJSON FeatureCollection of Point features with `name` and `category` properties, or
+  - an OpenStreetMap export from the Overpass API in its JSON format, e.g. for Israel:
+        curl -o data/pois.json https://overpass-api.de/api/interpreter --data-urlencode \\
+          'data=[out:json];area["ISO3166-1"="IL"]->.a;
+                (nwr["amenity"~"^(fuel|cafe|restaurant|fast_food|toilets)$"](area.a);
+                 nwr["highway"="rest_area"](area.a););out center;'
+    where the amenity (or highway) tag becomes the category.
+Without a file the index is empty and GET /convoys/{id}/smart-stop answers 503.
+"""
+import json
+import logging
+import math
+import os
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import shapely
+from shapely import STRtree
+
+logger = logging.getLogger(__name__)
+
+POI_DATA_PATH = os.getenv("POI_DATA_PATH", "data/pois.geojson")
+METERS_PER_DEGREE = 111_320.0
+
+LatLon = Tuple[float, float]
+
+# Returned with every suggestion so clients do not present the numbers as driving distances
+DETOUR_ESTIMATE = (
+    "Approximate: 2 x straight-line distance from the stop to each member's route "
+    "(off the route and back); road network, one-way streets and traffic are ignored"
+)
+
+def features_from_overpass(elements: Sequence[dict]) -> List[dict]:
+    """Overpass JSON elements (nodes, or ways/relations with `out center`) as GeoJSON point features."""
+    features = []
+    for element in elements:
+        tags = element.get("tags") or {}
+        point = element if "lat" in element else element.get("center")
+        if not point:
+            continue
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [point["lon"], point["lat"]]},
+            "properties": {
+                "name": tags.get("name", "Unknown"),
+                "category": tags.get("amenity") or tags.get("highway", "")
+            }
+        })
+    return features
+
+class POIIndex:
+    """
+    In-memory STR-tree over a local GeoJSON file of point POIs.
+    Geometries are stored as lon/lat points; ranking projects to local meters.
+    """
+    def __init__(self):
+        self.tree: Optional[STRtree] = None
+        self.lats = np.empty(0)
+        self.lons = np.empty(0)
+        self.names: List[str] = []
+        self.categories: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def load_features(self, features: Sequence[dict]) -> int:
+        lats, lons, names, categories = [], [], [], []
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            lon, lat = geometry["coordinates"][:2]
+            props = feature.get("properties") or {}
+            lats.append(float(lat))
+            lons.append(float(lon))
+            names.append(props.get("name", "Unknown"))
+            categories.append(props.get("category", ""))
+
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.names = names
+        self.categories = categories
+        self.tree = STRtree(shapely.points(self.lons, self.lats)) if names else None
+        return len(names)
+
+    def load(self, path: str = POI_DATA_PATH) -> int:
+        if not os.path.exists(path):
+            logger.warning(f"POI file {path} not found, Smart Stop suggestions are disabled")
+            return self.load_features([])
+        with open(path) as f:
+            data = json.load(f)
+        if "elements" in data:
+            features = features_from_overpass(data["elements"])
+        else:
+            features = data.get("features", [])
+        count = self.load_features(features)
+        logger.info(f"Loaded {count} POIs from {path}")
+        return count
+
+    def query(self, area) -> np.ndarray:
+        if self.tree is None:
+            return np.empty(0, dtype=int)
+        return self.tree.query(area, predicate="intersects")
+
+poi_index = POIIndex()
+
+def _project(lats: np.ndarray, lons: np.ndarray, lat0: float, lon0: float) -> np.ndarray:
+    """Equirectangular projection to meters around (lat0, lon0). Accurate enough at convoy scale."""
+    x = (lons - lon0) * METERS_PER_DEGREE * math.cos(math.radians(lat0))
+    y = (lats - lat0) * METERS_PER_DEGREE
+    return np.column_stack([x, y])
+
+def _as_line(coords: np.ndarray):
+    # A route with a single point (already at destination) still needs two vertices
+    if len(coords) == 1:
+        coords = np.vstack([coords, coords])
+    return shapely.linestrings(coords)
+
+def suggest_stops(
+    positions: Sequence[LatLon],
+    routes: Sequence[Sequence[LatLon]],
+    index: POIIndex = poi_index,
+    buffer_m: float = 2000,
+    limit: int = 5,
+    category: Optional[str] = None
+) -> dict:
+    """
+    Rank POIs near the convoy's routes by estimated total detour (see DETOUR_ESTIMATE).
+
+    1. Centroid of the members' positions.
+    2. Buffer every member's route and pull candidate POIs from the STR-tree.
+    3. Detour per member ~= 2 x distance from the POI to that member's route
+       (off the route and back), summed over members in one vectorized pass.
+    """
+    if not positions or not routes or len(index) == 0:
+        return {"centroid": None, "stops": [], "detour_estimate": DETOUR_ESTIMATE}
+
+    pos = np.asarray(positions, dtype=float)
+    lat0, lon0 = float(pos[:, 0].mean()), float(pos[:, 1].mean())
+    centroid = {"latitude": lat0, "longitude": lon0}
+
+    # 1. Candidate search in lon/lat space. The buffer is widened for longitude shrinkage.
+    buffer_deg = buffer_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat0)), 0.01))
+    route_arrays = [np.asarray(route, dtype=float) for route in routes if len(route)]
+    lonlat_lines = [_as_line(r[:, ::-1]) for r in route_arrays]
+    area = shapely.union_all(shapely.buffer(lonlat_lines, buffer_deg))
+    candidates = index.query(area)
+    if category:
+        candidates = np.array([i for i in candidates if index.categories[i] == category], dtype=int)
+    if len(candidates) == 0:
+        return {"centroid": centroid, "stops": [], "detour_estimate": DETOUR_ESTIMATE}
+
+    # 2. Exact distances in meters: (candidates x routes) matrix
+    poi_xy = _project(index.lats[candidates], index.lons[candidates], lat0, lon0)
+    poi_points = shapely.points(poi_xy)
+    metric_lines = np.array([_as_line(_project(r[:, 0], r[:, 1], lat0, lon0)) for r in route_arrays])
+    distances = shapely.distance(poi_points[:, None], metric_lines[None, :])
+
+    within = distances.min(axis=1) <= buffer_m
+    detours = 2 * distances
+    total = detours.sum(axis=1)
+    from_centroid = np.hypot(poi_xy[:, 0], poi_xy[:, 1])
+
+    # 3. Rank by total detour, closest to the group as a tie-breaker
+    order = np.lexsort((from_centroid, total))
+    order = order[within[order]][:limit]
+
+    stops = [
+        {
+            "name": index.names[candidates[i]],
+            "category": index.categories[candidates[i]],
+            "latitude": float(index.lats[candidates[i]]),
+            "longitude": float(index.lons[candidates[i]]),
+            "total_detour_m": float(total[i]),
+            "max_detour_m": float(detours[i].max()),
+            "distance_from_centroid_m": float(from_centroid[i])
+        }
+        for i in order
+    ]
+    return {"centroid": centroid, "stops": stops, "detour_estimate": DETOUR_ESTIMATE}
@@ -1,12 +1,26 @@
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional
 from fastapi import WebSocket
+from app.core.convoy_analytics import compute_convoy_analytics
+from app.core.fast_json import dumps_str
 from app.core.routing import get_driving_distance
+from app.core.spatial_grid import SpatialGrid
+from app.core.tracing import tracer
+
+# How often (per convoy) the analytics message is published
+ANALYTICS_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_INTERVAL_SECONDS", 5))
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, List[WebSocket]] = {}
         self.convoy_destinations: Dict[str, Dict[str, float]] = {}
         self.convoy_state: Dict[str, Dict[str, dict]] = {}
+        # (convoy_id, user_id) -> position, for nearby convoy/member lookups
+        self.member_grid = SpatialGrid()
+        self.last_analytics_at: Dict[str, float] = {}
+        # Wall-clock time of the latest location frame per convoy
+        self.last_update_at: Dict[str, float] = {}
 
     async def connect(self, convoy_id: str, websocket: WebSocket):
         await websocket.accept()
@@ -19,6 +33,8 @@ class ConnectionManager:
         self.convoy_destinations[convoy_id] = {"lat": lat, "lon": lon}
 
     def disconnect(self, convoy_id: str, websocket: WebSocket, user_id: str):
+        # The grid must never keep a member the state no longer has
+        self.member_grid.remove((convoy_id, user_id))
         if convoy_id in self.active_connections:
             if websocket in self.active_connections[convoy_id]:
                 self.active_connections[convoy_id].remove(websocket)
@@ -33,7 +49,11 @@ class ConnectionManager:
                 if convoy_id in self.convoy_destinations:
                     del self.convoy_destinations[convoy_id]
                 if convoy_id in self.convoy_state:
+                    for uid in self.convoy_state[convoy_id]:
+                        self.member_grid.remove((convoy_id, uid))
                     del self.convoy_state[convoy_id]
+                self.last_analytics_at.pop(convoy_id, None)
+                self.last_update_at.pop(convoy_id, None)
             else:
                  print(f"⚠️ Client disconnected. Remaining clients: {len(self.active_connections[convoy_id])}")
 
@@ -49,6 +69,8 @@ class ConnectionManager:
             update_data["eta"] = eta
             
         self.convoy_state[convoy_id][user_id].update(update_data)
+        self.last_update_at[convoy_id] = time.time()
+        self.member_grid.update((convoy_id, user_id), lat, lon)
 
         # 2. Calculate Distance
         dest = self.convoy_destinations.get(convoy_id)
@@ -56,11 +78,43 @@ class ConnectionManager:
             distance = await get_driving_distance(lat, lon, dest["lat"], dest["lon"])
             if distance is not None:
                 self.convoy_state[convoy_id][user_id]["distance"] = distance
+            else:
+                # Unknown until a lookup succeeds; the distance from an older position would mislead
+                self.convoy_state[convoy_id][user_id].pop("distance", None)
 
         # 3. Rank members
+        with tracer.span("convoy.rank", members=len(self.convoy_state[convoy_id])):
+            ranked_members = self.rank_members(convoy_id)
+
+        # LOGGING OUTPUT
+        print(f"📢 Broadcasting to Convoy {convoy_id} | Active Members: {len(ranked_members)} | Clients: {len(self.active_connections.get(convoy_id, []))}")
+
+        if not dest:
+             message = {
+                "type": "location_update",
+                "user_id": user_id,
+                "username": username,
+                "lat": lat,
+                "lon": lon,
+                "eta": eta
+            }
+        else:
+            message = {
+                "type": "convoy_update",
+                "members": ranked_members
+            }
+
+        # 4. Broadcast (encoded once, not once per socket)
+        await self.broadcast(convoy_id, message)
+
+        # 5. Low-cadence analytics in their own message type
+        await self.publish_analytics(convoy_id)
+
+    def rank_members(self, convoy_id: str) -> List[dict]:
+        """Order the convoy's members by remaining distance (closest to destination first)."""
         members_with_distance = [
             (uid, data) 
-            for uid, data in self.convoy_state[convoy_id].items()
+            for uid, data in self.convoy_state.get(convoy_id, {}).items()
         ]
         
         # Sort safe
@@ -78,31 +132,87 @@ class ConnectionManager:
                 "distance": data.get("distance", 0),
                 "eta": data.get("eta")
             })
+        return ranked_members
 
-        # LOGGING OUTPUT
-        print(f"📢 Broadcasting to Convoy {convoy_id} | Active Members: {len(ranked_members)} | Clients: {len(self.active_connections.get(convoy_id, []))}")
+    async def publish_analytics(self, convoy_id: str, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_analytics_at.get(convoy_id, 0.0) < ANALYTICS_INTERVAL_SECONDS:
+            return
+        members = self.convoy_state.get(convoy_id)
+        if not members:
+            return
+        self.last_analytics_at[convoy_id] = now
 
-        if not dest:
-             message = {
-                "type": "location_update",
-                "user_id": user_id,
-                "username": username,
-                "lat": lat,
-                "lon": lon,
-                "eta": eta
-            }
-        else:
-            message = {
-                "type": "convoy_update",
-                "members": ranked_members
-            }
+        await self.broadcast(convoy_id, compute_convoy_analytics(members))
 
-        # 4. Broadcast
-        if convoy_id in self.active_connections:
-            for connection in list(self.active_connections[convoy_id]):
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    pass
+    async def broadcast(self, convoy_id: str, message: dict):
+        connections = self.active_connections.get(convoy_id)
+        if not connections:
+            return
+        with tracer.span("broadcast.encode", type=message.get("type")) as span:
+            text = dumps_str(message)
+            span.set_attribute("bytes", len(text))
+        if tracer.recording():
+            await self._broadcast_traced(list(connections), text)
+            return
+        for connection in list(connections):
+            try:
+                await connection.send_text(text)
+            except Exception:
+                pass
+
+    async def _broadcast_traced(self, connections: List[WebSocket], text: str):
+        """Same as the broadcast loop, with a span per socket so a slow consumer stands out."""
+        with tracer.span("broadcast.send", recipients=len(connections)) as send_span:
+            slowest = 0.0
+            for index, connection in enumerate(connections):
+                started_at = time.perf_counter()
+                with tracer.span("socket.send", index=index) as span:
+                    try:
+                        await connection.send_text(text)
+                    except Exception as e:
+                        span.set_attribute("error", type(e).__name__)
+                slowest = max(slowest, time.perf_counter() - started_at)
+            send_span.set_attribute("slowest_send_ms", slowest * 1000)
+
+    def live_summary(self, convoy_id: str) -> Optional[dict]:
+        """Live state of a convoy on this worker, or None when nobody is connected."""
+        connections = self.active_connections.get(convoy_id)
+        if not connections:
+            return None
+        members = self.convoy_state.get(convoy_id, {})
+        leader_id = min(members, key=lambda uid: members[uid].get("rank", float("inf")), default=None)
+        return {
+            "connected": len(connections),
+            "online_members": len(members),
+            "leader_user_id": leader_id,
+            "leader_username": members[leader_id].get("username") if leader_id else None,
+            "last_update_at": self.last_update_at.get(convoy_id)
+        }
+
+    def nearby_members(self, lat: float, lon: float, radius_m: float, convoy_id: Optional[str] = None) -> List[dict]:
+        """Live members within radius_m, closest first, optionally restricted to one convoy."""
+        results = []
+        for (cid, uid), distance in self.member_grid.query(lat, lon, radius_m):
+            if convoy_id is not None and cid != convoy_id:
+                continue
+            data = self.convoy_state.get(cid, {}).get(uid, {})
+            results.append({
+                "convoy_id": cid,
+                "user_id": uid,
+                "username": data.get("username", "Unknown"),
+                "lat": data.get("lat"),
+                "lon": data.get("lon"),
+                "distance": distance
+            })
+        return sorted(results, key=lambda m: m["distance"])
+
+    def nearby_convoys(self, lat: float, lon: float, radius_m: float) -> List[dict]:
+        """Live convoys with at least one member within radius_m, closest first."""
+        convoys: Dict[str, dict] = {}
+        for (cid, _uid), distance in self.member_grid.query(lat, lon, radius_m):
+            entry = convoys.setdefault(cid, {"convoy_id": cid, "distance": distance, "members_nearby": 0})
+            entry["members_nearby"] += 1
+        return sorted(convoys.values(), key=lambda c: c["distance"])
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
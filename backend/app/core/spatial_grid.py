@@ -0,0 +1,84 @@
+import math
+import os
+from typing import Dict, Hashable, List, Set, Tuple
+
+GRID_CELL_DEGREES = float(os.getenv("GRID_CELL_DEGREES", 0.01))  # ~1.1km of latitude
+EARTH_RADIUS_M = 6_371_000.0
+
+Cell = Tuple[int, int]
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+class SpatialGrid:
+    """
+    Uniform lat/lon grid of entity positions, updated incrementally.
+    A radius query only visits the cells overlapping the query's bounding box,
+    so its cost depends on local density, not on how many entities are tracked.
+    """
+    def __init__(self, cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Cell, Set[Hashable]] = {}
+        self.positions: Dict[Hashable, Tuple[float, float, Cell]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def update(self, key: Hashable, lat: float, lon: float):
+        cell = self._cell(lat, lon)
+        previous = self.positions.get(key)
+        if previous is not None and previous[2] != cell:
+            self._discard(key, previous[2])
+        if previous is None or previous[2] != cell:
+            self.cells.setdefault(cell, set()).add(key)
+        self.positions[key] = (lat, lon, cell)
+
+    def remove(self, key: Hashable):
+        previous = self.positions.pop(key, None)
+        if previous is not None:
+            self._discard(key, previous[2])
+
+    def _discard(self, key: Hashable, cell: Cell):
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self.cells[cell]
+
+    def query(self, lat: float, lon: float, radius_m: float) -> List[Tuple[Hashable, float]]:
+        """Entities within radius_m of (lat, lon) as (key, distance_m), closest first."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.01)
+        min_cell = self._cell(lat - dlat, lon - dlon)
+        max_cell = self._cell(lat + dlat, lon + dlon)
+
+        cell_count = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+        if cell_count > len(self.cells):
+            # Huge radius: walking occupied cells is cheaper than the bounding box
+            candidate_cells = [
+                cell for cell in self.cells
+                if min_cell[0] <= cell[0] <= max_cell[0] and min_cell[1] <= cell[1] <= max_cell[1]
+            ]
+        else:
+            candidate_cells = [
+                (i, j)
+                for i in range(min_cell[0], max_cell[0] + 1)
+                for j in range(min_cell[1], max_cell[1] + 1)
+            ]
+
+        hits = []
+        for cell in candidate_cells:
+            for key in self.cells.get(cell, ()):
+                p_lat, p_lon, _ = self.positions[key]
+                distance = haversine_m(lat, lon, p_lat, p_lon)
+                if distance <= radius_m:
+                    hits.append((key, distance))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
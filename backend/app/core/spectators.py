@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+from fastapi import WebSocket, status
+from app.core.fast_json import dumps_str
+from app.core.socket_manager import ConnectionManager, manager
+
+logger = logging.getLogger(__name__)
+
+# Spectators get one snapshot per convoy every SPECTATOR_INTERVAL_SECONDS
+SPECTATOR_INTERVAL_SECONDS = float(os.getenv("SPECTATOR_INTERVAL_SECONDS", 5))
+# Coordinates are rounded to this many decimals (3 ~= 100m)
+SPECTATOR_PRECISION = int(os.getenv("SPECTATOR_PRECISION", 3))
+MAX_SPECTATORS_PER_CONVOY = int(os.getenv("MAX_SPECTATORS_PER_CONVOY", 500))
+# A viewer whose send takes longer than this is dropped, so one slow client cannot delay the rest
+SPECTATOR_SEND_TIMEOUT_SECONDS = float(os.getenv("SPECTATOR_SEND_TIMEOUT_SECONDS", 2))
+
+def build_snapshot(convoy_id: str, members: Dict[str, dict], precision: int = SPECTATOR_PRECISION) -> dict:
+    """
+    Coarsened, read-only view of the convoy for share-link viewers.
+    Uses the ranks the member path already computed; never re-ranks.
+    """
+    ordered = sorted(members.values(), key=lambda data: data.get("rank", float("inf")))
+    return {
+        "type": "convoy_snapshot",
+        "convoy_id": convoy_id,
+        "member_count": len(ordered),
+        "members": [
+            {
+                "username": data.get("username", "Unknown"),
+                "lat": round(data["lat"], precision),
+                "lon": round(data["lon"], precision),
+                "rank": data.get("rank"),
+                "distance": round(data["distance"], -2) if data.get("distance") is not None else None,
+                "eta": data.get("eta")
+            }
+            for data in ordered if "lat" in data
+        ]
+    }
+
+class SpectatorHub:
+    """
+    Read-only audience for live convoys.
+
+    Spectators are kept apart from ConnectionManager: they are not in active_connections,
+    convoy_state or the ranking, so the per-frame member path costs the same whether a
+    convoy has zero or hundreds of viewers. A single loop builds each watched convoy's
+    snapshot once per tick, encodes it once and sends the same text to every spectator
+    concurrently; viewers that fail or time out are dropped.
+    """
+    def __init__(self, source: ConnectionManager = manager, interval: float = SPECTATOR_INTERVAL_SECONDS,
+                 max_per_convoy: int = MAX_SPECTATORS_PER_CONVOY,
+                 send_timeout: float = SPECTATOR_SEND_TIMEOUT_SECONDS):
+        self.source = source
+        self.interval = interval
+        self.max_per_convoy = max_per_convoy
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self._closing: set = set()
+        self.spectators: Dict[str, List[WebSocket]] = {}
+        # Last snapshot text per convoy: sent to new spectators right away, and unchanged
+        # snapshots are not re-sent
+        self.last_snapshot: Dict[str, str] = {}
+
+    def is_full(self, convoy_id: str) -> bool:
+        return len(self.spectators.get(convoy_id, [])) >= self.max_per_convoy
+
+    async def connect(self, convoy_id: str, websocket: WebSocket):
+        await websocket.accept()
+        self.spectators.setdefault(convoy_id, []).append(websocket)
+        text = self.last_snapshot.get(convoy_id)
+        if text is not None:
+            await websocket.send_text(text)
+
+    def disconnect(self, convoy_id: str, websocket: WebSocket):
+        watchers = self.spectators.get(convoy_id)
+        if watchers is None:
+            return
+        if websocket in watchers:
+            watchers.remove(websocket)
+        if not watchers:
+            del self.spectators[convoy_id]
+            self.last_snapshot.pop(convoy_id, None)
+
+    def snapshot_text(self, convoy_id: str) -> Optional[str]:
+        members = self.source.convoy_state.get(convoy_id)
+        if not members:
+            return None
+        return dumps_str(build_snapshot(convoy_id, members))
+
+    async def _send(self, websocket: WebSocket, text: str) -> bool:
+        try:
+            await asyncio.wait_for(websocket.send_text(text), self.send_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def tick(self):
+        for convoy_id in list(self.spectators):
+            text = self.snapshot_text(convoy_id)
+            if text is None or text == self.last_snapshot.get(convoy_id):
+                continue
+            self.last_snapshot[convoy_id] = text
+            watchers = list(self.spectators.get(convoy_id, []))
+            delivered = await asyncio.gather(*(self._send(websocket, text) for websocket in watchers))
+            for websocket, ok in zip(watchers, delivered):
+                if not ok:
+                    self.dropped += 1
+                    self.disconnect(convoy_id, websocket)
+                    # Closed in the background: a stuck client must not hold up the next convoy
+                    task = asyncio.create_task(self._close(websocket))
+                    self._closing.add(task)
+                    task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=status.WS_1013_TRY_AGAIN_LATER), self.send_timeout)
+        except Exception:
+            pass
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Spectator tick failed: {e}")
+
+spectator_hub = SpectatorHub()
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP_ENABLED = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+# Warm-up never holds readiness back longer than this
+STARTUP_WARMUP_TIMEOUT = float(os.getenv("STARTUP_WARMUP_TIMEOUT", 5.0))
+
+class StartupProfile:
+    """
+    Where a cold start spends its time: importing the app, then each lifespan init step.
+    Served by the admin API and logged once the instance is ready.
+    """
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.imports_seconds: Optional[float] = None
+        self.steps: List[Tuple[str, float, Optional[str]]] = []
+        self.ready_seconds: Optional[float] = None
+
+    def imports_done(self):
+        self.imports_seconds = time.perf_counter() - self.created_at
+
+    async def timed(self, name: str, step: Awaitable, timeout: float = STARTUP_WARMUP_TIMEOUT):
+        """Run one init step; failures and timeouts are recorded, never raised (the app still starts)."""
+        started_at = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(step, timeout)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Startup step '{name}' failed: {error}")
+        self.steps.append((name, time.perf_counter() - started_at, error))
+
+    def record(self, name: str, started_at: float):
+        self.steps.append((name, time.perf_counter() - started_at, None))
+
+    def ready(self):
+        self.ready_seconds = time.perf_counter() - self.created_at
+        logger.info(
+            "Ready in %.0f ms (imports %.0f ms; %s)",
+            self.ready_seconds * 1000,
+            (self.imports_seconds or 0) * 1000,
+            ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds, _ in self.steps)
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "imports_ms": self.imports_seconds * 1000 if self.imports_seconds is not None else None,
+            "ready_ms": self.ready_seconds * 1000 if self.ready_seconds is not None else None,
+            "steps": [
+                {"name": name, "ms": seconds * 1000, "error": error}
+                for name, seconds, error in self.steps
+            ]
+        }
+
+startup_profile = StartupProfile()
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def profile_imports(module: str = "app.main") -> List[Tuple[str, int, int, int]]:
+    """
+    Import `module` in a fresh interpreter with `-X importtime`.
+    Returns (module, self_us, cumulative_us, depth) for every module it pulled in.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=os.environ.copy()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def summarize_imports(rows: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """Self time per top-level package (app modules are kept separate), in microseconds."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        key = name if name.startswith("app.") else name.split(".")[0]
+        totals[key] += self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+if __name__ == "__main__":
+    # python -m app.core.startup [module] [top]
+    target = sys.argv[1] if len(sys.argv) > 1 else "app.main"
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    rows = profile_imports(target)
+    totals = summarize_imports(rows)
+    print(f"Importing {target}: {sum(totals.values()) / 1000:.0f} ms total\n")
+    for name, self_us in list(totals.items())[:top]:
+        print(f"{self_us / 1000:9.1f} ms  {name}")
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Fraction of root spans (requests / websocket frames) that are recorded
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", 0.01))
+# "console" (stderr) or "file"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces/spans.jsonl")
+# Finished spans are buffered and written in batches of this size, or by the first export
+# TRACING_FLUSH_SECONDS after the previous write
+TRACING_BATCH_SIZE = int(os.getenv("TRACING_BATCH_SIZE", 256))
+TRACING_FLUSH_SECONDS = float(os.getenv("TRACING_FLUSH_SECONDS", 1.0))
+# "builtin" or "otel" (uses the OpenTelemetry API and whatever provider the deployment configures)
+TRACING_BACKEND = os.getenv("TRACING_BACKEND", "builtin")
+
+@dataclass
+class Span:
+    """A finished or running span, exported in OpenTelemetry's JSON field naming."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_unix_nano: int = field(default_factory=time.time_ns)
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def is_recording(self) -> bool:
+        return self.end_time_unix_nano is None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": (self.end_time_unix_nano - self.start_time_unix_nano) / 1e6,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+class _NoopSpan:
+    """Stands in for spans that are not recorded (tracing off or trace not sampled)."""
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Union[Span, _NoopSpan, None]] = ContextVar("current_span", default=None)
+
+class SpanExporter:
+    """
+    Writes one JSON line per finished span to a file or stderr. Lines are buffered and
+    written with a single write() per batch; close() flushes what is left on shutdown.
+    """
+    def __init__(self, kind: str = TRACING_EXPORTER, path: str = TRACING_FILE,
+                 batch_size: int = TRACING_BATCH_SIZE, flush_seconds: float = TRACING_FLUSH_SECONDS):
+        self.kind = kind
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        chunk = "".join(self.buffer)
+        self.buffer.clear()
+        if self.kind == "console":
+            sys.stderr.write(chunk)
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a")
+        self._file.write(chunk)
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-compatible tracer.
+
+    `span(name)` opens a child of the current span, or a new sampled/unsampled root.
+    Children of an unsampled root are no-ops, so an unsampled frame costs one context
+    variable set per span. Hot loops should check `recording()` once instead of opening
+    a span per iteration when nothing is recorded.
+    """
+    def __init__(self, enabled: bool = TRACING_ENABLED, sample_rate: float = TRACING_SAMPLE_RATE,
+                 exporter: Optional[SpanExporter] = None, backend: str = TRACING_BACKEND):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter or SpanExporter()
+        self._otel = None
+        if backend == "otel":
+            try:
+                from opentelemetry import trace
+                self._otel = trace.get_tracer("weride")
+            except ImportError:
+                logger.warning("TRACING_BACKEND=otel but opentelemetry is not installed; using the builtin tracer")
+
+    def recording(self) -> bool:
+        if self._otel is not None:
+            from opentelemetry import trace
+            return self.enabled and trace.get_current_span().is_recording()
+        current = _current_span.get()
+        return current is not None and current.is_recording()
+
+    def _new_span(self, name: str, attributes: dict, parent: Optional[Span]) -> Span:
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_span_id=parent.span_id if parent else None,
+            attributes=dict(attributes),
+        )
+
+    def _finish(self, span: Span):
+        span.end_time_unix_nano = time.time_ns()
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.error(f"Span export failed: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Union[Span, _NoopSpan]]:
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        if self._otel is not None:
+            with self._otel.start_as_current_span(name, attributes=attributes) as otel_span:
+                yield otel_span
+            return
+
+        parent = _current_span.get()
+        if isinstance(parent, _NoopSpan) or (parent is None and random.random() >= self.sample_rate):
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        span = self._new_span(name, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.set_attribute("exception.type", type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def start_span(self, name: str, **attributes):
+        """
+        Detached child span for callback-style instrumentation (DB events).
+        Only recorded inside a sampled trace; returns None otherwise.
+        """
+        if not self.enabled:
+            return None
+        if self._otel is not None:
+            from opentelemetry import trace
+            if not trace.get_current_span().is_recording():
+                return None
+            return self._otel.start_span(name, attributes=attributes)
+        parent = _current_span.get()
+        if not isinstance(parent, Span):
+            return None
+        return self._new_span(name, attributes, parent)
+
+    def end_span(self, span):
+        if isinstance(span, Span):
+            self._finish(span)
+        elif span is not None:
+            span.end()
+
+tracer = Tracer()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = tracer.start_span("db.query", **{"db.system": conn.dialect.name, "db.statement": statement[:500]})
+    if span is not None:
+        conn.info.setdefault("trace_spans", []).append(span)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        tracer.end_span(spans.pop())
+
+def instrument_engine_tracing(engine) -> None:
+    """Emit a `db.query` span for every statement run inside a recorded trace."""
+    from sqlalchemy import event
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WS_CAPTURE_ENABLED = os.getenv("WS_CAPTURE_ENABLED", "false").lower() == "true"
+WS_CAPTURE_DIR = os.getenv("WS_CAPTURE_DIR", "captures")
+# Records are buffered in memory and written in batches of this many lines
+WS_CAPTURE_FLUSH_EVERY = int(os.getenv("WS_CAPTURE_FLUSH_EVERY", 100))
+
+# Record kinds. One JSON array per line:
+#   [ts, "c", convoy_id, user_id, dest_lat, dest_lon]   member connected
+#   [ts, "f", convoy_id, user_id, lat, lon, eta]        location frame
+#   [ts, "d", convoy_id, user_id]                       member disconnected
+CONNECT, FRAME, DISCONNECT = "c", "f", "d"
+
+class TrafficRecorder:
+    """
+    Opt-in capture of inbound websocket traffic for offline replay (benchmarks/replay.py).
+    Appends compact JSON lines with wall-clock timestamps; one file per worker process.
+    The event loop only serializes and buffers records; full batches are written by a
+    single writer thread, so file I/O never blocks frame handling and batches stay in order.
+    Captures contain real member positions, so keep them out of shared storage.
+    """
+    def __init__(self, enabled: bool = WS_CAPTURE_ENABLED, directory: str = WS_CAPTURE_DIR,
+                 flush_every: int = WS_CAPTURE_FLUSH_EVERY):
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_every = flush_every
+        self.path: Optional[str] = None
+        self.records = 0
+        self._buffer: List[str] = []
+        self._writer: Optional[ThreadPoolExecutor] = None
+        # Only touched on the writer thread
+        self._file: Optional[IO[str]] = None
+
+    def _write(self, record: list):
+        if self.path is None:
+            self.path = os.path.join(self.directory, f"ws-{int(time.time())}-{os.getpid()}.jsonl")
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+        self.records += 1
+        if len(self._buffer) >= self.flush_every:
+            self._submit()
+
+    def _submit(self):
+        """Hand the buffered lines to the writer thread."""
+        chunk = "".join(self._buffer)
+        self._buffer = []
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ws-capture")
+        return self._writer.submit(self._append, chunk)
+
+    def _append(self, chunk: str):
+        if not chunk:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self.path, "a")
+            self._file.write(chunk)
+            self._file.flush()
+        except OSError as e:
+            lines = chunk.count("\n")
+            logger.error(f"Dropped {lines} capture records: {e}")
+
+    def connect(self, convoy_id: str, user_id: str, dest: Optional[dict]):
+        if self.enabled:
+            self._write([round(time.time(), 3), CONNECT, convoy_id, user_id,
+                         dest["lat"] if dest else None, dest["lon"] if dest else None])
+
+    def frame(self, convoy_id: str, user_id: str, lat: float, lon: float, eta: Optional[float]):
+        if self.enabled:
+            self._write([round(time.time(), 3), FRAME, convoy_id, user_id, lat, lon, eta])
+
+    def disconnect(self, convoy_id: str, user_id: str):
+        if self.enabled:
+            self._write([round(time.time(), 3), DISCONNECT, convoy_id, user_id])
+
+    def flush(self):
+        """Write everything recorded so far and wait until it reaches the file."""
+        if self._buffer or self._writer is not None:
+            self._submit().result()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.submit(self._close_file).result()
+            self._writer.shutdown()
+            self._writer = None
+
+def read_capture(path: str) -> Iterator[List]:
+    """Yield capture records in file order, skipping a torn last line."""
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+recorder = TrafficRecorder()
@@ -1,8 +1,57 @@
+# Imported first so the profile's clock covers every other import
+from app.core.startup import STARTUP_WARMUP_ENABLED, startup_profile
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import users, convoys, websockets, auth
+from app.api import users, convoys, websockets, auth, admin
+from app.core.database import warm_pool
+from app.core.fast_json import FastJSONResponse
+from app.core.jobs import job_queue
+from app.core.position_store import position_writer
+from app.core.reaper import REAPER_ENABLED, reaper_loop
+from app.core.request_instrumentation import RequestInstrumentationMiddleware
+from app.core.routing import close_http_client, warm_routing_client
+from app.core.smart_stop import poi_index
+from app.core.spectators import spectator_hub
+from app.core.traffic_capture import recorder
+from app.core.tracing import tracer
 
-app = FastAPI(title="WeRide API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started_at = time.perf_counter()
+    poi_index.load()
+    startup_profile.record("poi index", started_at)
+    # Warm connections before the instance reports ready, so the first request doesn't pay for them
+    if STARTUP_WARMUP_ENABLED:
+        await asyncio.gather(
+            startup_profile.timed("db pool", warm_pool()),
+            startup_profile.timed("routing client", warm_routing_client())
+        )
+    startup_profile.ready()
+    # Background jobs live for the lifetime of the worker
+    reaper_task = asyncio.create_task(reaper_loop()) if REAPER_ENABLED else None
+    position_task = asyncio.create_task(position_writer.run())
+    jobs_task = asyncio.create_task(job_queue.run())
+    spectator_task = asyncio.create_task(spectator_hub.run())
+    yield
+    spectator_task.cancel()
+    jobs_task.cancel()
+    position_task.cancel()
+    if reaper_task:
+        reaper_task.cancel()
+    await position_writer.flush()
+    await close_http_client()
+    recorder.close()
+    tracer.exporter.close()
+
+app = FastAPI(
+    title="WeRide API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,11 +61,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so traces and DB counts cover CORS handling too
+app.add_middleware(RequestInstrumentationMiddleware)
 
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(convoys.router, prefix="/api/v1/convoys", tags=["convoys"])
 app.include_router(websockets.router, prefix="/ws", tags=["websockets"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
+startup_profile.imports_done()
 
 @app.get("/")
 async def root(name: str = "Noam"):
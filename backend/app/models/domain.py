@@ -1,8 +1,10 @@
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Optional, List
 import uuid
-from sqlmodel import Field, SQLModel, Relationship
+from geoalchemy2 import Geography
+from sqlalchemy import Index, text
+from sqlmodel import Column, Field, SQLModel, Relationship
 
 def utc_now():
     """Returns a naive UTC datetime (compatible with postgres timestamp without timezone)"""
@@ -17,12 +19,28 @@ class ConvoyRole(str, Enum):
     MEMBER = "member"
 
 class ConvoyMember(SQLModel, table=True):
+    # The primary key leads with convoy_id; lookups by user (my convoys, newest first) need their own index
+    __table_args__ = (
+        Index("idx_convoymember_user_joined", "user_id", "joined_at", "convoy_id"),
+    )
+
     convoy_id: uuid.UUID = Field(foreign_key="convoy.id", primary_key=True)
     user_id: int = Field(foreign_key="user.id", primary_key=True)
     role: ConvoyRole
     joined_at: datetime = Field(default_factory=utc_now) # Updated
+    # Last known position, flushed in batches from the websocket stream
+    last_position: Optional[Any] = Field(
+        default=None,
+        sa_column=Column(Geography(geometry_type="POINT", srid=4326, spatial_index=True))
+    )
+    last_position_at: Optional[datetime] = None
 
 class User(UserBase, table=True):
+    # Guest expiry scans only guests
+    __table_args__ = (
+        Index("idx_user_guest_created_at", "created_at", postgresql_where=text("is_guest")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
     is_guest: bool = Field(default=False)
@@ -31,12 +49,22 @@ class User(UserBase, table=True):
     convoys: List["Convoy"] = Relationship(back_populates="members", link_model=ConvoyMember)
 
 class Convoy(SQLModel, table=True):
+    # Archiving scans only active convoys
+    __table_args__ = (
+        Index("idx_convoy_active_start_time", "start_time", postgresql_where=text("status = 'active'")),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     name: str
     invite_code: str = Field(unique=True, index=True)
     destination_name: str
     destination_lat: float
     destination_lon: float
+    # Same point as destination_lat/lon, as an indexed geography for spatial queries
+    destination_geog: Optional[Any] = Field(
+        default=None,
+        sa_column=Column(Geography(geometry_type="POINT", srid=4326, spatial_index=True))
+    )
     start_time: datetime
     status: str = "active"
     
@@ -62,4 +90,49 @@ class ConvoyRead(ConvoyCreate):
     invite_code: str
     status: str
     share_link: Optional[str] = None
-    members: List[UserRead]
\ No newline at end of file
+    members: List[UserRead]
+
+class ConvoyLiveState(SQLModel):
+    connected: int
+    online_members: int
+    leader_user_id: Optional[str] = None
+    leader_username: Optional[str] = None
+    last_update_at: Optional[datetime] = None
+
+class ConvoyBatchItem(ConvoyRead):
+    live: Optional[ConvoyLiveState] = None
+
+class ConvoyBatch(SQLModel):
+    convoys: List[ConvoyBatchItem]
+    missing: List[uuid.UUID] = []
+
+class ConvoySummary(SQLModel):
+    id: uuid.UUID
+    name: str
+    destination_name: str
+    status: str
+    member_count: int
+    role: ConvoyRole
+    joined_at: datetime
+    members: Optional[List[UserRead]] = None
+
+class ConvoySummaryPage(SQLModel):
+    items: List[ConvoySummary]
+    next_cursor: Optional[str] = None
+
+class NearbyMember(SQLModel):
+    user_id: int
+    username: str
+    lat: float
+    lon: float
+    distance_m: float
+    last_position_at: Optional[datetime] = None
+
+class NearbyConvoy(SQLModel):
+    id: uuid.UUID
+    name: str
+    destination_name: str
+    destination_lat: float
+    destination_lon: float
+    status: str
+    distance_m: float
@@ -0,0 +1,164 @@
+"""
+Replay captured websocket traffic through ConnectionManager.
+
+Capture on a server with WS_CAPTURE_ENABLED=true (see app/core/traffic_capture.py), then
+run from backend/:
+    python -m benchmarks.replay captures/ws-....jsonl                # real time (1x)
+    python -m benchmarks.replay captures/ws-....jsonl --speed 10     # 10x faster
+    python -m benchmarks.replay captures/ws-....jsonl --speed max    # back to back
+    python -m benchmarks.replay capture.jsonl --speed max --output replay.json
+
+Sockets are FakeSockets and routing is stubbed, so no server, DB or OSRM is involved.
+In timed modes every record is started at its (scaled) capture time as its own task, so
+members run concurrently like connections in production, while each member's records are
+chained and handled in capture order, as one socket's receive loop would; `lag` is how
+late frames started.
+In max mode frames are processed one after another and the run measures throughput.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+from app.core import socket_manager
+from app.core.socket_manager import ConnectionManager
+from app.core.traffic_capture import CONNECT, DISCONNECT, FRAME, read_capture
+from benchmarks.run import FakeSocket, stub_driving_distance
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    picked = {f"p{pct}": ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] for pct in (50, 90, 99)}
+    return {"count": len(ordered), **picked, "max": ordered[-1]}
+
+class Replayer:
+    def __init__(self, records: List[list], speed: Optional[float]):
+        self.records = records
+        self.speed = speed
+        self.manager = ConnectionManager()
+        self.sockets: Dict[Tuple[str, str], FakeSocket] = {}
+        self.durations: List[float] = []
+        self.lags: List[float] = []
+        self.messages_sent = 0
+        # Timed modes: the last scheduled task per member, which the next one waits for
+        self.member_tails: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def _connect(self, convoy_id: str, user_id: str, dest_lat, dest_lon):
+        socket = FakeSocket()
+        self.sockets[(convoy_id, user_id)] = socket
+        await self.manager.connect(convoy_id, socket)
+        if dest_lat is not None and convoy_id not in self.manager.convoy_destinations:
+            self.manager.set_destination(convoy_id, dest_lat, dest_lon)
+
+    async def _frame(self, convoy_id: str, user_id: str, lat: float, lon: float, eta, due: Optional[float] = None):
+        if (convoy_id, user_id) not in self.sockets:
+            # Capture started while this member was already connected
+            await self._connect(convoy_id, user_id, None, None)
+        started_at = time.perf_counter()
+        if due is not None:
+            self.lags.append(started_at - due)
+        await self.manager.update_location_and_broadcast(convoy_id, user_id, f"user{user_id}", lat, lon, eta)
+        self.durations.append(time.perf_counter() - started_at)
+
+    def _disconnect(self, convoy_id: str, user_id: str):
+        socket = self.sockets.pop((convoy_id, user_id), None)
+        if socket is not None:
+            self.messages_sent += socket.sent
+            self.manager.disconnect(convoy_id, socket, user_id)
+
+    async def _after(self, previous: Optional[asyncio.Task], handler, *args):
+        if previous is not None:
+            # Wait without re-raising: one failed frame should not stall the member's queue
+            await asyncio.wait([previous])
+        result = handler(*args)
+        if asyncio.iscoroutine(result):
+            await result
+
+    def _schedule(self, key: Tuple[str, str], handler, *args) -> asyncio.Task:
+        task = asyncio.create_task(self._after(self.member_tails.get(key), handler, *args))
+        self.member_tails[key] = task
+        return task
+
+    async def run(self) -> dict:
+        tasks = []
+        first_ts = self.records[0][0] if self.records else 0.0
+        started_at = time.perf_counter()
+
+        for record in self.records:
+            ts, kind, convoy_id, user_id = record[:4]
+            due = None
+            if self.speed:
+                due = started_at + (ts - first_ts) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if self.speed:
+                key = (convoy_id, user_id)
+                if kind == CONNECT:
+                    tasks.append(self._schedule(key, self._connect, convoy_id, user_id, *record[4:6]))
+                elif kind == FRAME:
+                    tasks.append(self._schedule(key, self._frame, convoy_id, user_id, *record[4:7], due))
+                elif kind == DISCONNECT:
+                    tasks.append(self._schedule(key, self._disconnect, convoy_id, user_id))
+            elif kind == CONNECT:
+                await self._connect(convoy_id, user_id, *record[4:6])
+            elif kind == FRAME:
+                await self._frame(convoy_id, user_id, *record[4:7])
+            elif kind == DISCONNECT:
+                self._disconnect(convoy_id, user_id)
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started_at
+        frames = len(self.durations)
+        return {
+            "speed": self.speed or "max",
+            "records": len(self.records),
+            "frames": frames,
+            "captured_seconds": (self.records[-1][0] - first_ts) if self.records else 0.0,
+            "elapsed_seconds": elapsed,
+            "frames_per_second": frames / elapsed if elapsed else 0.0,
+            "messages_sent": self.messages_sent + sum(s.sent for s in self.sockets.values()),
+            "frame_ms": percentiles([d * 1000 for d in self.durations]),
+            "lag_ms": percentiles([lag * 1000 for lag in self.lags])
+        }
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a websocket capture against fake sockets")
+    parser.add_argument("capture", help="Capture file written by the traffic recorder")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="Time scale (1, 10, ...) or 'max'")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+    socket_manager.get_driving_distance = stub_driving_distance
+
+    records = sorted(read_capture(args.capture), key=lambda r: r[0])
+    # The manager logs every broadcast; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(Replayer(records, args.speed).run())
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
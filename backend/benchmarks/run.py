@@ -0,0 +1,212 @@
+"""
+Microbenchmarks for the realtime and routing hot paths.
+
+Run from backend/:
+    python -m benchmarks.run                          # print timings
+    python -m benchmarks.run --save baseline.json     # record a baseline
+    python -m benchmarks.run --compare baseline.json  # diff against it, exit 1 on regression
+    python -m benchmarks.run --filter broadcast       # only matching cases
+
+Each case is warmed up, then timed over several repeats; the median per-call time is reported.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from app.core import socket_manager
+from app.core.fast_json import dumps_str
+from app.core.routing import parse_route_response
+from app.core.socket_manager import ConnectionManager
+from app.models.domain import Convoy, ConvoyRead, User
+
+SIZES = [10, 100, 500]
+
+class FakeSocket:
+    """Stands in for a websocket: counts what the manager sends, then discards it."""
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent += 1
+
+async def stub_driving_distance(lat1, lon1, lat2, lon2) -> float:
+    return abs(lat1 - lat2) * 111_320 + abs(lon1 - lon2) * 94_000
+
+def make_manager(size: int) -> ConnectionManager:
+    manager = ConnectionManager()
+    manager.set_destination("bench", 32.0853, 34.7818)
+    manager.active_connections["bench"] = [FakeSocket() for _ in range(size)]
+    for i in range(size):
+        manager.convoy_state.setdefault("bench", {})[str(i)] = {
+            "username": f"driver{i}",
+            "lat": 32.18 - random.random() * 0.1,
+            "lon": 34.87 - random.random() * 0.1,
+            "distance": random.uniform(1000, 20000)
+        }
+    return manager
+
+def make_osrm_response(points: int, steps: int) -> dict:
+    coords = [[34.87 - i * 1e-4, 32.18 - i * 1e-4] for i in range(points)]
+    return {
+        "code": "Ok",
+        "routes": [{
+            "duration": 1200.0,
+            "distance": 15000.0,
+            "geometry": {"type": "LineString", "coordinates": coords},
+            "legs": [{"steps": [{
+                "distance": 100.0,
+                "duration": 10.0,
+                "name": f"Street {i}",
+                "maneuver": {"instruction": "Turn", "type": "turn", "modifier": "left", "location": coords[i % points]}
+            } for i in range(steps)]}]
+        }]
+    }
+
+def make_convoy(members: int) -> Convoy:
+    convoy = Convoy(
+        id=uuid.uuid4(), name="Bench", invite_code="ABC123", destination_name="Tel Aviv",
+        destination_lat=32.0853, destination_lon=34.7818, start_time=datetime(2030, 1, 1)
+    )
+    convoy.members = [
+        User(id=i, username=f"user{i}", hashed_password="!", created_at=datetime(2030, 1, 1))
+        for i in range(members)
+    ]
+    return convoy
+
+def build_cases() -> Dict[str, Callable[[], Callable[[], None]]]:
+    """name -> factory returning a zero-arg callable to time (setup is not timed)."""
+    cases = {}
+    loop = asyncio.new_event_loop()
+
+    for size in SIZES:
+        def broadcast_case(size=size):
+            manager = make_manager(size)
+            def run():
+                loop.run_until_complete(manager.update_location_and_broadcast(
+                    "bench", "0", "driver0", 32.1 + random.random() * 0.01, 34.8, eta=600
+                ))
+            return run
+        cases[f"broadcast/members={size}"] = broadcast_case
+
+        def ranking_case(size=size):
+            manager = make_manager(size)
+            return lambda: manager.rank_members("bench")
+        cases[f"ranking/members={size}"] = ranking_case
+
+        def serialize_case(size=size):
+            message = {"type": "convoy_update", "members": make_manager(size).rank_members("bench")}
+            return lambda: dumps_str(message)
+        cases[f"serialize/members={size}"] = serialize_case
+
+        def from_orm_case(size=size):
+            convoy = make_convoy(size)
+            return lambda: ConvoyRead.from_orm(convoy)
+        cases[f"convoy_read/members={size}"] = from_orm_case
+
+    for points in [100, 2000]:
+        def osrm_case(points=points):
+            data = make_osrm_response(points, steps=points // 10)
+            return lambda: parse_route_response(data)
+        cases[f"osrm_parse/points={points}"] = osrm_case
+
+    return cases
+
+def time_case(func: Callable[[], None], repeats: int, min_time: float) -> dict:
+    # Warm up and pick a loop count that runs for at least min_time per repeat
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        loops *= 2
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "stdev_us": statistics.stdev(samples) * 1e6 if len(samples) > 1 else 0.0,
+        "loops": loops
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    print(f"\n{'case':<32}{'baseline us':>14}{'current us':>14}{'change':>10}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<32}{'-':>14}{current['median_us']:>14.1f}{'new':>10}")
+            continue
+        change = (current["median_us"] - base["median_us"]) / base["median_us"]
+        flag = " <-- regression" if change > threshold else ""
+        print(f"{name:<32}{base['median_us']:>14.1f}{current['median_us']:>14.1f}{change:>+10.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="WeRide hot-path microbenchmarks")
+    parser.add_argument("--filter", default="", help="Only run cases containing this substring")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per repeat")
+    parser.add_argument("--save", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    # Deterministic inputs and no network: routing is stubbed for the broadcast path
+    random.seed(42)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    socket_manager.get_driving_distance = stub_driving_distance
+
+    results = {}
+    for name, factory in build_cases().items():
+        if args.filter not in name:
+            continue
+        func = factory()
+        # The manager logs every broadcast; keep that out of the measurement output
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = time_case(func, args.repeats, args.min_time)
+        r = results[name]
+        print(f"{name:<32}{r['median_us']:>12.1f} us  (min {r['min_us']:.1f}, stdev {r['stdev_us']:.1f}, loops {r['loops']})")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
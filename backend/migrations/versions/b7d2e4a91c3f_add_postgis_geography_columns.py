@@ -0,0 +1,56 @@
+"""Add PostGIS geography columns for destinations and member positions
+
+Revision ID: b7d2e4a91c3f
+Revises: 96c4c0d4cabc
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geography
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4a91c3f'
+down_revision: Union[str, Sequence[str], None] = '96c4c0d4cabc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.add_column('convoy', sa.Column(
+        'destination_geog',
+        Geography(geometry_type='POINT', srid=4326, spatial_index=False),
+        nullable=True
+    ))
+    op.add_column('convoymember', sa.Column(
+        'last_position',
+        Geography(geometry_type='POINT', srid=4326, spatial_index=False),
+        nullable=True
+    ))
+    op.add_column('convoymember', sa.Column('last_position_at', sa.DateTime(), nullable=True))
+
+    # Backfill destinations from the existing float columns.
+    # Member positions only ever lived in memory, so there is nothing to backfill for them.
+    op.execute(
+        "UPDATE convoy "
+        "SET destination_geog = ST_SetSRID(ST_MakePoint(destination_lon, destination_lat), 4326)::geography "
+        "WHERE destination_geog IS NULL"
+    )
+
+    op.create_index('idx_convoy_destination_geog', 'convoy', ['destination_geog'], postgresql_using='gist')
+    op.create_index('idx_convoymember_last_position', 'convoymember', ['last_position'], postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_convoymember_last_position', table_name='convoymember')
+    op.drop_index('idx_convoy_destination_geog', table_name='convoy')
+    op.drop_column('convoymember', 'last_position_at')
+    op.drop_column('convoymember', 'last_position')
+    op.drop_column('convoy', 'destination_geog')
@@ -0,0 +1,50 @@
+"""Add membership lookup and partial status indexes
+
+Revision ID: c41e9a7d2b58
+Revises: b7d2e4a91c3f
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e9a7d2b58'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e4a91c3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        # convoymember's primary key is (convoy_id, user_id), which does not serve lookups by user:
+        # User.convoys loading, /convoys/mine/summary keyset pagination (joined_at DESC, convoy_id DESC)
+        op.create_index(
+            'idx_convoymember_user_joined', 'convoymember', ['user_id', 'joined_at', 'convoy_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Reaper: archive active convoys past their start time
+        op.create_index(
+            'idx_convoy_active_start_time', 'convoy', ['start_time'],
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Reaper: expire guests
+        op.create_index(
+            'idx_user_guest_created_at', 'user', ['created_at'],
+            postgresql_where=sa.text("is_guest"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_user_guest_created_at', table_name='user', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_convoy_active_start_time', table_name='convoy', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_convoymember_user_joined', table_name='convoymember', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,61 @@
+"""In-memory stand-ins for the database in endpoint tests."""
+import uuid
+from datetime import datetime
+
+from app.models.domain import Convoy, User
+
+class Result:
+    """Enough of SQLAlchemy's Result for the convoy endpoints: rows or ORM objects."""
+    def __init__(self, *rows):
+        self.rows = list(rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+class Row:
+    """A result row: columns as attributes and through `row._mapping`."""
+    def __init__(self, **values):
+        self.__dict__.update(values)
+        self._mapping = values
+
+class ScriptedSession:
+    """
+    Answers each execute() with the next scripted Result, and each get() with that
+    Result's first row; any extra query fails the test.
+    """
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        if not self.results:
+            raise AssertionError(f"Unexpected query: {statement}")
+        return self.results.pop(0)
+
+    async def get(self, model, key):
+        self.statements.append((model, key))
+        if not self.results:
+            raise AssertionError(f"Unexpected get: {model.__name__} {key}")
+        return self.results.pop(0).first()
+
+    async def commit(self):
+        self.commits += 1
+
+def make_user(user_id: int, username: str) -> User:
+    return User(id=user_id, username=username, hashed_password="!", created_at=datetime(2030, 1, 1))
+
+def make_convoy(*members: User, invite_code: str = "ABC123") -> Convoy:
+    convoy = Convoy(
+        id=uuid.uuid4(), name="Trip", invite_code=invite_code, destination_name="Tel Aviv",
+        destination_lat=32.08, destination_lon=34.78, start_time=datetime(2030, 1, 1)
+    )
+    convoy.members = list(members)
+    return convoy
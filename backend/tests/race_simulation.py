@@ -1,83 +1,228 @@
+"""
+Load generator for the realtime path.
+
+Bootstraps guest users, creates convoys (first driver leads, the rest join by invite code),
+then drives every member over the websocket at a configurable rate and movement model.
+Reports frame-to-broadcast latency percentiles, message rates and error counts as JSON.
+
+Example:
+    python tests/race_simulation.py --convoys 5 --drivers 20 --rate 1 --duration 60 \\
+        --ramp linear --ramp-seconds 20 --output results.json
+"""
+import argparse
 import asyncio
-import websockets
 import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 import httpx
+import websockets
 
-BASE_URL = "http://127.0.0.1:8000/api/v1"
-WS_URL = "ws://127.0.0.1:8000/ws"
-CONVOY_ID = "43bc56e9-d7aa-4e69-8b55-2ef259c903b1"
 DEST_LAT, DEST_LON = 32.0853, 34.7818
+START_LAT, START_LON = 32.1848, 34.8713
+
+@dataclass
+class Stats:
+    frames_sent: int = 0
+    messages_received: int = 0
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Movement:
+    """Position generators. Every frame yields a unique point so broadcasts can be matched to sends."""
+    def __init__(self, model: str, lat: float, lon: float, step: float = 0.0005):
+        self.model = model
+        self.lat, self.lon = lat, lon
+        self.step = step
+        self.angle = random.uniform(0, 2 * math.pi)
+        self.tick = 0
+
+    def next(self) -> Tuple[float, float]:
+        self.tick += 1
+        if self.model == "linear":
+            # Head towards the destination
+            d_lat, d_lon = DEST_LAT - self.lat, DEST_LON - self.lon
+            norm = math.hypot(d_lat, d_lon) or 1.0
+            self.lat += self.step * d_lat / norm
+            self.lon += self.step * d_lon / norm
+        elif self.model == "circle":
+            self.angle += 0.05
+            self.lat += self.step * math.cos(self.angle)
+            self.lon += self.step * math.sin(self.angle)
+        else:  # random-walk
+            self.lat += random.uniform(-self.step, self.step)
+            self.lon += random.uniform(-self.step, self.step)
+        # Tiny per-tick offset keeps points unique even when the walk revisits a spot
+        return round(self.lat, 7) + self.tick * 1e-9, round(self.lon, 7)
+
+async def bootstrap_driver(client: httpx.AsyncClient, base_url: str) -> Tuple[str, int]:
+    resp = await client.post(f"{base_url}/auth/guest")
+    resp.raise_for_status()
+    token = resp.json()["access_token"]
+    me = await client.get(f"{base_url}/users/me", headers={"Authorization": f"Bearer {token}"})
+    me.raise_for_status()
+    return token, me.json()["id"]
+
+async def bootstrap_convoy(client: httpx.AsyncClient, base_url: str, index: int, drivers: int, stats: Stats) -> Tuple[Optional[str], List[Tuple[str, int]]]:
+    members = []
+    convoy_id = None
+    invite_code = None
+    for n in range(drivers):
+        try:
+            token, user_id = await bootstrap_driver(client, base_url)
+            headers = {"Authorization": f"Bearer {token}"}
+            if n == 0:
+                resp = await client.post(f"{base_url}/convoys/", headers=headers, json={
+                    "name": f"Load Convoy {index}",
+                    "destination_name": "Tel Aviv",
+                    "destination_lat": DEST_LAT,
+                    "destination_lon": DEST_LON,
+                    "start_time": "2030-01-01T08:00:00"
+                })
+                resp.raise_for_status()
+                convoy_id, invite_code = resp.json()["id"], resp.json()["invite_code"]
+            else:
+                resp = await client.post(f"{base_url}/convoys/join", headers=headers, json={"invite_code": invite_code})
+                resp.raise_for_status()
+            members.append((token, user_id))
+        except Exception:
+            stats.error("bootstrap")
+    return convoy_id, members
+
+def ramp_delay(ramp: str, ramp_seconds: float, position: int, total: int) -> float:
+    if ramp == "none" or total <= 1:
+        return 0.0
+    if ramp == "step":
+        # Four equal waves
+        return ramp_seconds * math.floor(4 * position / total) / 4
+    return ramp_seconds * position / total
+
+async def run_driver(ws_url: str, convoy_id: str, token: str, user_id: int, args, start_delay: float, stats: Stats, deadline: float):
+    await asyncio.sleep(start_delay)
+    movement = Movement(
+        args.movement,
+        START_LAT + random.uniform(-0.01, 0.01),
+        START_LON + random.uniform(-0.01, 0.01)
+    )
+    pending: Dict[Tuple[float, float], float] = {}
+    uid = str(user_id)
 
-async def get_auth_token(username, password):
-    async with httpx.AsyncClient() as client:
-        signup_payload = {
-            "username": username,
-            "full_name": f"{username} Driver",
-            "password": password
-        }
-        await client.post(f"{BASE_URL}/users/signup", json=signup_payload)
-
-        login_data = {"username": username, "password": password}
-        response = await client.post(f"{BASE_URL}/auth/token", data=login_data)
-        
-        if response.status_code != 200:
-            print(f"❌ Login failed for {username}: {response.text}")
-            return None
-            
-        return response.json()["access_token"]
-
-async def run_driver(name, password, start_lat, start_lon, speed_lat):
-    token = await get_auth_token(name, password)
-    if not token:
-        return
-
-    uri = f"{WS_URL}/{CONVOY_ID}?token={token}"
-    print(f"🚗 {name} connecting with secure token...")
-    
     try:
-        async with websockets.connect(uri) as websocket:
-            print(f"✅ {name} connected securely!")
-            
-            current_lat = start_lat
-            
-            for i in range(10):
-                current_lat -= speed_lat 
-                
-                payload = {
-                    "lat": current_lat,
-                    "lon": start_lon
-                }
-                
-                await websocket.send(json.dumps(payload))
-                
-                try:
-                    response = await asyncio.wait_for(websocket.recv(), timeout=2.0)
-                    data = json.loads(response)
-                    
+        async with websockets.connect(f"{ws_url}/{convoy_id}?token={token}") as websocket:
+
+            async def reader():
+                async for raw in websocket:
+                    received_at = time.perf_counter()
+                    stats.messages_received += 1
+                    data = json.loads(raw)
                     if data.get("type") == "convoy_update":
-                        members = data.get("members", [])
-                        leader = members[0] if members else None
-                        if leader:
-                             print(f"🏁 Update for {name}: Leader is {leader['user_id']} | Dist: {leader['distance']/1000:.2f} km")
-                except asyncio.TimeoutError:
-                    print(f"⚠️ Timeout waiting for response for {name}")
-
-                await asyncio.sleep(1)
-                
-    except websockets.exceptions.InvalidStatusCode as e:
-        print(f"❌ Connection rejected for {name}: {e.status_code} (Probably Auth Failed)")
-
-async def main():
-    raanana_lat = 32.1848
-    raanana_lon = 34.8713
-    driver1 = run_driver("NoamDriver", "Pass123!", raanana_lat + 0.005, raanana_lon, 0.0005)
-    
-    driver2 = run_driver("AgentDriver", "Pass123!", raanana_lat - 0.005, raanana_lon + 0.002, -0.0005) 
-    
-    await asyncio.gather(driver1, driver2)
+                        mine = next((m for m in data.get("members", []) if m.get("user_id") == uid), None)
+                    elif data.get("type") == "location_update" and data.get("user_id") == uid:
+                        mine = data
+                    else:
+                        continue
+                    if mine:
+                        sent_at = pending.pop((mine["lat"], mine["lon"]), None)
+                        if sent_at is not None:
+                            stats.latencies.append(received_at - sent_at)
+
+            reader_task = asyncio.create_task(reader())
+            interval = 1.0 / args.rate
+            try:
+                while time.perf_counter() < deadline:
+                    lat, lon = movement.next()
+                    pending[(lat, lon)] = time.perf_counter()
+                    try:
+                        await websocket.send(json.dumps({"lat": lat, "lon": lon}))
+                        stats.frames_sent += 1
+                    except Exception:
+                        stats.error("send")
+                        break
+                    await asyncio.sleep(interval)
+                # Give in-flight broadcasts a moment to arrive
+                await asyncio.sleep(args.drain_seconds)
+            finally:
+                reader_task.cancel()
+            stats.errors["unanswered_frames"] = stats.errors.get("unanswered_frames", 0) + len(pending)
+    except Exception:
+        stats.error("connect")
+
+async def main(args) -> dict:
+    stats = Stats()
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        convoys = await asyncio.gather(*[
+            bootstrap_convoy(client, args.base_url, i, args.drivers, stats) for i in range(args.convoys)
+        ])
+
+    drivers = [(cid, token, uid) for cid, members in convoys if cid for token, uid in members]
+    started_at = time.perf_counter()
+    deadline = started_at + args.ramp_seconds * (args.ramp != "none") + args.duration
+    await asyncio.gather(*[
+        run_driver(args.ws_url, cid, token, uid, args, ramp_delay(args.ramp, args.ramp_seconds, i, len(drivers)), stats, deadline)
+        for i, (cid, token, uid) in enumerate(drivers)
+    ])
+    elapsed = time.perf_counter() - started_at
+
+    latencies_ms = [v * 1000 for v in stats.latencies]
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "convoys": sum(1 for cid, _ in convoys if cid),
+        "drivers": len(drivers),
+        "elapsed_seconds": elapsed,
+        "frames_sent": stats.frames_sent,
+        "messages_received": stats.messages_received,
+        "send_rate_per_second": stats.frames_sent / elapsed if elapsed else 0,
+        "receive_rate_per_second": stats.messages_received / elapsed if elapsed else 0,
+        "latency_ms": {
+            "count": len(latencies_ms),
+            "p50": percentile(latencies_ms, 50),
+            "p90": percentile(latencies_ms, 90),
+            "p99": percentile(latencies_ms, 99),
+            "max": max(latencies_ms) if latencies_ms else None
+        },
+        "errors": stats.errors
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WeRide websocket load generator")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--ws-url", default="ws://127.0.0.1:8000/ws")
+    parser.add_argument("--convoys", type=int, default=1)
+    parser.add_argument("--drivers", type=int, default=2, help="Drivers per convoy")
+    parser.add_argument("--rate", type=float, default=1.0, help="Frames per second per driver")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of steady load after ramp-up")
+    parser.add_argument("--movement", choices=["linear", "random-walk", "circle"], default="linear")
+    parser.add_argument("--ramp", choices=["none", "linear", "step"], default="none")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0)
+    parser.add_argument("--drain-seconds", type=float, default=2.0)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    args = parse_args()
     try:
-        asyncio.run(main())
+        results = asyncio.run(main(args))
     except KeyboardInterrupt:
-        print("Race stopped.")
\ No newline at end of file
+        print("Race stopped.")
+        sys.exit(1)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+
+from app.api import deps
+from app.api.deps import resolve_user
+from app.core import auth_cache
+from app.core.auth_cache import TokenCache, UserCache, decode_token
+from app.core.security import create_access_token
+from app.models.domain import User
+
+def make_user(user_id: int = 7, username: str = "driver") -> User:
+    return User(id=user_id, username=username, hashed_password="!", created_at=datetime(2030, 1, 1))
+
+class FakeResult:
+    def __init__(self, user):
+        self.user = user
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.user
+
+class FakeSession:
+    """Records which lookup resolve_user performed."""
+    def __init__(self, user):
+        self.user = user
+        self.gets = []
+        self.executes = 0
+
+    async def get(self, model, user_id):
+        self.gets.append(user_id)
+        return self.user if self.user is not None and self.user.id == user_id else None
+
+    async def execute(self, statement):
+        self.executes += 1
+        return FakeResult(self.user)
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(auth_cache, "token_cache", TokenCache())
+    monkeypatch.setattr(auth_cache, "user_cache", UserCache())
+    monkeypatch.setattr(deps, "user_cache", auth_cache.user_cache)
+
+def test_decode_token_verifies_once_then_serves_from_cache(monkeypatch):
+    token = create_access_token({"sub": "driver", "uid": 7})
+    assert decode_token(token)["uid"] == 7
+
+    def fail(*args, **kwargs):
+        raise AssertionError("signature checked again")
+    monkeypatch.setattr(auth_cache.jwt, "decode", fail)
+    assert decode_token(token)["uid"] == 7
+
+def test_decode_token_rejects_invalid_token():
+    assert decode_token("not-a-jwt") is None
+    assert len(auth_cache.token_cache.entries) == 0
+
+def test_cached_claims_are_not_served_past_exp():
+    token = create_access_token({"sub": "driver", "uid": 7}, expires_delta=timedelta(seconds=60))
+    claims = decode_token(token)
+    # Age the cached entry past its exp without waiting
+    key = next(iter(auth_cache.token_cache.entries))
+    auth_cache.token_cache.entries[key] = (time.time() - 1, claims)
+
+    assert auth_cache.token_cache.get(token) is None
+    assert key not in auth_cache.token_cache.entries
+
+def test_resolve_user_by_uid_uses_primary_key_then_cache():
+    session = FakeSession(make_user())
+    token = create_access_token({"sub": "driver", "uid": 7})
+
+    first = asyncio.run(resolve_user(token, session))
+    second = asyncio.run(resolve_user(token, session))
+
+    assert first.username == second.username == "driver"
+    assert session.gets == [7]
+    assert session.executes == 0
+
+def test_resolve_user_without_uid_falls_back_to_username():
+    session = FakeSession(make_user())
+    token = create_access_token({"sub": "driver"})
+
+    user = asyncio.run(resolve_user(token, session))
+
+    assert user.id == 7
+    assert session.executes == 1
+    assert session.gets == []
+
+def test_resolve_user_misses_return_none():
+    session = FakeSession(None)
+    assert asyncio.run(resolve_user(create_access_token({"sub": "ghost", "uid": 99}), session)) is None
+    assert asyncio.run(resolve_user(create_access_token({"foo": "bar"}), session)) is None
+    assert len(auth_cache.user_cache.entries) == 0
+
+def test_user_cache_returns_copies():
+    cache = UserCache()
+    cache.put(make_user())
+    cache.get(7).username = "changed"
+    assert cache.get(7).username == "driver"
+
+def test_user_cache_is_bounded_lru():
+    cache = UserCache(max_entries=2)
+    cache.put(make_user(1))
+    cache.put(make_user(2))
+    cache.get(1)
+    cache.put(make_user(3))
+    assert list(cache.entries) == [1, 3]
+
+def test_user_cache_sweeps_expired_entries_on_put():
+    cache = UserCache(ttl_seconds=60)
+    cache.put(make_user(1))
+    cache.entries[1] = (time.monotonic() - 1, cache.entries[1][1])
+    cache.put(make_user(2))
+    assert list(cache.entries) == [2]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import math
+import httpx
+import pytest
+
+from app.core import routing, socket_manager
+from app.core.convoy_analytics import EARTH_RADIUS_M, compute_convoy_analytics
+from app.core.socket_manager import ANALYTICS_INTERVAL_SECONDS, ConnectionManager
+
+class Socket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+def member(lat: float, distance=None, lon: float = 34.8) -> dict:
+    data = {"username": "u", "lat": lat, "lon": lon}
+    if distance is not None:
+        data["distance"] = distance
+    return data
+
+def test_spread_gaps_and_stragglers():
+    members = {
+        "tail": member(32.00, 5000.0),
+        "lead": member(32.02, 1000.0),
+        "mid": member(32.01, 1500.0),
+    }
+
+    analytics = compute_convoy_analytics(members, straggler_gap=2000)
+
+    assert analytics["member_count"] == 3
+    assert analytics["centroid"] == {"lat": pytest.approx(32.01), "lon": pytest.approx(34.8)}
+    # 0.01 degrees of latitude either side of the centroid
+    assert analytics["max_distance_from_centroid"] == pytest.approx(EARTH_RADIUS_M * math.radians(0.01))
+    assert analytics["spread"] == 4000.0
+    assert analytics["gaps"] == [
+        {"user_id": "mid", "ahead_user_id": "lead", "gap": 500.0},
+        {"user_id": "tail", "ahead_user_id": "mid", "gap": 3500.0},
+    ]
+    assert analytics["stragglers"] == ["tail"]
+
+def test_unknown_distances_are_left_out_of_the_order():
+    members = {
+        "lead": member(32.02, 1000.0),
+        "tail": member(32.00, 4000.0),
+        "lookup_failed": member(32.01, None),
+        "explicit_none": {**member(32.01), "distance": None},
+    }
+
+    analytics = compute_convoy_analytics(members, straggler_gap=2000)
+
+    assert analytics["member_count"] == 4
+    assert analytics["spread"] == 3000.0
+    assert analytics["gaps"] == [{"user_id": "tail", "ahead_user_id": "lead", "gap": 3000.0}]
+    assert analytics["stragglers"] == ["tail"]
+
+def test_single_and_empty_convoys():
+    single = compute_convoy_analytics({"solo": member(32.0, 1000.0)})
+    assert single["member_count"] == 1
+    assert single["centroid"] == {"lat": 32.0, "lon": 34.8}
+    assert single["max_distance_from_centroid"] == 0.0
+    assert (single["spread"], single["gaps"], single["stragglers"]) == (0.0, [], [])
+
+    empty = compute_convoy_analytics({})
+    assert empty["member_count"] == 0
+    assert empty["centroid"] is None
+    assert empty["gaps"] == []
+
+def test_failed_osrm_lookup_is_unknown_not_arrived(monkeypatch):
+    def osrm(request):
+        return httpx.Response(503)
+    monkeypatch.setattr(routing, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(osrm)))
+    monkeypatch.setattr(socket_manager, "get_driving_distance", routing.get_driving_distance)
+    manager = ConnectionManager()
+    manager.set_destination("c1", 32.08, 34.78)
+    manager.convoy_state["c1"] = {"1": {"username": "driver", "lat": 32.0, "lon": 34.8, "distance": 9000.0}}
+
+    asyncio.run(manager.update_location_and_broadcast("c1", "1", "driver", 32.01, 34.8))
+
+    assert "distance" not in manager.convoy_state["c1"]["1"]
+
+def test_analytics_are_published_at_their_own_cadence(monkeypatch):
+    async def distance(lat1, lon1, lat2, lon2):
+        return 1000.0
+    monkeypatch.setattr(socket_manager, "get_driving_distance", distance)
+    manager = ConnectionManager()
+    manager.set_destination("c1", 32.08, 34.78)
+    socket = Socket()
+    manager.active_connections["c1"] = [socket]
+
+    def analytics_sent():
+        return sum(1 for message in socket.messages if message["type"] == "convoy_analytics")
+
+    async def frames():
+        await manager.update_location_and_broadcast("c1", "1", "driver", 32.0, 34.8)
+        await manager.update_location_and_broadcast("c1", "1", "driver", 32.001, 34.8)
+        assert analytics_sent() == 1
+        # As if the interval had passed since the last publish
+        manager.last_analytics_at["c1"] -= ANALYTICS_INTERVAL_SECONDS
+        await manager.update_location_and_broadcast("c1", "1", "driver", 32.002, 34.8)
+        assert analytics_sent() == 2
+        await manager.publish_analytics("c1", force=True)
+        assert analytics_sent() == 3
+
+    asyncio.run(frames())
+    # Every frame still gets its convoy_update
+    assert sum(1 for message in socket.messages if message["type"] == "convoy_update") == 3
@@ -0,0 +1,45 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.core.convoy_cache import convoy_cache
+from app.core.socket_manager import manager
+from app.main import app
+
+client = TestClient(app)
+
+def cached_convoy(name: str) -> str:
+    convoy_id = str(uuid.uuid4())
+    convoy_cache.set_view(convoy_id, {
+        "id": convoy_id, "name": name, "destination_name": "Tel Aviv", "destination_lat": 32.08,
+        "destination_lon": 34.78, "start_time": None, "invite_code": "ABC123", "status": "active",
+        "share_link": "weride://convoy/join?code=ABC123", "members": []
+    })
+    return convoy_id
+
+def test_batch_returns_cached_convoys_in_request_order_with_live_state(monkeypatch):
+    first, second = cached_convoy("First"), cached_convoy("Second")
+    monkeypatch.setattr(manager, "active_connections", {second: [object(), object()]})
+    monkeypatch.setattr(manager, "convoy_state", {second: {
+        "7": {"username": "lead", "lat": 32.1, "lon": 34.8, "rank": 1},
+        "8": {"username": "tail", "lat": 32.2, "lon": 34.9, "rank": 2},
+    }})
+    monkeypatch.setattr(manager, "last_update_at", {second: 1_800_000_000.0})
+
+    response = client.post("/api/v1/convoys/batch", json={"ids": [second, first, second], "include_live": True})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["name"] for c in data["convoys"]] == ["Second", "First"]
+    live = data["convoys"][0]["live"]
+    assert live["connected"] == 2
+    assert live["online_members"] == 2
+    assert live["leader_username"] == "lead"
+    assert live["last_update_at"].startswith("2027-01-15")
+    assert data["convoys"][1]["live"] is None
+    # Live state is per response; the cached view is not modified
+    assert "live" not in convoy_cache.get_view(second)[0]
+    convoy_cache.clear()
+
+def test_batch_rejects_empty_and_oversized_requests():
+    assert client.post("/api/v1/convoys/batch", json={"ids": []}).status_code == 422
+    ids = [str(uuid.uuid4()) for _ in range(101)]
+    assert client.post("/api/v1/convoys/batch", json={"ids": ids}).status_code == 422
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+
+from app.api import convoys
+from app.core.convoy_cache import ConvoyCache, convoy_cache
+from app.main import app
+from tests.fakes import Result, ScriptedSession, make_convoy, make_user
+
+client = TestClient(app)
+
+def test_my_convoys_etag_revalidates_without_queries(api):
+    user = api.user
+    user.convoys = [make_convoy(user)]
+    api.session = ScriptedSession(Result(user))
+
+    first = client.get("/api/v1/convoys/mine")
+    assert first.status_code == 200
+    assert [c["name"] for c in first.json()] == ["Trip"]
+
+    # Served from the cache: the scripted session has nothing left to answer
+    second = client.get("/api/v1/convoys/mine", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert client.get("/api/v1/convoys/mine", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_join_invalidates_the_convoy_view_and_membership_list(api):
+    other = make_user(2, "leader")
+    convoy = make_convoy(other)
+    convoy_cache.set_view(str(convoy.id), convoys.serialize_convoy(convoy))
+    convoy_cache.set_memberships(api.user.id, [])
+
+    joined = make_convoy(other, api.user)
+    joined.id = convoy.id
+    api.session = ScriptedSession(Result((convoy.id,)), Result(joined))
+    response = client.post("/api/v1/convoys/join", json={"invite_code": "ABC123"})
+
+    assert response.status_code == 200
+    assert convoy_cache.get_memberships(api.user.id) is None
+    payload, etag = convoy_cache.get_view(str(convoy.id))
+    assert {m["id"] for m in payload["members"]} == {1, 2}
+    assert response.headers["ETag"] == etag
+
+def test_rejoin_is_served_from_the_cache(api):
+    convoy = make_convoy(api.user)
+    etag = convoy_cache.set_view(str(convoy.id), convoys.serialize_convoy(convoy))
+
+    response = client.post("/api/v1/convoys/join", json={"invite_code": "ABC123"})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+    assert api.session.statements == []
+
+def test_leave_invalidates_the_convoy_view_and_membership_list(api):
+    convoy = make_convoy(api.user, make_user(2, "leader"))
+    convoy_cache.set_view(str(convoy.id), convoys.serialize_convoy(convoy))
+    convoy_cache.set_memberships(api.user.id, [str(convoy.id)])
+    # Membership deleted, convoy still has a member so it stays
+    api.session = ScriptedSession(Result((api.user.id,)), Result())
+
+    response = client.delete(f"/api/v1/convoys/{convoy.id}")
+
+    assert response.json()["message"] == "Left convoy"
+    assert convoy_cache.get_view(str(convoy.id)) is None
+    assert convoy_cache.get_by_invite_code("ABC123") is None
+    assert convoy_cache.get_memberships(api.user.id) is None
+
+def test_membership_lists_expire_before_views():
+    cache = ConvoyCache(ttl_seconds=30, membership_ttl_seconds=-1)
+    cache.set_view("c1", {"id": "c1", "invite_code": "ABC123", "members": []})
+    cache.set_memberships(1, ["c1"])
+    assert cache.get_memberships(1) is None
+    assert cache.get_view("c1") is not None
@@ -0,0 +1,84 @@
+import base64
+import uuid
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+
+from app.api.convoys import decode_cursor, encode_cursor
+from app.main import app
+from app.models.domain import ConvoyRole
+from tests.fakes import Result, Row, ScriptedSession, make_user
+
+client = TestClient(app)
+
+URL = "/api/v1/convoys/mine/summary"
+NEWEST = datetime(2030, 1, 10)
+
+def summary_row(n: int, status: str = "active") -> Row:
+    return Row(
+        id=uuid.UUID(int=n), name=f"Trip {n}", destination_name="Tel Aviv", status=status,
+        member_count=n, role=ConvoyRole.MEMBER, joined_at=NEWEST - timedelta(days=n)
+    )
+
+def params(statement) -> dict:
+    return statement.compile().params
+
+def test_first_page_returns_limit_items_and_a_cursor(api):
+    rows = [summary_row(n) for n in (1, 2, 3)]
+    api.session = ScriptedSession(Result(*rows))
+
+    body = client.get(f"{URL}?limit=2").json()
+
+    assert [item["name"] for item in body["items"]] == ["Trip 1", "Trip 2"]
+    assert body["items"][0]["members"] is None
+    # One extra row is read to know whether there is a next page
+    assert 3 in params(api.session.statements[0]).values()
+    assert decode_cursor(body["next_cursor"]) == (rows[1].joined_at, rows[1].id)
+
+def test_following_the_cursor_reads_after_it(api):
+    cursor = encode_cursor(NEWEST - timedelta(days=2), uuid.UUID(int=2))
+    api.session = ScriptedSession(Result(summary_row(3)))
+
+    body = client.get(f"{URL}?limit=2&cursor={cursor}").json()
+
+    assert [item["name"] for item in body["items"]] == ["Trip 3"]
+    assert body["next_cursor"] is None
+    bound = params(api.session.statements[0]).values()
+    assert NEWEST - timedelta(days=2) in bound and uuid.UUID(int=2) in bound
+
+def test_invalid_or_tampered_cursor_is_400_without_a_query(api):
+    valid = encode_cursor(NEWEST, uuid.UUID(int=1))
+    tampered = [
+        "not base64!",
+        valid[:-4],
+        base64.urlsafe_b64encode(b"2030-01-10T00:00:00").decode(),
+        base64.urlsafe_b64encode(b"yesterday|" + str(uuid.UUID(int=1)).encode()).decode(),
+        base64.urlsafe_b64encode(b"2030-01-10T00:00:00|not-a-uuid").decode(),
+    ]
+    for cursor in tampered:
+        response = client.get(URL, params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+        assert response.json()["detail"] == "Invalid cursor"
+    assert api.session.statements == []
+
+def test_status_filter_is_applied_in_sql(api):
+    api.session = ScriptedSession(Result(summary_row(1, status="archived")))
+
+    body = client.get(f"{URL}?status=archived").json()
+
+    assert [item["status"] for item in body["items"]] == ["archived"]
+    statement = api.session.statements[0]
+    assert "convoy.status = " in str(statement)
+    assert "archived" in params(statement).values()
+
+def test_include_members_loads_the_page_in_one_query(api):
+    first, second = summary_row(1), summary_row(2)
+    leader = make_user(2, "leader")
+    api.session = ScriptedSession(
+        Result(first, second),
+        Result((first.id, api.user), (first.id, leader), (second.id, api.user))
+    )
+
+    body = client.get(f"{URL}?include_members=true").json()
+
+    assert [[m["username"] for m in item["members"]] for item in body["items"]] == [["driver", "leader"], ["driver"]]
+    assert len(api.session.statements) == 2
@@ -0,0 +1,74 @@
+import uuid
+from fastapi.testclient import TestClient
+
+from app.api import convoys
+from app.core.convoy_cache import convoy_cache
+from app.main import app
+from tests.fakes import Result, ScriptedSession, make_convoy, make_user
+
+client = TestClient(app)
+
+NEW_CONVOY = {"name": "Trip", "destination_name": "Tel Aviv", "destination_lat": 32.08, "destination_lon": 34.78}
+
+def insert_codes(session: ScriptedSession) -> list:
+    return [s.compile().params["invite_code"] for s in session.statements if "invite_code" in s.compile().params]
+
+def test_create_retries_invite_code_collisions(api, monkeypatch):
+    codes = iter(["TAKEN1", "FRESH2"])
+    monkeypatch.setattr(convoys, "generate_invite_code", lambda: next(codes))
+    # First insert hits ON CONFLICT DO NOTHING, second returns the id, then the leader row
+    api.session = ScriptedSession(Result(), Result((uuid.uuid4(),)), Result())
+
+    response = client.post("/api/v1/convoys/", json=NEW_CONVOY)
+
+    assert response.status_code == 200
+    assert response.json()["invite_code"] == "FRESH2"
+    assert insert_codes(api.session) == ["TAKEN1", "FRESH2"]
+    assert api.session.commits == 1
+
+def test_create_gives_up_after_invite_code_attempts(api):
+    api.session = ScriptedSession(*[Result() for _ in range(convoys.INVITE_CODE_ATTEMPTS)])
+
+    response = client.post("/api/v1/convoys/", json=NEW_CONVOY)
+
+    assert response.status_code == 503
+    assert len(api.session.statements) == convoys.INVITE_CODE_ATTEMPTS
+    assert api.session.commits == 0
+
+def test_join_is_idempotent_for_existing_members(api, monkeypatch):
+    scheduled = []
+
+    async def record_prefetch(*args):
+        scheduled.append(args)
+    monkeypatch.setattr(convoys, "schedule_route_prefetch", record_prefetch)
+    convoy = make_convoy(make_user(2, "leader"), api.user)
+    convoy_cache.set_memberships(api.user.id, [str(convoy.id)])
+    # The view is not cached, so the insert runs and hits ON CONFLICT DO NOTHING
+    api.session = ScriptedSession(Result(), Result(convoy))
+
+    response = client.post("/api/v1/convoys/join", json={"invite_code": "ABC123"})
+
+    assert response.status_code == 200
+    assert {m["id"] for m in response.json()["members"]} == {1, 2}
+    # Nothing changed: the membership list stays cached and no prefetch is scheduled
+    assert convoy_cache.get_memberships(api.user.id) == [str(convoy.id)]
+    assert scheduled == []
+
+def test_join_unknown_invite_code_is_404(api):
+    api.session = ScriptedSession(Result(), Result())
+    assert client.post("/api/v1/convoys/join", json={"invite_code": "NOPE00"}).status_code == 404
+
+def test_last_member_leaving_deletes_the_convoy(api):
+    convoy_id = uuid.uuid4()
+    api.session = ScriptedSession(Result((api.user.id,)), Result((convoy_id,)))
+
+    response = client.delete(f"/api/v1/convoys/{convoy_id}")
+
+    assert response.json()["message"] == "Convoy deleted as it became empty"
+    assert "DELETE FROM convoy " in str(api.session.statements[1])
+    assert api.session.commits == 1
+
+def test_leaving_a_convoy_you_are_not_in_is_404(api):
+    api.session = ScriptedSession(Result())
+    assert client.delete(f"/api/v1/convoys/{uuid.uuid4()}").status_code == 404
+    assert api.session.commits == 0
@@ -0,0 +1,77 @@
+import asyncio
+import contextlib
+from app.core import route_prefetch
+from app.core.jobs import JobQueue
+from app.core.route_prefetch import PrefetchedRoutes
+from app.core.routing import get_cached_route, route_cache, store_route
+
+def test_duplicate_job_ids_are_queued_once():
+    queue = JobQueue()
+    calls = []
+
+    @queue.register
+    async def record(value):
+        calls.append(value)
+
+    async def scenario():
+        assert await queue.enqueue_job("record", 1, _job_id="same")
+        assert not await queue.enqueue_job("record", 2, _job_id="same")
+        assert await queue.run_pending() == 1
+        # Finished jobs can be scheduled again
+        assert await queue.enqueue_job("record", 3, _job_id="same")
+        await queue.run_pending()
+
+    asyncio.run(scenario())
+    assert calls == [1, 3]
+    assert queue.metrics.deduplicated == 1
+
+def test_prefetch_stores_route_for_member_and_convoy(monkeypatch):
+    route_cache.clear()
+    monkeypatch.setattr(route_prefetch, "prefetched_routes", PrefetchedRoutes())
+    monkeypatch.setattr(route_prefetch.manager, "convoy_state", {"c1": {"7": {"lat": 32.18, "lon": 34.87}}})
+    calls = []
+
+    async def fake_route_geometry(lat1, lon1, lat2, lon2):
+        calls.append((lat1, lon1))
+        route = {"route": [{"latitude": lat1, "longitude": lon1}], "duration": 1.0, "distance": 1.0, "steps": []}
+        store_route(lat1, lon1, lat2, lon2, route)
+        return route
+
+    monkeypatch.setattr(route_prefetch, "get_route_geometry", fake_route_geometry)
+    asyncio.run(route_prefetch.prefetch_route("c1", 7, 32.08, 34.78))
+    asyncio.run(route_prefetch.prefetch_route("c1", 7, 32.08, 34.78))
+
+    assert calls == [(32.18, 34.87)]
+    assert get_cached_route(32.18, 34.87, 32.08, 34.78) is not None
+    # ~150m from the prefetch origin: a different rounded origin, but the same member and convoy
+    assert route_prefetch.prefetched_routes.get("c1", 7, 32.08, 34.78, 32.1813, 34.8708) is not None
+    route_cache.clear()
+
+def test_prefetched_routes_miss_after_drift_and_report_hit_rate():
+    routes = PrefetchedRoutes(max_drift_m=300)
+    route = {"route": [{"latitude": 32.18, "longitude": 34.87}]}
+    routes.put("c1", 7, 32.08, 34.78, (32.18, 34.87), route)
+
+    assert routes.get("c1", 7, 32.08, 34.78, 32.181, 34.87) is route
+    # Drove ~1.1km since the prefetch: the route no longer starts where the member is
+    assert routes.get("c1", 7, 32.08, 34.78, 32.19, 34.87) is None
+    # Other member, other convoy
+    assert routes.get("c1", 8, 32.08, 34.78, 32.18, 34.87) is None
+    assert routes.get("c2", 7, 32.08, 34.78, 32.18, 34.87) is None
+    assert routes.stats() == {"entries": 1, "hits": 1, "misses": 3, "hit_rate": 0.25}
+
+def test_stored_position_ignores_stale_flushes(monkeypatch):
+    captured = {}
+
+    class FakeSession:
+        async def execute(self, statement):
+            captured["sql"] = str(statement)
+            return type("Result", (), {"first": lambda self: None})()
+
+    @contextlib.asynccontextmanager
+    async def fake_read_session():
+        yield FakeSession()
+
+    monkeypatch.setattr(route_prefetch, "read_session", fake_read_session)
+    assert asyncio.run(route_prefetch.stored_position(7)) is None
+    assert "last_position_at >=" in captured["sql"]
@@ -0,0 +1,69 @@
+from contextlib import asynccontextmanager
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import websockets
+from app.api.websockets import parse_location_frame
+from app.core import socket_manager
+from app.core.position_store import position_writer
+from app.core.profiling import profiler
+from app.core.route_tracker import route_tracker
+from app.core.socket_manager import manager
+from app.main import app
+from benchmarks.run import stub_driving_distance
+
+def test_valid_frame_is_parsed():
+    assert parse_location_frame('{"lat": 32.08, "lon": 34.78, "eta": 120}') == (32.08, 34.78, 120.0)
+    assert parse_location_frame('{"lat": 32, "lon": 34}') == (32.0, 34.0, None)
+
+def test_malformed_frames_are_dropped():
+    for raw in [
+        "not json",
+        "[32.0, 34.0]",
+        '{"lat": "32.0", "lon": 34.0}',
+        '{"lat": true, "lon": 34.0}',
+        '{"lat": 91, "lon": 34.0}',
+        '{"lat": 32.0, "lon": -181}',
+        '{"lat": 32.0}',
+        '{"lat": 32.0, "lon": 34.0, "eta": -5}',
+        '{"lat": NaN, "lon": 34.0}',
+    ]:
+        assert parse_location_frame(raw) is None, raw
+
+@pytest.fixture
+def frame_socket(api, monkeypatch):
+    """A member connected to convoy c1 over the real websocket endpoint, with routing stubbed."""
+    async def user_for_token(token, session):
+        return api.user
+    monkeypatch.setattr(websockets, "get_user_from_token", user_for_token)
+    monkeypatch.setattr(socket_manager, "get_driving_distance", stub_driving_distance)
+    monkeypatch.setattr(route_tracker, "check", lambda *args: None)
+    monkeypatch.setattr(position_writer, "record", lambda *args: None)
+    monkeypatch.setitem(manager.convoy_destinations, "c1", {"lat": 32.08, "lon": 34.78})
+    with TestClient(app).websocket_connect("/ws/c1?token=t") as ws:
+        yield ws
+
+def test_frames_skip_the_profiler_when_it_is_disabled(frame_socket, monkeypatch):
+    def fail(name):
+        raise AssertionError("profile() entered while profiling is disabled")
+    monkeypatch.setattr(profiler, "enabled", False)
+    monkeypatch.setattr(profiler, "profile", fail)
+
+    frame_socket.send_text('{"lat": 32.1, "lon": 34.8}')
+
+    assert frame_socket.receive_json()["type"] == "convoy_update"
+
+def test_frames_are_profiled_when_enabled(frame_socket, monkeypatch):
+    profiled = []
+
+    @asynccontextmanager
+    async def record(name):
+        profiled.append(name)
+        yield
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "profile", record)
+
+    frame_socket.send_text('{"lat": 32.1, "lon": 34.8}')
+
+    assert frame_socket.receive_json()["type"] == "convoy_update"
+    assert profiled == ["ws frame"]
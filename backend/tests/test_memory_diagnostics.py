@@ -0,0 +1,25 @@
+from app.core.memory_diagnostics import deep_sizeof, leak_suspects, memory_report, tracemalloc_session
+from app.core.socket_manager import manager
+
+def test_deep_sizeof_counts_nested_values_once():
+    shared = "x" * 1000
+    assert deep_sizeof({"a": shared, "b": shared}) < deep_sizeof({"a": shared, "b": "y" * 1000})
+    assert deep_sizeof({"state": {"lat": 1.0}}) > deep_sizeof({})
+
+def test_orphaned_convoy_state_is_reported(monkeypatch):
+    monkeypatch.setattr(manager, "active_connections", {})
+    monkeypatch.setattr(manager, "convoy_state", {"c1": {"1": {"lat": 32.0, "lon": 34.0}}})
+
+    assert leak_suspects()["orphaned_state"] == ["c1"]
+    report = memory_report()
+    assert report["convoys"]["c1"]["convoy_state"] > 0
+
+def test_tracemalloc_diff_sees_new_allocations():
+    tracemalloc_session.start()
+    try:
+        retained = [bytearray(1024) for _ in range(1000)]
+        diff = tracemalloc_session.diff(limit=5)
+        assert diff["top"][0]["size_diff"] >= 1024 * 1000
+        assert retained
+    finally:
+        tracemalloc_session.stop()
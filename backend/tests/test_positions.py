@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.position_store import PositionWriter, position_writer
+from app.core.socket_manager import manager
+from app.main import app
+from app.models.domain import ConvoyMember
+from tests.fakes import Result, Row, ScriptedSession
+
+client = TestClient(app)
+
+CONVOY = str(uuid.uuid4())
+
+class WriteSession:
+    """Records the UPDATE batches; `fail` makes the next execute raise."""
+    def __init__(self, fail: bool = False, during_execute=None):
+        self.batches = []
+        self.commits = 0
+        self.fail = fail
+        self.during_execute = during_execute
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        if self.during_execute:
+            self.during_execute()
+        if self.fail:
+            raise ConnectionError("database went away")
+        self.batches.append(rows)
+
+    async def commit(self):
+        self.commits += 1
+
+def test_latest_position_per_member_wins():
+    session = WriteSession()
+    writer = PositionWriter(session_factory=session)
+    writer.record(CONVOY, 1, 32.0, 34.8)
+    writer.record(CONVOY, 1, 32.1, 34.9)
+    writer.record(CONVOY, 2, 31.0, 35.0)
+    writer.record("not-a-uuid", 3, 30.0, 34.0)
+
+    assert asyncio.run(writer.flush()) == 2
+
+    rows = {row["user_id"]: (row["lat"], row["lon"]) for row in session.batches[0]}
+    assert rows == {1: (32.1, 34.9), 2: (31.0, 35.0)}
+    assert session.commits == 1
+    assert writer.pending == {}
+    assert asyncio.run(writer.flush()) == 0
+
+def test_failed_flush_keeps_the_batch_for_the_next_one():
+    writer = PositionWriter()
+    # A frame for member 1 lands while the failing flush is in flight
+    session = WriteSession(fail=True, during_execute=lambda: writer.record(CONVOY, 1, 32.5, 34.5))
+    writer.session_factory = session
+    writer.record(CONVOY, 1, 32.0, 34.8)
+    writer.record(CONVOY, 2, 31.0, 35.0)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(writer.flush())
+
+    key = uuid.UUID(CONVOY)
+    assert set(writer.pending) == {(key, 1), (key, 2)}
+    # Newer than the failed batch, so it is kept over the retried point
+    assert writer.pending[(key, 1)][:2] == (32.5, 34.5)
+
+    writer.session_factory = WriteSession()
+    assert asyncio.run(writer.flush()) == 2
+
+def test_pending_positions_are_flushed_on_shutdown(monkeypatch):
+    session = WriteSession()
+    monkeypatch.setattr(position_writer, "session_factory", session)
+    monkeypatch.setattr(position_writer, "pending", {})
+    monkeypatch.setattr(main, "STARTUP_WARMUP_ENABLED", False)
+    monkeypatch.setattr(main, "REAPER_ENABLED", False)
+
+    async def serve_then_stop():
+        async with main.lifespan(app):
+            position_writer.record(CONVOY, 1, 32.0, 34.8)
+
+    asyncio.run(serve_then_stop())
+
+    assert [row["user_id"] for row in session.batches[0]] == [1]
+    assert position_writer.pending == {}
+
+def test_nearby_convoys_validates_radius_and_maps_rows(api):
+    assert client.get("/api/v1/convoys/nearby?lat=32&lon=34.8&radius_km=0").status_code == 422
+    assert client.get("/api/v1/convoys/nearby?lat=32&lon=34.8&radius_km=201").status_code == 422
+
+    convoy_id = uuid.uuid4()
+    api.session = ScriptedSession(Result(Row(
+        id=convoy_id, name="Trip", destination_name="Tel Aviv", destination_lat=32.08,
+        destination_lon=34.78, status="active", distance_m=1234.5
+    )))
+    response = client.get("/api/v1/convoys/nearby?lat=32&lon=34.8&radius_km=5")
+
+    assert response.json() == [{
+        "id": str(convoy_id), "name": "Trip", "destination_name": "Tel Aviv", "destination_lat": 32.08,
+        "destination_lon": 34.78, "status": "active", "distance_m": 1234.5
+    }]
+
+def test_nearby_live_convoys_come_from_the_grid(api, monkeypatch):
+    monkeypatch.setattr(manager, "nearby_convoys", lambda lat, lon, radius_m: [{"radius_m": radius_m}])
+    assert client.get("/api/v1/convoys/nearby/live?lat=32&lon=34.8&radius_km=51").status_code == 422
+    assert client.get("/api/v1/convoys/nearby/live?lat=32&lon=34.8&radius_km=3").json() == [{"radius_m": 3000}]
+
+def test_nearby_members_is_for_members_only_and_maps_rows(api):
+    convoy_id = uuid.uuid4()
+    url = f"/api/v1/convoys/{convoy_id}/members/nearby?lat=32&lon=34.8"
+    assert client.get(url + "&radius_km=-1").status_code == 422
+
+    api.session = ScriptedSession(Result())
+    assert client.get(url).status_code == 403
+    assert len(api.session.statements) == 1
+
+    seen_at = datetime(2030, 1, 1, 12, 0)
+    api.session = ScriptedSession(
+        Result(ConvoyMember(convoy_id=convoy_id, user_id=1)),
+        Result(Row(user_id=2, username="tail", lat=32.001, lon=34.8, distance_m=111.2, last_position_at=seen_at))
+    )
+    response = client.get(url + "&radius_km=1")
+
+    assert response.json() == [{
+        "user_id": 2, "username": "tail", "lat": 32.001, "lon": 34.8,
+        "distance_m": 111.2, "last_position_at": "2030-01-01T12:00:00"
+    }]
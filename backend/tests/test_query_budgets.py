@@ -0,0 +1,91 @@
+"""
+Per-endpoint query budgets for the hot convoy endpoints, against a real Postgres
+(see tests/postgres.py): the endpoints run their real SQL through an instrumented
+engine, so an N+1 or a lost batch load fails here before it reaches production.
+"""
+import asyncio
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.convoy_cache import convoy_cache
+from app.core.database import get_read_session, get_session
+from app.core.query_stats import assert_query_budget, instrument_engine
+from app.main import app
+from tests.fakes import make_user
+from tests.postgres import PLAN_TEST_DATABASE_URL, make_engine, new_schema_name, requires_postgres, temporary_schema
+
+pytestmark = requires_postgres
+
+SCHEMA = new_schema_name("budget_test")
+CONVOYS = 3
+
+SEED_SQL = [
+    "INSERT INTO \"user\" (id, username, hashed_password, is_guest, created_at) "
+    "SELECT n, 'user' || n, '!', false, now() FROM generate_series(1, 10) n",
+    "INSERT INTO convoy (id, name, invite_code, destination_name, destination_lat, destination_lon, start_time, status) "
+    f"SELECT md5(n::text)::uuid, 'Convoy ' || n, 'C' || n, 'Tel Aviv', 32.08, 34.78, now(), 'active' "
+    f"FROM generate_series(1, {CONVOYS}) n",
+    # Users 1-4 are in every convoy, so the member loads have real work to do
+    "INSERT INTO convoymember (convoy_id, user_id, role, joined_at) "
+    f"SELECT md5(c::text)::uuid, u, 'MEMBER', now() - (c || ' minutes')::interval "
+    f"FROM generate_series(1, {CONVOYS}) c, generate_series(1, 4) u",
+]
+
+engine = make_engine(SCHEMA) if PLAN_TEST_DATABASE_URL else None
+
+@pytest.fixture(scope="module", autouse=True)
+def budget_schema():
+    yield from temporary_schema(SCHEMA, SEED_SQL)
+
+@pytest.fixture
+def db_api(api):
+    """The `api` fixture, with the endpoints talking to the test schema."""
+    instrument_engine(engine)
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_read_session] = session_override
+    return api
+
+def request(method: str, url: str, max_queries: int, **kwargs) -> httpx.Response:
+    """Call the app in this thread, so the query counter sees the endpoint's statements."""
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            with assert_query_budget(max_queries) as stats:
+                response = await client.request(method, url, **kwargs)
+        assert stats.count > 0
+        return response
+
+    response = asyncio.run(run())
+    assert response.status_code == 200, response.text
+    return response
+
+def test_my_convoys_budget(db_api):
+    # The user, their convoys, then every member of those convoys in one IN query
+    response = request("GET", "/api/v1/convoys/mine", max_queries=3)
+    assert len(response.json()) == CONVOYS
+
+def test_summary_budget(db_api):
+    first = request("GET", "/api/v1/convoys/mine/summary?limit=2", max_queries=1)
+    request("GET", f"/api/v1/convoys/mine/summary?limit=2&cursor={first.json()['next_cursor']}", max_queries=1)
+    # Members for the whole page come from one extra query
+    page = request("GET", f"/api/v1/convoys/mine/summary?limit={CONVOYS}&include_members=true", max_queries=2)
+    assert all(len(item["members"]) == 4 for item in page.json()["items"])
+
+def test_join_budget(db_api):
+    db_api.user = make_user(5, "user5")
+    # Insert-from-select, the convoy, its members
+    response = request("POST", "/api/v1/convoys/join", max_queries=3, json={"invite_code": "C1"})
+    assert 5 in {member["id"] for member in response.json()["members"]}
+
+def test_batch_budget(db_api):
+    ids = [str(convoy["id"]) for convoy in request("GET", "/api/v1/convoys/mine", max_queries=3).json()]
+    convoy_cache.clear()
+    # However many ids: one convoy query and one member query
+    response = request("POST", "/api/v1/convoys/batch", max_queries=2, json={"ids": ids})
+    assert len(response.json()["convoys"]) == CONVOYS
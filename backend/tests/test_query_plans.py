@@ -0,0 +1,145 @@
+"""
+Query-plan regression tests for the hot queries (see tests/postgres.py for the database).
+
+Every test plans the statement built by the same function the endpoint or job uses
+(app/core/convoy_queries.py, app/core/reaper.py); ORM loads are executed and each
+statement they emit is planned. Sequential scans are disabled while planning, so a
+Seq Scan in the plan means no index can serve the query at all.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.convoy_queries import convoy_summary_query, delete_convoy_if_empty_query, my_convoys_query
+from app.core.reaper import expired_guests_query, inactive_convoys_query
+from tests.postgres import make_engine as make_schema_engine, new_schema_name, requires_postgres, temporary_schema
+
+pytestmark = requires_postgres
+
+SCHEMA = new_schema_name("plan_test")
+CUTOFF = datetime(2020, 1, 1)
+HEAVY_USER = 42
+
+SEED_SQL = [
+    "INSERT INTO \"user\" (username, hashed_password, is_guest, created_at) "
+    "SELECT 'user' || n, '!', n % 4 = 0, now() - (n || ' minutes')::interval FROM generate_series(1, 5000) n",
+    "INSERT INTO convoy (id, name, invite_code, destination_name, destination_lat, destination_lon, start_time, status) "
+    "SELECT md5(n::text)::uuid, 'Convoy ' || n, 'C' || n, 'Tel Aviv', 32.08, 34.78, now() - (n || ' hours')::interval, "
+    "CASE WHEN n % 3 = 0 THEN 'archived' ELSE 'active' END FROM generate_series(1, 2000) n",
+    "INSERT INTO convoymember (convoy_id, user_id, role, joined_at, last_position_at) "
+    "SELECT md5(((n % 2000) + 1)::text)::uuid, n, 'MEMBER', now() - (n || ' seconds')::interval, "
+    "now() - (n || ' seconds')::interval FROM generate_series(1, 5000) n",
+    # A long-time member: keyset paging matters for users with a long history
+    f"INSERT INTO convoymember (convoy_id, user_id, role, joined_at) "
+    f"SELECT md5(n::text)::uuid, {HEAVY_USER}, 'MEMBER', now() - (n || ' minutes')::interval "
+    f"FROM generate_series(1, 1500) n ON CONFLICT DO NOTHING",
+]
+
+def make_engine():
+    return make_schema_engine(SCHEMA)
+
+@pytest.fixture(scope="module", autouse=True)
+def plan_schema():
+    yield from temporary_schema(SCHEMA, SEED_SQL)
+
+def explain(statement) -> dict:
+    """Plan a Core statement (no ORM loading), with its parameters inlined."""
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    async def run():
+        engine = make_engine()
+        async with engine.connect() as conn:
+            await conn.execute(text("SET enable_seqscan = off"))
+            plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+        await engine.dispose()
+        return plan[0]["Plan"]
+
+    return asyncio.run(run())
+
+def explain_orm(statement) -> List[dict]:
+    """
+    Execute an ORM statement and plan every SQL statement it emitted (e.g. the
+    extra SELECTs of selectinload), with the parameters it actually sent.
+    """
+    async def run():
+        engine = make_engine()
+        emitted = []
+
+        def capture(conn, cursor, sql, parameters, context, executemany):
+            emitted.append((sql, parameters))
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+
+        async with AsyncSession(engine) as session:
+            await session.execute(statement)
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        plans = []
+        async with engine.connect() as conn:
+            await conn.execute(text("SET enable_seqscan = off"))
+            for sql, parameters in emitted:
+                result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters)
+                plans.append(result.scalar()[0]["Plan"])
+        await engine.dispose()
+        return plans
+
+    return asyncio.run(run())
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+def seq_scans(plan: dict) -> set:
+    return {node.get("Relation Name") for node in plan_nodes(plan) if node["Node Type"] == "Seq Scan"}
+
+def used_indexes(plan: dict) -> set:
+    return {node["Index Name"] for node in plan_nodes(plan) if "Index Name" in node}
+
+def node_types(plan: dict) -> set:
+    return {node["Node Type"] for node in plan_nodes(plan)}
+
+def test_my_convoys_load_uses_user_index():
+    user_plan, convoys_plan, *members_plans = explain_orm(my_convoys_query(HEAVY_USER))
+    # User by primary key, their convoys through the membership table, then the members
+    # of those convoys (selectinload sends one IN query per 500 convoys)
+    assert "user_pkey" in used_indexes(user_plan)
+    assert "idx_convoymember_user_joined" in used_indexes(convoys_plan)
+    assert members_plans
+    for plan in members_plans:
+        assert "convoymember_pkey" in used_indexes(plan)
+    for plan in [user_plan, convoys_plan, *members_plans]:
+        assert not seq_scans(plan)
+
+def test_summary_first_page_is_read_in_index_order():
+    plan = explain(convoy_summary_query(HEAVY_USER, limit=21))
+    assert not seq_scans(plan)
+    assert "idx_convoymember_user_joined" in used_indexes(plan)
+    # The correlated member count is answered from the primary key
+    assert "convoymember_pkey" in used_indexes(plan)
+    # (joined_at, convoy_id) DESC comes straight off the index
+    assert "Sort" not in node_types(plan)
+
+def test_summary_keyset_page_is_read_in_index_order():
+    plan = explain(convoy_summary_query(HEAVY_USER, limit=21, cursor=(datetime(2030, 1, 1), uuid.UUID(int=0))))
+    assert not seq_scans(plan)
+    assert "idx_convoymember_user_joined" in used_indexes(plan)
+    assert "Sort" not in node_types(plan)
+
+def test_leave_empty_convoy_check_uses_primary_keys():
+    plan = explain(delete_convoy_if_empty_query(uuid.UUID(int=1)))
+    assert not seq_scans(plan)
+    assert {"convoy_pkey", "convoymember_pkey"} <= used_indexes(plan)
+
+def test_reaper_archive_scan_uses_partial_index():
+    plan = explain(inactive_convoys_query(CUTOFF, [], 500))
+    assert not seq_scans(plan)
+    assert "idx_convoy_active_start_time" in used_indexes(plan)
+
+def test_guest_expiry_scan_uses_partial_index():
+    plan = explain(expired_guests_query(CUTOFF, [], 500))
+    assert not seq_scans(plan)
+    assert "idx_user_guest_created_at" in used_indexes(plan)
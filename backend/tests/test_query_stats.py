@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.core.query_stats import assert_query_budget, instrument_engine, track_queries
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+
+def test_counts_queries_inside_tracking_context():
+    with engine.connect() as conn:
+        with track_queries() as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+
+    assert stats.count == 2
+    assert stats.duration >= 0
+
+def test_query_budget_fails_when_exceeded():
+    with engine.connect() as conn:
+        with pytest.raises(AssertionError, match="Query budget exceeded"):
+            with assert_query_budget(1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+def test_failed_statements_are_counted_and_leave_no_start_time():
+    with engine.connect() as conn:
+        with track_queries() as stats:
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+        assert conn.info.get("query_start_time") == []
+
+    assert stats.count == 4
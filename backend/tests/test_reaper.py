@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import uuid
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.api.deps import require_admin
+from app.core import reaper
+from app.main import app
+from app.core.reaper import ReaperMetrics
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+    def scalar(self):
+        return self.values
+
+class FakeSession:
+    """Answers each SELECT with the next batch of ids and records every statement."""
+    def __init__(self, batches, executed):
+        self.batches = batches
+        self.executed = executed
+
+    async def execute(self, statement, params=None):
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.executed.append(sql)
+        if sql.startswith("SELECT"):
+            return FakeResult(self.batches.pop(0) if self.batches else [])
+        return FakeResult(None)
+
+    async def commit(self):
+        self.executed.append("COMMIT")
+
+@pytest.fixture
+def db(monkeypatch):
+    state = {"batches": [], "executed": []}
+
+    @contextlib.asynccontextmanager
+    async def fake_async_session():
+        yield FakeSession(state["batches"], state["executed"])
+
+    monkeypatch.setattr(reaper, "async_session", fake_async_session)
+    monkeypatch.setattr(reaper, "reaper_metrics", ReaperMetrics())
+    monkeypatch.setattr(reaper.manager, "convoy_state", {})
+    monkeypatch.setattr(reaper.manager, "active_connections", {})
+    return state
+
+def test_delete_expired_guests_runs_in_batches_and_invalidates_caches(db, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(reaper.user_cache, "invalidate", invalidated.append)
+    monkeypatch.setattr(reaper.manager, "convoy_state", {"c1": {"5": {}}})
+    db["batches"] += [[1, 2], [3]]
+
+    assert asyncio.run(reaper.delete_expired_guests(batch_size=2)) == 3
+
+    selects = [sql for sql in db["executed"] if sql.startswith("SELECT")]
+    deletes = [sql for sql in db["executed"] if sql.startswith("DELETE")]
+    # A short batch ends the run without another SELECT
+    assert len(selects) == 2
+    assert "NOT IN" in selects[0]
+    assert "last_position_at >=" in selects[0]
+    # Memberships go before the users, in each batch's own transaction
+    assert [sql.split()[2] for sql in deletes] == ["convoymember", '"user"'] * 2
+    assert db["executed"].count("COMMIT") == 2
+    assert invalidated == [1, 2, 3]
+    assert reaper.reaper_metrics.guests_deleted == 3
+
+def test_delete_empty_convoys_stops_on_empty_batch(db, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(reaper.convoy_cache, "invalidate_convoy", invalidated.append)
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    db["batches"] += [ids]
+
+    assert asyncio.run(reaper.delete_empty_convoys(batch_size=2)) == 2
+
+    assert sum(sql.startswith("DELETE FROM convoy ") for sql in db["executed"]) == 1
+    # Full batch, so one more SELECT found nothing
+    assert sum(sql.startswith("SELECT") for sql in db["executed"]) == 2
+    assert invalidated == [str(i) for i in ids]
+    assert reaper.reaper_metrics.convoys_deleted == 2
+
+def test_archive_inactive_convoys_updates_status(db):
+    db["batches"] += [[uuid.uuid4()]]
+
+    assert asyncio.run(reaper.archive_inactive_convoys(batch_size=10)) == 1
+
+    updates = [sql for sql in db["executed"] if sql.startswith("UPDATE")]
+    assert len(updates) == 1 and "SET status" in updates[0]
+    assert reaper.reaper_metrics.convoys_archived == 1
+
+def test_inactive_convoys_query_uses_latest_member_activity():
+    sql = str(reaper.inactive_convoys_query(datetime(2030, 1, 1), [], 500).compile(dialect=postgresql.dialect()))
+    assert "max(convoymember.last_position_at)" in sql
+    assert "coalesce(" in sql
+    # The start_time bound keeps the partial index usable and future convoys untouched
+    assert "convoy.start_time <" in sql
+
+def test_run_reaper_once_skips_when_another_worker_holds_the_lock(db, monkeypatch):
+    executed = []
+
+    class FakeConnection:
+        async def execute(self, statement, params=None):
+            executed.append(str(statement))
+            return FakeResult(False)
+
+        async def commit(self):
+            pass
+
+    class FakeEngine:
+        @contextlib.asynccontextmanager
+        async def connect(self):
+            yield FakeConnection()
+
+    monkeypatch.setattr(reaper, "engine", FakeEngine())
+
+    assert asyncio.run(reaper.run_reaper_once()) is False
+    assert executed == ["SELECT pg_try_advisory_lock(:key)"]
+    assert db["executed"] == []
+    assert reaper.reaper_metrics.skipped_locked == 1
+
+def test_admin_endpoint_reports_reaper_metrics(monkeypatch):
+    monkeypatch.setattr(reaper.reaper_metrics, "runs", 3)
+    monkeypatch.setattr(reaper.reaper_metrics, "skipped_locked", 2)
+    monkeypatch.setattr(reaper.reaper_metrics, "guests_deleted", 7)
+    app.dependency_overrides[require_admin] = lambda: None
+    try:
+        body = TestClient(app).get("/api/v1/admin/reaper").json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert body["enabled"] == reaper.REAPER_ENABLED
+    assert (body["runs"], body["skipped_locked"], body["guests_deleted"]) == (3, 2, 7)
+    assert "last_duration_seconds" in body
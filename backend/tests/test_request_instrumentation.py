@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import SamplingProfiler
+from app.core.request_instrumentation import RequestInstrumentationMiddleware
+from app.core.tracing import tracer
+from tests.test_tracing import enable_tracing
+
+def make_client(**options) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(RequestInstrumentationMiddleware, **options)
+    return TestClient(app)
+
+def test_everything_off_passes_requests_through(monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", False)
+    response = make_client(db_debug_headers=False).get("/items/1")
+    assert response.json() == {"id": 1}
+    assert "X-DB-Query-Count" not in response.headers
+
+def test_db_debug_headers(monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", False)
+    response = make_client(db_debug_headers=True).get("/items/1")
+    assert response.headers["X-DB-Query-Count"] == "0"
+    assert "X-DB-Time-Ms" in response.headers
+
+def test_request_span_carries_route_and_status(monkeypatch):
+    exporter = enable_tracing(monkeypatch)
+    make_client(db_debug_headers=False).get("/items/1")
+
+    span = next(span for span in exporter.spans if span.name == "http GET")
+    assert span.attributes["http.target"] == "/items/1"
+    assert span.attributes["http.route"] == "/items/{item_id}"
+    assert span.attributes["http.status_code"] == 200
+
+def test_profiles_are_written_off_the_event_loop(monkeypatch, tmp_path):
+    profiler = SamplingProfiler(enabled=True, sample_rate=1.0, interval_ms=1, output_dir=str(tmp_path))
+    writer_threads = []
+    original_write = profiler._write
+
+    def recording_write(*args):
+        writer_threads.append(threading.get_ident())
+        original_write(*args)
+    monkeypatch.setattr(profiler, "_write", recording_write)
+
+    async def work():
+        async with profiler.profile("http GET /slow"):
+            await asyncio.sleep(0.05)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(work())
+
+    assert writer_threads and writer_threads[0] != loop_thread
+    assert profiler.profiles_written == 1
+    assert len(list(tmp_path.glob("http_GET_slow-*.folded"))) == 1
@@ -0,0 +1,143 @@
+import asyncio
+import numpy as np
+import pytest
+
+from app.core import route_tracker as route_tracker_module
+from app.core import routing
+from app.core.route_tracker import METERS_PER_DEGREE, RouteTracker, distance_to_polyline_m
+
+DEST = {"lat": 32.10, "lon": 34.80}
+# A straight north-south road along lon 34.80
+ROUTE = {"route": [{"latitude": 32.00 + i * 0.01, "longitude": 34.80} for i in range(11)], "duration": 600.0, "distance": 11000.0, "steps": []}
+
+@pytest.fixture(autouse=True)
+def empty_route_cache(monkeypatch):
+    monkeypatch.setattr(routing, "route_cache", {})
+
+def test_distance_to_polyline_on_and_beside_the_line():
+    lats, lons = np.array([32.0, 32.1]), np.array([34.8, 34.8])
+    assert distance_to_polyline_m(32.05, 34.8, lats, lons) == pytest.approx(0.0, abs=1e-6)
+    # 0.001 degrees of longitude east of the segment
+    expected = 0.001 * METERS_PER_DEGREE * np.cos(np.radians(32.05))
+    assert distance_to_polyline_m(32.05, 34.801, lats, lons) == pytest.approx(expected, rel=1e-6)
+
+def test_distance_to_polyline_is_clamped_to_segment_ends():
+    lats, lons = np.array([32.0, 32.1]), np.array([34.8, 34.8])
+    # Past the northern end: the distance is to the endpoint, not to the infinite line
+    assert distance_to_polyline_m(32.101, 34.8, lats, lons) == pytest.approx(0.001 * METERS_PER_DEGREE, rel=1e-6)
+
+def test_distance_to_polyline_handles_single_point_and_repeated_vertices():
+    assert distance_to_polyline_m(32.001, 34.8, np.array([32.0]), np.array([34.8])) == pytest.approx(0.001 * METERS_PER_DEGREE)
+    lats, lons = np.array([32.0, 32.0, 32.1]), np.array([34.8, 34.8, 34.8])
+    assert distance_to_polyline_m(32.05, 34.8, lats, lons) == pytest.approx(0.0, abs=1e-6)
+
+def test_check_seeds_unknown_member_and_uses_cached_route():
+    tracker = RouteTracker()
+    assert tracker.check("c", "1", 32.0, 34.8, DEST, now=0) == tracker.SEED
+
+    routing.store_route(32.0, 34.8, DEST["lat"], DEST["lon"], ROUTE)
+    assert tracker.check("c", "1", 32.0, 34.8, DEST, now=0) is None
+    assert ("c", "1") in tracker.routes
+
+def test_check_reroutes_only_after_sustained_deviation():
+    tracker = RouteTracker(off_route_meters=75, off_route_seconds=10)
+    tracker.set_route("c", "1", ROUTE)
+    off_lon = 34.81  # ~940m east of the road
+
+    assert tracker.check("c", "1", 32.05, 34.80, DEST, now=0) is None
+    assert tracker.check("c", "1", 32.05, off_lon, DEST, now=1) is None
+    assert tracker.check("c", "1", 32.05, off_lon, DEST, now=5) is None
+    assert tracker.check("c", "1", 32.05, off_lon, DEST, now=11) == tracker.REROUTE
+
+def test_returning_to_route_resets_the_deviation_timer():
+    tracker = RouteTracker(off_route_meters=75, off_route_seconds=10)
+    tracker.set_route("c", "1", ROUTE)
+
+    tracker.check("c", "1", 32.05, 34.81, DEST, now=0)
+    assert tracker.check("c", "1", 32.05, 34.80, DEST, now=8) is None
+    assert tracker.check("c", "1", 32.05, 34.81, DEST, now=12) is None
+    assert tracker.check("c", "1", 32.05, 34.81, DEST, now=22) == tracker.REROUTE
+
+def test_failed_fetch_backs_off(monkeypatch):
+    calls = []
+
+    async def no_route(*args):
+        calls.append(args)
+        return {"route": [], "duration": 0.0, "distance": 0.0, "steps": []}
+    monkeypatch.setattr(route_tracker_module, "get_route_geometry", no_route)
+    tracker = RouteTracker(off_route_seconds=10)
+
+    asyncio.run(tracker.refresh("c", "1", 32.0, 34.8, DEST))
+
+    assert len(calls) == 1
+    assert ("c", "1") not in tracker.pending
+    retry_at = tracker.retry_after[("c", "1")]
+    assert tracker.check("c", "1", 32.0, 34.8, DEST, now=retry_at - 1) is None
+    assert tracker.check("c", "1", 32.0, 34.8, DEST, now=retry_at + 1) == tracker.SEED
+
+def test_schedule_refresh_marks_pending_immediately(monkeypatch):
+    async def route(*args):
+        return ROUTE
+    monkeypatch.setattr(route_tracker_module, "get_route_geometry", route)
+    tracker = RouteTracker()
+
+    async def run():
+        tracker.schedule_refresh("c", "1", 32.0, 34.8, DEST)
+        # The task has not run yet; a second frame must not schedule another fetch
+        assert tracker.check("c", "1", 32.0, 34.8, DEST) is None
+        await asyncio.gather(*tracker._tasks)
+
+    asyncio.run(run())
+    assert ("c", "1") in tracker.routes
+    assert not tracker.pending
+
+def test_refresh_serves_seed_from_route_cache(monkeypatch):
+    async def fail(*args):
+        raise AssertionError("router called although the route was cached")
+    monkeypatch.setattr(route_tracker_module, "get_route_geometry", fail)
+    routing.store_route(32.0, 34.8, DEST["lat"], DEST["lon"], ROUTE)
+    tracker = RouteTracker()
+
+    asyncio.run(tracker.refresh("c", "1", 32.0, 34.8, DEST))
+
+    assert ("c", "1") in tracker.routes
+
+def test_remaining_route_starts_at_the_nearest_vertex():
+    tracker = RouteTracker()
+    tracker.set_route("c", "u", {"route": [{"latitude": lat, "longitude": 34.8} for lat in (32.0, 32.1, 32.2, 32.3)]})
+
+    remaining = tracker.remaining_route("c", "u", 32.11, 34.8)
+
+    assert remaining.tolist() == [[32.1, 34.8], [32.2, 34.8], [32.3, 34.8]]
+    assert tracker.remaining_route("c", "other", 32.11, 34.8) is None
+
+def test_forget_during_refresh_discards_the_late_route(monkeypatch):
+    release = None
+
+    async def slow_route(*args):
+        await release.wait()
+        return ROUTE
+    monkeypatch.setattr(route_tracker_module, "get_route_geometry", slow_route)
+    tracker = RouteTracker()
+    sent = []
+
+    class Socket:
+        async def send_text(self, text):
+            sent.append(text)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        tracker.schedule_refresh("c", "1", 32.0, 34.8, DEST, Socket())
+        await asyncio.sleep(0)
+        # The member disconnects while the router is still working
+        tracker.forget("c", "1")
+        release.set()
+        await asyncio.gather(*tracker._tasks)
+
+    asyncio.run(run())
+
+    assert tracker.routes == {}
+    assert tracker.pending == set()
+    assert tracker._refreshing == {}
+    assert sent == []
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.security import UNUSABLE_PASSWORD, PasswordHashBusy
+from app.main import app
+from tests.fakes import Result, ScriptedSession, make_user
+
+client = TestClient(app)
+
+class RecordingContext:
+    """Stands in for the bcrypt CryptContext and records which thread ran each call."""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.threads = []
+        self.release = threading.Event()
+
+    def verify(self, plain_password, hashed_password):
+        self.threads.append(threading.get_ident())
+        self.release.wait(self.delay)
+        return hashed_password == f"hashed:{plain_password}"
+
+    def hash(self, password):
+        self.threads.append(threading.get_ident())
+        return f"hashed:{password}"
+
+@pytest.fixture
+def pwd_context(monkeypatch):
+    context = RecordingContext()
+    monkeypatch.setattr(security, "get_pwd_context", lambda: context)
+    monkeypatch.setattr(security, "hash_metrics", security.HashMetrics())
+    yield context
+    context.release.set()
+
+def test_bcrypt_runs_off_the_event_loop(pwd_context):
+    async def work():
+        hashed = await security.get_password_hash_async("secret")
+        verified = await security.verify_password_async("secret", hashed)
+        return verified, threading.get_ident()
+
+    verified, loop_thread = asyncio.run(work())
+
+    assert verified
+    assert len(pwd_context.threads) == 2
+    assert loop_thread not in pwd_context.threads
+    assert security.hash_metrics.calls == 2
+
+def test_unusable_password_never_reaches_bcrypt(pwd_context):
+    assert not asyncio.run(security.verify_password_async(UNUSABLE_PASSWORD, UNUSABLE_PASSWORD))
+    assert pwd_context.threads == []
+
+def test_guest_cannot_log_in_with_a_password(api, pwd_context):
+    guest = make_user(7, "guest_abc")
+    guest.hashed_password = UNUSABLE_PASSWORD
+    api.session = ScriptedSession(Result(guest))
+
+    response = client.post("/api/v1/auth/token", data={"username": "guest_abc", "password": "!"})
+
+    assert response.status_code == 401
+    assert pwd_context.threads == []
+
+def test_saturated_pool_rejects_instead_of_queueing(pwd_context, monkeypatch):
+    pwd_context.delay = 5
+    monkeypatch.setattr(security, "PASSWORD_HASH_WAIT_SECONDS", 0.05)
+
+    async def work():
+        monkeypatch.setattr(security, "_hash_slots", asyncio.Semaphore(1))
+        busy = asyncio.create_task(security.verify_password_async("a", "b"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PasswordHashBusy):
+            await security.verify_password_async("a", "b")
+        pwd_context.release.set()
+        await busy
+
+    asyncio.run(work())
+
+    assert security.hash_metrics.rejected == 1
+    assert security.hash_metrics.waiting == 0
+    assert security.hash_metrics.in_flight == 0
+
+def test_waiting_queue_is_bounded(pwd_context, monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_WAITING", 0)
+    with pytest.raises(PasswordHashBusy):
+        asyncio.run(security.get_password_hash_async("secret"))
+    assert pwd_context.threads == []
+    assert security.hash_metrics.rejected == 1
+
+def test_login_is_503_when_hashing_is_saturated(api, monkeypatch):
+    async def busy(*args):
+        raise PasswordHashBusy()
+    monkeypatch.setattr("app.api.auth.verify_password_async", busy)
+    api.session = ScriptedSession(Result(make_user(1, "driver")))
+
+    response = client.post("/api/v1/auth/token", data={"username": "driver", "password": "pw"})
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
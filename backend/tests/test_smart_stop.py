@@ -0,0 +1,90 @@
+import json
+import uuid
+from fastapi.testclient import TestClient
+
+from app.core.route_tracker import route_tracker
+from app.core.smart_stop import DETOUR_ESTIMATE, POIIndex, features_from_overpass, poi_index, suggest_stops
+from app.core.socket_manager import manager
+from app.main import app
+from app.models.domain import ConvoyMember
+from tests.fakes import Result, ScriptedSession
+
+client = TestClient(app)
+
+def make_index():
+    index = POIIndex()
+    index.load_features([
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [34.800, 32.101]}, "properties": {"name": "On Route", "category": "fuel"}},
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [34.810, 32.110]}, "properties": {"name": "Near Route", "category": "food"}},
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [35.500, 31.000]}, "properties": {"name": "Far Away", "category": "fuel"}},
+    ])
+    return index
+
+def test_ranks_by_total_detour_and_skips_far_pois():
+    positions = [(32.00, 34.80), (32.00, 34.81)]
+    routes = [[(32.00, 34.80), (32.20, 34.80)], [(32.00, 34.81), (32.20, 34.81)]]
+
+    result = suggest_stops(positions, routes, index=make_index(), buffer_m=2000)
+
+    names = [stop["name"] for stop in result["stops"]]
+    assert names == ["On Route", "Near Route"]
+    assert result["centroid"]["latitude"] == 32.00
+
+def test_category_filter_and_empty_index():
+    positions = [(32.00, 34.80)]
+    routes = [[(32.00, 34.80), (32.20, 34.80)]]
+
+    result = suggest_stops(positions, routes, index=make_index(), category="food")
+    assert [stop["name"] for stop in result["stops"]] == ["Near Route"]
+
+    assert suggest_stops(positions, routes, index=POIIndex())["stops"] == []
+
+def use_index(monkeypatch, index: POIIndex):
+    for attr in ("tree", "lats", "lons", "names", "categories"):
+        monkeypatch.setattr(poi_index, attr, getattr(index, attr))
+
+def test_endpoint_ranks_along_the_tracked_route(api, monkeypatch):
+    convoy_id = str(uuid.uuid4())
+    use_index(monkeypatch, make_index())
+    api.session = ScriptedSession(Result(ConvoyMember(convoy_id=uuid.UUID(convoy_id), user_id=1)))
+    monkeypatch.setitem(manager.convoy_destinations, convoy_id, {"lat": 32.20, "lon": 34.90})
+    monkeypatch.setitem(manager.convoy_state, convoy_id, {"1": {"username": "driver", "lat": 32.00, "lon": 34.80}})
+    # North along 34.80 first: a straight line to the destination passes ~5 km east of "On Route"
+    route = [(32.00, 34.80), (32.20, 34.80), (32.20, 34.90)]
+    route_tracker.set_route(convoy_id, "1", {"route": [{"latitude": lat, "longitude": lon} for lat, lon in route]})
+    try:
+        response = client.get(f"/api/v1/convoys/{convoy_id}/smart-stop")
+    finally:
+        route_tracker.forget(convoy_id, "1")
+
+    body = response.json()
+    assert body["route_sources"] == {"tracked": 1, "cached": 0, "straight_line": 0}
+    assert body["stops"][0]["name"] == "On Route"
+    assert body["detour_estimate"] == DETOUR_ESTIMATE
+
+def test_endpoint_is_for_members_only(api, monkeypatch):
+    use_index(monkeypatch, make_index())
+    api.session = ScriptedSession(Result())
+    response = client.get(f"/api/v1/convoys/{uuid.uuid4()}/smart-stop")
+    assert response.status_code == 403
+
+def test_endpoint_without_poi_data_is_503(api, monkeypatch):
+    use_index(monkeypatch, POIIndex())
+    api.session = ScriptedSession(Result(ConvoyMember(convoy_id=uuid.uuid4(), user_id=1)))
+    response = client.get(f"/api/v1/convoys/{uuid.uuid4()}/smart-stop")
+    assert response.status_code == 503
+    assert "POI_DATA_PATH" in response.json()["detail"]
+
+def test_overpass_export_is_loaded(tmp_path):
+    path = tmp_path / "pois.json"
+    path.write_text(json.dumps({"elements": [
+        {"type": "node", "lat": 32.1, "lon": 34.8, "tags": {"amenity": "fuel", "name": "Paz"}},
+        {"type": "way", "center": {"lat": 32.2, "lon": 34.9}, "tags": {"highway": "rest_area"}},
+        {"type": "relation", "tags": {"amenity": "cafe"}},
+    ]}))
+    index = POIIndex()
+
+    assert index.load(str(path)) == 2
+    assert index.names == ["Paz", "Unknown"]
+    assert index.categories == ["fuel", "rest_area"]
+    assert features_from_overpass([]) == []
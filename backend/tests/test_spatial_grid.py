@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+from fastapi.testclient import TestClient
+
+from app.core import socket_manager
+from app.core.socket_manager import ConnectionManager, manager as manager_singleton
+from app.core.spatial_grid import SpatialGrid
+from app.main import app
+from app.models.domain import ConvoyMember
+from benchmarks.run import stub_driving_distance
+from tests.fakes import Result, ScriptedSession
+
+client = TestClient(app)
+
+def test_query_returns_only_entities_in_radius():
+    grid = SpatialGrid(cell_degrees=0.01)
+    grid.update("near", 32.0005, 34.8000)
+    grid.update("far", 32.1000, 34.8000)
+
+    hits = grid.query(32.0, 34.8, radius_m=200)
+
+    assert [key for key, _ in hits] == ["near"]
+
+def test_update_moves_between_cells_and_remove_cleans_up():
+    grid = SpatialGrid(cell_degrees=0.01)
+    grid.update("car", 32.0, 34.8)
+    grid.update("car", 32.5, 34.8)
+
+    assert grid.query(32.0, 34.8, radius_m=500) == []
+    assert [key for key, _ in grid.query(32.5, 34.8, radius_m=500)] == ["car"]
+
+    grid.remove("car")
+    assert len(grid) == 0
+    assert grid.cells == {}
+
+class Socket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+def test_manager_keeps_the_grid_in_sync_with_member_state(monkeypatch):
+    monkeypatch.setattr(socket_manager, "get_driving_distance", stub_driving_distance)
+    manager = ConnectionManager()
+    lead, tail = Socket(), Socket()
+
+    async def lifecycle():
+        await manager.connect("c1", lead)
+        await manager.connect("c1", tail)
+        await manager.update_location_and_broadcast("c1", "1", "lead", 32.0000, 34.8000)
+        await manager.update_location_and_broadcast("c1", "2", "tail", 32.0020, 34.8000)
+        assert [m["user_id"] for m in manager.nearby_members(32.0, 34.8, 500)] == ["1", "2"]
+
+        # Moving into another cell keeps exactly one grid entry for the member
+        await manager.update_location_and_broadcast("c1", "2", "tail", 32.0500, 34.8000)
+        assert [m["user_id"] for m in manager.nearby_members(32.0, 34.8, 500)] == ["1"]
+        assert len(manager.member_grid) == 2
+
+        manager.disconnect("c1", tail, "2")
+        assert set(manager.member_grid.positions) == {("c1", "1")}
+        assert manager.nearby_members(32.05, 34.8, 500) == []
+
+        # The last member leaving clears the convoy from state and grid alike
+        manager.disconnect("c1", lead, "1")
+
+    asyncio.run(lifecycle())
+
+    assert manager.convoy_state == {}
+    assert len(manager.member_grid) == 0
+    assert manager.member_grid.cells == {}
+
+def test_nearby_members_filters_by_convoy():
+    manager = ConnectionManager()
+    for cid, uid, lat in [("c1", "1", 32.0), ("c2", "2", 32.0001)]:
+        manager.convoy_state.setdefault(cid, {})[uid] = {"username": f"u{uid}", "lat": lat, "lon": 34.8}
+        manager.member_grid.update((cid, uid), lat, 34.8)
+
+    members = manager.nearby_members(32.0, 34.8, 100, convoy_id="c2")
+
+    assert [(m["convoy_id"], m["user_id"], m["username"]) for m in members] == [("c2", "2", "u2")]
+
+def test_live_members_endpoint_checks_membership(api, monkeypatch):
+    convoy_id = uuid.uuid4()
+    monkeypatch.setitem(manager_singleton.convoy_state, str(convoy_id), {"2": {"username": "tail", "lat": 32.0, "lon": 34.8}})
+    monkeypatch.setattr(manager_singleton, "member_grid", SpatialGrid())
+    manager_singleton.member_grid.update((str(convoy_id), "2"), 32.0, 34.8)
+    url = f"/api/v1/convoys/{convoy_id}/members/nearby/live?lat=32.0&lon=34.8&radius_km=1"
+
+    api.session = ScriptedSession(Result())
+    assert client.get(url).status_code == 403
+
+    api.session = ScriptedSession(Result(ConvoyMember(convoy_id=convoy_id, user_id=1)))
+    response = client.get(url)
+    assert [m["username"] for m in response.json()] == ["tail"]
@@ -0,0 +1,86 @@
+import asyncio
+from app.core.socket_manager import ConnectionManager
+from app.core.spectators import SpectatorHub
+
+class RecordingSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+def make_source() -> ConnectionManager:
+    source = ConnectionManager()
+    source.convoy_state["c1"] = {
+        "1": {"username": "lead", "lat": 32.123456, "lon": 34.876543, "distance": 1234.0, "rank": 1},
+        "2": {"username": "tail", "lat": 32.2, "lon": 34.9, "distance": 5678.0, "rank": 2},
+    }
+    return source
+
+def test_snapshot_is_coarsened_and_shared_by_all_spectators():
+    source = make_source()
+    hub = SpectatorHub(source=source)
+    watchers = [RecordingSocket() for _ in range(3)]
+
+    async def scenario():
+        for ws in watchers:
+            await hub.connect("c1", ws)
+        await hub.tick()
+        # Nothing moved, nothing re-sent
+        await hub.tick()
+
+    asyncio.run(scenario())
+
+    assert all(len(ws.sent) == 1 for ws in watchers)
+    assert watchers[0].sent[0] is watchers[1].sent[0]
+    assert '"lat":32.123' in watchers[0].sent[0]
+    assert '"lead"' in watchers[0].sent[0]
+
+def test_spectators_never_touch_member_state():
+    source = make_source()
+    hub = SpectatorHub(source=source)
+
+    async def scenario():
+        ws = RecordingSocket()
+        await hub.connect("c1", ws)
+        await hub.tick()
+        hub.disconnect("c1", ws)
+
+    asyncio.run(scenario())
+
+    assert source.active_connections == {}
+    assert set(source.convoy_state["c1"]) == {"1", "2"}
+    assert hub.spectators == {}
+
+def test_slow_spectator_is_dropped_without_delaying_the_others():
+    hub = SpectatorHub(source=make_source(), send_timeout=0.05)
+    fast = [RecordingSocket() for _ in range(2)]
+    stuck = RecordingSocket(delay=10)
+    sends_done = []
+
+    async def scenario():
+        for ws in [fast[0], stuck, fast[1]]:
+            hub.spectators.setdefault("c1", []).append(ws)
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        await hub.tick()
+        sends_done.append(loop.time() - started_at)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+    # Sent concurrently: the tick takes one timeout, not one per slow viewer in front of the rest
+    assert sends_done[0] < 1
+    assert all(len(ws.sent) == 1 for ws in fast)
+    assert stuck.sent == [] and stuck.closed
+    assert hub.spectators["c1"] == fast
+    assert hub.dropped == 1
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import httpx
+from sqlalchemy import create_engine, text
+from app.core import routing, socket_manager
+from app.core.socket_manager import ConnectionManager
+from app.core.tracing import Span, SpanExporter, instrument_engine_tracing, tracer
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+class Socket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+def enable_tracing(monkeypatch, sample_rate=1.0) -> CollectingExporter:
+    exporter = CollectingExporter()
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "sample_rate", sample_rate)
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    return exporter
+
+def test_frame_breaks_down_into_routing_ranking_encoding_and_sends(monkeypatch):
+    exporter = enable_tracing(monkeypatch)
+
+    # Real get_driving_distance over a stubbed transport, so the span under test is its own
+    def osrm(request):
+        return httpx.Response(200, json={"code": "Ok", "routes": [{"distance": 1000.0}]})
+    monkeypatch.setattr(routing, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(osrm)))
+    monkeypatch.setattr(socket_manager, "get_driving_distance", routing.get_driving_distance)
+    manager = ConnectionManager()
+    manager.set_destination("c1", 32.08, 34.78)
+    manager.active_connections["c1"] = [Socket(), Socket()]
+
+    async def frame():
+        with tracer.span("ws.frame"):
+            await manager.update_location_and_broadcast("c1", "1", "driver", 32.18, 34.87)
+
+    asyncio.run(frame())
+
+    names = [span.name for span in exporter.spans]
+    for expected in ["osrm.driving_distance", "convoy.rank", "broadcast.encode", "broadcast.send", "ws.frame"]:
+        assert expected in names
+    assert names.count("socket.send") >= 2
+    root = next(span for span in exporter.spans if span.name == "ws.frame")
+    assert root.parent_span_id is None
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    osrm_span = next(span for span in exporter.spans if span.name == "osrm.driving_distance")
+    assert osrm_span.attributes["http.status_code"] == 200
+    assert osrm_span.attributes["http.url"].startswith(routing.OSRM_BASE_URL)
+
+def test_unsampled_traces_record_nothing(monkeypatch):
+    exporter = enable_tracing(monkeypatch, sample_rate=0.0)
+    with tracer.span("ws.frame"):
+        with tracer.span("convoy.rank"):
+            assert not tracer.recording()
+    assert exporter.spans == []
+
+def test_db_statements_become_child_spans(monkeypatch):
+    exporter = enable_tracing(monkeypatch)
+    engine = create_engine("sqlite://")
+    instrument_engine_tracing(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with tracer.span("http GET"):
+            conn.execute(text("SELECT 2"))
+
+    db_spans = [span for span in exporter.spans if span.name == "db.query"]
+    assert [span.attributes["db.statement"] for span in db_spans] == ["SELECT 2"]
+    assert db_spans[0].parent_span_id is not None
+
+def test_exporter_writes_in_batches_and_flushes_on_close(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = SpanExporter(kind="file", path=str(path), batch_size=3, flush_seconds=3600)
+
+    def finished(name):
+        return Span(name=name, trace_id="t", span_id=name, parent_span_id=None, start_time_unix_nano=0, end_time_unix_nano=1)
+
+    exporter.export(finished("a"))
+    exporter.export(finished("b"))
+    assert not path.exists()
+    exporter.export(finished("c"))
+    exporter.export(finished("d"))
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["a", "b", "c"]
+
+    exporter.close()
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["a", "b", "c", "d"]
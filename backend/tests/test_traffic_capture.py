@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from app.core import socket_manager
+from app.core.traffic_capture import TrafficRecorder, read_capture
+from benchmarks.replay import Replayer
+from benchmarks.run import stub_driving_distance
+
+def test_capture_round_trips_through_replay(tmp_path, monkeypatch, capsys):
+    recorder = TrafficRecorder(enabled=True, directory=str(tmp_path), flush_every=1)
+    dest = {"lat": 32.0853, "lon": 34.7818}
+    recorder.connect("c1", "1", dest)
+    recorder.connect("c1", "2", dest)
+    recorder.frame("c1", "1", 32.18, 34.87, 600)
+    recorder.frame("c1", "2", 32.17, 34.86, None)
+    recorder.disconnect("c1", "2")
+    recorder.close()
+
+    records = list(read_capture(recorder.path))
+    assert [r[1] for r in records] == ["c", "c", "f", "f", "d"]
+
+    monkeypatch.setattr(socket_manager, "get_driving_distance", stub_driving_distance)
+    results = asyncio.run(Replayer(records, speed=None).run())
+
+    assert results["frames"] == 2
+    # Both frames go to both members, plus the first analytics push
+    assert results["messages_sent"] == 6
+
+def test_disabled_recorder_writes_nothing(tmp_path):
+    recorder = TrafficRecorder(enabled=False, directory=str(tmp_path))
+    recorder.frame("c1", "1", 32.18, 34.87, None)
+    assert recorder.path is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_records_are_buffered_and_written_off_the_calling_thread(tmp_path, monkeypatch):
+    recorder = TrafficRecorder(enabled=True, directory=str(tmp_path), flush_every=3)
+    writer_threads = []
+    original_append = recorder._append
+
+    def recording_append(chunk):
+        writer_threads.append(threading.get_ident())
+        original_append(chunk)
+    monkeypatch.setattr(recorder, "_append", recording_append)
+
+    recorder.frame("c1", "1", 32.18, 34.87, None)
+    recorder.frame("c1", "1", 32.19, 34.87, None)
+    assert writer_threads == []
+    recorder.frame("c1", "1", 32.20, 34.87, None)
+    recorder.frame("c1", "1", 32.21, 34.87, None)
+    recorder.close()
+
+    assert writer_threads and threading.get_ident() not in writer_threads
+    assert [r[4] for r in read_capture(recorder.path)] == [32.18, 32.19, 32.20, 32.21]
+
+def test_timed_replay_keeps_each_members_frames_in_order(monkeypatch):
+    events = []
+
+    async def slow_first_frame(lat1, lon1, lat2, lon2):
+        events.append(("start", lat1))
+        # The first frame is slowest; without per-member ordering the second would overtake it
+        await asyncio.sleep(0.05 if lat1 == 32.18 else 0)
+        events.append(("end", lat1))
+        return 1000.0
+    monkeypatch.setattr(socket_manager, "get_driving_distance", slow_first_frame)
+    records = [
+        [0.0, "c", "c1", "1", 32.0853, 34.7818],
+        [0.0, "f", "c1", "1", 32.18, 34.87, None],
+        [0.0, "f", "c1", "1", 32.19, 34.87, None],
+        [0.0, "d", "c1", "1"],
+    ]
+
+    results = asyncio.run(Replayer(records, speed=1.0).run())
+
+    assert results["frames"] == 2
+    assert events == [("start", 32.18), ("end", 32.18), ("start", 32.19), ("end", 32.19)]